@@ -1,13 +1,85 @@
-from flask import Flask
-from flask_cors import CORS
-from .cache.redis_client import RedisClient
+from .config import Config
 
-# Initialize the Flask application
-app = Flask(__name__)
-cors = CORS(app)
 
-# Initialize Redis Client
-app.redis_client = RedisClient()
+def create_app():
+    """
+    Build the Flask application. Importing the package does no work; the environment is
+    validated, logging configured and components wired here, once per boot. Redis
+    connections and upstream HTTP sessions are still opened on first use.
+    """
+    Config.validate_env()
+    Config.configure_logging()
 
-# Register Flask routes
-from .routes import *
+    from flask import Flask
+    from flask_cors import CORS
+    from .cache.redis_client import RedisClient
+    from .services.currency_service import CurrencyService
+    from .services.prefetch_scheduler import PrefetchScheduler
+    from .services.rate_stream import RateStreamBroker
+    from .utils.rate_limiting import RateLimiter
+    from .utils.api_responses import TimedJSONProvider
+
+    # Initialize the Flask application
+    app = Flask(__name__)
+    app.json = TimedJSONProvider(app)
+    CORS(app)
+
+    # Initialize Redis Client
+    app.redis_client = RedisClient()
+
+    if Config.LOCAL_CACHE_ENABLED:
+        from .cache.local_cached_redis_client import LocalCachedRedisClient
+
+        # Serve warm keys from worker memory, invalidated across workers via Redis pub/sub
+        app.redis_client = LocalCachedRedisClient(app.redis_client)
+
+    # One long-lived service per worker so upstream HTTP sessions are reused across requests
+    app.currency_service = CurrencyService(app.redis_client)
+    app.rate_limiter = RateLimiter(app.redis_client)
+
+    # Pushes stored rates to this worker's streaming clients; listens on first subscribe
+    app.rate_stream = RateStreamBroker(app.redis_client)
+
+    # Background threads start in the serving process, never here: a preloaded gunicorn
+    # master stays idle. Gunicorn starts them as each worker boots, and these hooks start
+    # them on the first request anywhere else (and restart them after a fork).
+
+    # Keep the most requested pairs warm in the background
+    app.prefetch_scheduler = PrefetchScheduler(app.currency_service)
+
+    if Config.PREFETCH_ENABLED:
+        @app.before_request
+        def ensure_prefetch_scheduler():
+            app.prefetch_scheduler.start()
+
+    if Config.CURRENCY_INDEX_ENABLED:
+        # Loads the providers' currency lists so unknown codes are rejected in memory
+        @app.before_request
+        def ensure_currency_index():
+            app.currency_service.currency_index.start()
+
+    if Config.ADAPTIVE_TTL_ENABLED:
+        from .services.ttl_policy import QuotaMonitor
+
+        # Tracks XE quota so rate TTLs stretch before the monthly budget runs out
+        app.quota_monitor = QuotaMonitor(app.currency_service)
+
+        @app.before_request
+        def ensure_quota_monitor():
+            app.quota_monitor.start()
+
+    if Config.SNAPSHOT_ENABLED:
+        from .services.rate_snapshot import SnapshotRefresher
+
+        # One process per host rewrites the shared rate matrices that every worker maps
+        app.snapshot_refresher = SnapshotRefresher(app.redis_client)
+
+        @app.before_request
+        def ensure_snapshot_refresher():
+            app.snapshot_refresher.start()
+
+    # Register Flask routes
+    from .routes import register_routes
+    register_routes(app)
+
+    return app
@@ -0,0 +1,72 @@
+import contextlib
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.config import logging, Config
+from app.cache.async_redis_client import AsyncRedisClient
+from app.utils.rate_limiting import AsyncRateLimiter
+from app.services.async_currency_service import AsyncCurrencyService
+from app.controllers.async_currency_controller import routes, build_error_response
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    """ASGI counterpart of check_rate_limiting/add_rate_limit_headers in routes.py."""
+
+    async def dispatch(self, request, call_next):
+        rate_limiter = request.app.state.rate_limiter
+        api_key = request.headers.get(Config.RATE_LIMIT_API_KEY_HEADER)
+        client_ip = request.client.host if request.client else None
+
+        key, limit, window = rate_limiter.resolve(client_ip, request.url.path, api_key)
+        result = await rate_limiter.hit(key, limit, window)
+
+        if result.allowed:
+            response = await call_next(request)
+        else:
+            logging.error("Rate limit exceeded")
+            response = build_error_response(message="Rate limit exceeded", status=429)
+            response.headers["Retry-After"] = str(result.reset)
+
+        response.headers["RateLimit-Limit"] = str(result.limit)
+        response.headers["RateLimit-Remaining"] = str(result.remaining)
+        response.headers["RateLimit-Reset"] = str(result.reset)
+        return response
+
+
+def create_asgi_app(redis_client=None, currency_service=None):
+    """
+    Build the Starlette app. Redis and upstream HTTP clients are bound to the event loop,
+    so unless injected (tests) they are created in the lifespan of each worker.
+    """
+    Config.validate_env()
+    Config.configure_logging()
+
+    @contextlib.asynccontextmanager
+    async def lifespan(asgi_app):
+        owned = not hasattr(asgi_app.state, "currency_service")
+
+        if owned:
+            setup(asgi_app, AsyncRedisClient())
+
+        yield
+
+        if owned:
+            await asgi_app.state.currency_service.aclose()
+            await asgi_app.state.redis_client.aclose()
+
+    def setup(asgi_app, client, service=None):
+        asgi_app.state.redis_client = client
+        asgi_app.state.currency_service = service or AsyncCurrencyService(client)
+        asgi_app.state.rate_limiter = AsyncRateLimiter(client)
+
+    asgi_app = Starlette(
+        routes=routes,
+        middleware=[Middleware(CORSMiddleware, allow_origins=["*"]), Middleware(RateLimitMiddleware)],
+        lifespan=lifespan
+    )
+
+    if redis_client is not None:
+        setup(asgi_app, redis_client, currency_service)
+
+    return asgi_app
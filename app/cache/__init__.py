@@ -1 +1,4 @@
-from .redis_client import RedisClient
\ No newline at end of file
+from .redis_client import RedisClient
+from .single_flight import SingleFlight
+from .local_cache import LocalCache
+from .local_cached_redis_client import LocalCachedRedisClient
\ No newline at end of file
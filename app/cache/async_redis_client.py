@@ -0,0 +1,100 @@
+import redis.asyncio as redis
+from redis.asyncio.retry import Retry
+from app.config import Config
+from app.cache.redis_client import RELEASE_LOCK_SCRIPT, DegradedMode, degradable, pool_options, retry_backoff
+
+
+class AsyncRedisClient(DegradedMode):
+    """redis.asyncio counterpart of RedisClient for the ASGI serving path, with the same degraded mode."""
+
+    def __init__(self, client=None):
+        self.client = client or redis.Redis(connection_pool=redis.BlockingConnectionPool.from_url(
+            Config.REDISCLOUD_URL,
+            retry=Retry(retry_backoff(), Config.REDIS_RETRY_ATTEMPTS),
+            **pool_options()
+        ))
+        self.release_lock_script = self.client.register_script(RELEASE_LOCK_SCRIPT)
+
+    @degradable
+    async def set_value(self, key, value, expiry):
+        await self.client.setex(key, expiry, value)
+
+    @degradable
+    async def get_value(self, key):
+        return await self.client.get(key)
+
+    @degradable
+    async def get_values(self, keys):
+        if not keys:
+            return []
+
+        return await self.client.mget(keys)
+
+    @degradable
+    async def set_hash(self, key, mapping, expiry):
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.delete(key)
+        pipeline.hset(key, mapping=mapping)
+        pipeline.expire(key, expiry)
+        await pipeline.execute()
+
+    @degradable
+    async def get_hash_fields(self, key, fields):
+        return await self.client.hmget(key, fields)
+
+    @degradable
+    async def get_hash(self, key):
+        return await self.client.hgetall(key)
+
+    @degradable
+    async def set_values(self, mapping, expiry):
+        if not mapping:
+            return
+
+        pipeline = self.client.pipeline(transaction=False)
+
+        for key, value in mapping.items():
+            pipeline.setex(key, expiry, value)
+
+        await pipeline.execute()
+
+    @degradable
+    async def append_values(self, mapping, expiry):
+        if not mapping:
+            return
+
+        pipeline = self.client.pipeline(transaction=False)
+
+        for key, value in mapping.items():
+            pipeline.append(key, value)
+            pipeline.expire(key, expiry)
+
+        await pipeline.execute()
+
+    @degradable
+    async def add_members(self, key, members, expiry):
+        if not members:
+            return
+
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.sadd(key, *members)
+        pipeline.expire(key, expiry)
+        await pipeline.execute()
+
+    @degradable
+    async def acquire_lock(self, key, token, ttl_ms):
+        return bool(await self.client.set(key, token, nx=True, px=ttl_ms))
+
+    @degradable
+    async def release_lock(self, key, token):
+        await self.release_lock_script(keys=[key], args=[token])
+
+    @degradable
+    async def publish(self, channel, message):
+        await self.client.publish(channel, message)
+
+    def register_script(self, script):
+        return self.client.register_script(script)
+
+    async def aclose(self):
+        await self.client.aclose()
@@ -0,0 +1,111 @@
+import time
+import uuid
+import asyncio
+from redis.exceptions import RedisError
+from app.config import logging, Config
+from app.utils.errors import ServiceUnavailableError
+
+
+class AsyncSingleFlight:
+    """
+    asyncio version of SingleFlight. Callers in the same event loop share one task per
+    cache key; across processes the same Redis lock decides who calls upstream.
+    """
+
+    def __init__(self, redis_client, lock_ttl_ms=None, wait_ms=None, poll_ms=None):
+        self.redis_client = redis_client
+        self.lock_ttl_ms = lock_ttl_ms or Config.SINGLE_FLIGHT_LOCK_TTL_MS
+        self.wait_ms = wait_ms or Config.SINGLE_FLIGHT_WAIT_MS
+        self.poll_ms = poll_ms or Config.SINGLE_FLIGHT_POLL_MS
+
+        self._inflight = {}
+        self._refreshing = {}
+
+
+    async def load(self, cache_key, read_fresh, fetch, read_last_known=None):
+        task = self._inflight.get(cache_key)
+
+        if task is None:
+            task = asyncio.ensure_future(self._load(cache_key, read_fresh, fetch, read_last_known))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+
+        # Shielded so one cancelled request does not cancel the fetch everyone else awaits
+        return await asyncio.shield(task)
+
+
+    async def _load(self, cache_key, read_fresh, fetch, read_last_known):
+        lock_key = f"lock_{cache_key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_ms / 1000
+
+        while True:
+            if await self.acquire_lock(lock_key, token):
+                try:
+                    value = await read_fresh()
+                    return value if value is not None else await fetch()
+                finally:
+                    await self.release_lock(lock_key, token)
+
+            if time.monotonic() >= deadline:
+                break
+
+            await asyncio.sleep(self.poll_ms / 1000)
+
+            value = await read_fresh()
+            if value is not None:
+                return value
+
+        value = await read_last_known() if read_last_known else None
+
+        if value is not None:
+            logging.warning("Single-flight wait budget exhausted for %s, serving last known value.", cache_key)
+            return value
+
+        raise ServiceUnavailableError(f"Refresh of {cache_key} is still in progress, please retry.")
+
+
+    def refresh(self, cache_key, fetch):
+        """Schedule a background refresh of a stale key; never blocks the caller."""
+
+        if cache_key in self._refreshing or cache_key in self._inflight:
+            return False
+
+        task = asyncio.ensure_future(self._refresh(cache_key, fetch))
+        self._refreshing[cache_key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(cache_key, None))
+        return True
+
+
+    async def _refresh(self, cache_key, fetch):
+        lock_key = f"lock_{cache_key}"
+        token = uuid.uuid4().hex
+
+        try:
+            if not await self.acquire_lock(lock_key, token):
+                return
+
+            try:
+                await fetch()
+            finally:
+                await self.release_lock(lock_key, token)
+
+        except Exception as err:
+            logging.warning("Background refresh of %s failed: %s", cache_key, err)
+
+
+    async def acquire_lock(self, lock_key, token):
+        """Take `lock_key`, or go ahead unlocked while Redis is unavailable, as SingleFlight does."""
+
+        try:
+            return await self.redis_client.acquire_lock(lock_key, token, self.lock_ttl_ms)
+        except RedisError as err:
+            logging.warning("Could not take %s, fetching without the lock: %s", lock_key, err)
+            return True
+
+
+    async def release_lock(self, lock_key, token):
+        try:
+            await self.redis_client.release_lock(lock_key, token)
+        except RedisError as err:
+            logging.warning("Could not release %s: %s", lock_key, err)
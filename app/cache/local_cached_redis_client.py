@@ -0,0 +1,111 @@
+import json
+import time
+import uuid
+from app.config import logging, Config
+from app.cache.pubsub import PubSubListener
+from app.cache.local_cache import LocalCache
+from app.utils.process_local import ProcessLocal
+
+
+class LocalCachedRedisClient:
+    """
+    Wraps RedisClient with an in-process L1 cache so warm reads never leave the worker.
+    Every write publishes the changed keys on a Redis channel, and each worker evicts
+    them from its own L1. LOCAL_CACHE_TTL bounds staleness if a message is missed.
+    """
+
+    def __init__(self, redis_client, local_cache=None):
+        self.redis_client = redis_client
+        self.local_cache = local_cache or LocalCache(Config.LOCAL_CACHE_MAX_ENTRIES, Config.LOCAL_CACHE_TTL)
+        self.channel = Config.CACHE_INVALIDATION_CHANNEL
+        self._origin = ProcessLocal(lambda: uuid.uuid4().hex)
+
+        self.listener = PubSubListener(redis_client)
+        self.listener.subscribe(self.channel, self._on_invalidation)
+        self.listen_retry_at = 0.0
+
+    def __getattr__(self, name):
+        # Locks, scripts and anything else not cached locally go straight to Redis
+        return getattr(self.redis_client, name)
+
+    def _ensure_listening(self):
+        # Runs on every L1 miss, so while Redis is down it must not pay a connect timeout each time
+        if self.redis_client.degraded or time.monotonic() < self.listen_retry_at:
+            return
+
+        try:
+            self.listener.start()
+        except Exception as err:
+            self.listen_retry_at = time.monotonic() + Config.REDIS_DEGRADED_COOLDOWN
+            logging.warning("Cache invalidation listener unavailable, retrying in %ss: %s", Config.REDIS_DEGRADED_COOLDOWN, err)
+
+    def get_value(self, key):
+        value = self.local_cache.get(key)
+
+        if value is not None:
+            return value
+
+        self._ensure_listening()
+        value = self.redis_client.get_value(key)
+
+        if value is not None:
+            self.local_cache.set(key, value)
+
+        return value
+
+    def get_values(self, keys):
+        values = [self.local_cache.get(key) for key in keys]
+        missing = [key for key, value in zip(keys, values) if value is None]
+
+        if not missing:
+            return values
+
+        self._ensure_listening()
+        fetched = dict(zip(missing, self.redis_client.get_values(missing)))
+
+        for key, value in fetched.items():
+            if value is not None:
+                self.local_cache.set(key, value)
+
+        return [value if value is not None else fetched[key] for key, value in zip(keys, values)]
+
+    def set_value(self, key, value, expiry):
+        self.redis_client.set_value(key, value, expiry)
+        self._publish_changes({key: value}, expiry)
+
+    def set_values(self, mapping, expiry):
+        if not mapping:
+            return
+
+        self.redis_client.set_values(mapping, expiry)
+        self._publish_changes(mapping, expiry)
+
+    def append_values(self, mapping, expiry):
+        self.redis_client.append_values(mapping, expiry)
+
+        # Appended keys are not known locally in full, so evict instead of updating
+        self.local_cache.delete(*mapping)
+        self._publish(list(mapping))
+
+    def _publish_changes(self, mapping, expiry):
+        for key, value in mapping.items():
+            self.local_cache.set(key, value.encode('utf-8') if isinstance(value, str) else value, expiry)
+
+        self._publish(list(mapping))
+
+    def _publish(self, keys):
+        message = json.dumps({"origin": self._origin.get(), "keys": keys})
+
+        try:
+            self.redis_client.publish(self.channel, message)
+        except Exception as err:
+            logging.warning("Could not publish cache invalidation: %s", err)
+
+    def _on_invalidation(self, data):
+        message = json.loads(data)
+
+        if message.get("origin") != self._origin.get():
+            self.local_cache.delete(*message.get("keys", []))
+
+    def stats(self):
+        return self.local_cache.stats()
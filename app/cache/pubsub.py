@@ -0,0 +1,42 @@
+import time
+from app.config import logging
+from app.utils.process_local import ProcessLocal
+
+
+class PubSubListener:
+    """
+    One Redis pub/sub connection and listener thread per process, dispatching
+    messages to the handler registered for each channel.
+    """
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.handlers = {}
+        self._listener = ProcessLocal(self._start)
+
+    def subscribe(self, channel, handler):
+        self.handlers[channel] = handler
+
+    def start(self):
+        """Start the listener thread for this process if it is not running yet."""
+        return self._listener.get()
+
+    def _start(self):
+        pubsub = self.redis_client.pubsub()
+        pubsub.subscribe(**{channel: self._dispatch for channel in self.handlers})
+
+        thread = pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=self._on_error)
+        logging.info("Listening for pub/sub messages on %s.", ', '.join(self.handlers))
+
+        return pubsub, thread
+
+    def _dispatch(self, message):
+        channel = message["channel"].decode('utf-8') if isinstance(message["channel"], bytes) else message["channel"]
+        handler = self.handlers.get(channel)
+
+        if handler:
+            handler(message["data"])
+
+    def _on_error(self, error, pubsub, thread):
+        logging.warning("Pub/sub listener error, reconnecting: %s", error)
+        time.sleep(1)
@@ -1,14 +1,246 @@
+import time
 import redis
-from app.config import Config
+import inspect
+import functools
+from contextlib import contextmanager
+from redis.retry import Retry
+from redis.backoff import FullJitterBackoff
+from app.config import logging, Config
+from app.utils.metrics import observe_redis
 
+# Delete the lock only if we still own it, so a slow holder never releases someone else's lock
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
 
-class RedisClient:
+class CacheUnavailableError(redis.ConnectionError):
+    """Raised without a network call while the client is in degraded mode."""
+
+
+def degradable(method):
+    """
+    Fail fast while Redis is known to be down, and enter degraded mode when a command
+    still fails after the pool's retries. Works on the asyncio client's coroutines too.
+    """
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            if self.degraded:
+                raise CacheUnavailableError("Redis is in degraded mode.")
+
+            try:
+                return await method(self, *args, **kwargs)
+            except (redis.ConnectionError, redis.TimeoutError) as err:
+                self.enter_degraded_mode(err)
+                raise
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.degraded:
+            raise CacheUnavailableError("Redis is in degraded mode.")
+
+        try:
+            return method(self, *args, **kwargs)
+        except (redis.ConnectionError, redis.TimeoutError) as err:
+            self.enter_degraded_mode(err)
+            raise
+
+    return wrapper
+
+
+def pool_options():
+    """
+    Settings shared by the sync and asyncio pools. Pools are bounded: callers wait up to
+    REDIS_POOL_TIMEOUT for a free connection instead of opening unbounded sockets.
+    """
+    return {
+        "max_connections": Config.REDIS_MAX_CONNECTIONS,
+        "timeout": Config.REDIS_POOL_TIMEOUT,
+        "socket_timeout": Config.REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": Config.REDIS_CONNECT_TIMEOUT,
+        "socket_keepalive": True,
+        "health_check_interval": Config.REDIS_HEALTH_CHECK_INTERVAL,
+        "retry_on_error": [redis.ConnectionError, redis.TimeoutError]
+    }
+
+
+def retry_backoff():
+    return FullJitterBackoff(cap=Config.REDIS_RETRY_CAP_MS / 1000, base=Config.REDIS_RETRY_BASE_MS / 1000)
+
+
+def build_pool(url):
+    """Connection and timeout errors are retried REDIS_RETRY_ATTEMPTS times with full jitter."""
+    return redis.BlockingConnectionPool.from_url(url, retry=Retry(retry_backoff(), Config.REDIS_RETRY_ATTEMPTS), **pool_options())
+
+
+class DegradedMode:
+    """Degraded-mode state shared by the sync and asyncio clients; see `degradable`."""
+
+    degraded_until = 0.0
+
+    @property
+    def degraded(self):
+        """True for REDIS_DEGRADED_COOLDOWN seconds after a failure; callers should bypass the cache."""
+        return time.monotonic() < self.degraded_until
+
+    def enter_degraded_mode(self, err):
+        if not self.degraded:
+            logging.warning("Redis unavailable, bypassing the cache for %ss: %s", Config.REDIS_DEGRADED_COOLDOWN, err)
+
+        self.degraded_until = time.monotonic() + Config.REDIS_DEGRADED_COOLDOWN
+
+
+class RedisClient(DegradedMode):
     def __init__(self):
+        self.reconnect()
+
+    def reconnect(self):
+        """
+        Replace the connection pool. Called in each forked gunicorn worker so it never
+        shares a socket with the master or its siblings.
+        """
         # self.client = redis.Redis(host='localhost', port=6379, db=0)
-        self.client = redis.Redis.from_url(Config.REDISCLOUD_URL)
+        self.client = redis.Redis(connection_pool=build_pool(Config.REDISCLOUD_URL))
+        self.release_lock_script = self.client.register_script(RELEASE_LOCK_SCRIPT)
+
+    @contextmanager
+    def pipeline(self, transaction=False):
+        """Queue commands on a pipeline and send them in one round trip when the block exits."""
+        pipeline = self.client.pipeline(transaction=transaction)
+        yield pipeline
+        pipeline.execute()
 
+    @degradable
+    @observe_redis
     def set_value(self, key, value, expiry):
         self.client.setex(key, expiry, value)
 
+    @degradable
+    @observe_redis
     def get_value(self, key):
-        return self.client.get(key)
\ No newline at end of file
+        return self.client.get(key)
+
+    @degradable
+    @observe_redis
+    def get_values(self, keys):
+        """Fetch several keys in a single MGET round trip."""
+        if not keys:
+            return []
+
+        return self.client.mget(keys)
+
+    @degradable
+    @observe_redis
+    def set_hash(self, key, mapping, expiry):
+        """Replace a hash with `mapping` atomically, so readers never see a half-written one."""
+        with self.pipeline(transaction=True) as pipeline:
+            pipeline.delete(key)
+            pipeline.hset(key, mapping=mapping)
+            pipeline.expire(key, expiry)
+
+    @degradable
+    @observe_redis
+    def get_hash_fields(self, key, fields):
+        """HMGET: the values of `fields`, None where a field (or the hash) is missing."""
+        return self.client.hmget(key, fields)
+
+    @degradable
+    @observe_redis
+    def get_hash(self, key):
+        return self.client.hgetall(key)
+
+    @degradable
+    @observe_redis
+    def set_values(self, mapping, expiry):
+        """Write several keys with the same expiry in a single pipelined round trip."""
+        if not mapping:
+            return
+
+        with self.pipeline() as pipeline:
+            for key, value in mapping.items():
+                pipeline.setex(key, expiry, value)
+
+
+    @degradable
+    @observe_redis
+    def append_values(self, mapping, expiry):
+        """APPEND bytes to several keys and refresh their expiry in one pipelined round trip."""
+        if not mapping:
+            return
+
+        with self.pipeline() as pipeline:
+            for key, value in mapping.items():
+                pipeline.append(key, value)
+                pipeline.expire(key, expiry)
+
+    @degradable
+    @observe_redis
+    def acquire_lock(self, key, token, ttl_ms):
+        """Take a short-lived lock with SET NX PX. Returns True when the lock is ours."""
+        return bool(self.client.set(key, token, nx=True, px=ttl_ms))
+
+    @degradable
+    @observe_redis
+    def release_lock(self, key, token):
+        self.release_lock_script(keys=[key], args=[token])
+
+
+    @degradable
+    @observe_redis
+    def publish(self, channel, message):
+        self.client.publish(channel, message)
+
+    @degradable
+    @observe_redis
+    def add_members(self, key, members, expiry):
+        """SADD `members` to a set and refresh its expiry in one pipelined round trip."""
+        if not members:
+            return
+
+        with self.pipeline() as pipeline:
+            pipeline.sadd(key, *members)
+            pipeline.expire(key, expiry)
+
+    @degradable
+    @observe_redis
+    def get_members(self, key):
+        return self.client.smembers(key)
+
+    @degradable
+    @observe_redis
+    def remove_members(self, key, members):
+        if members:
+            self.client.srem(key, *members)
+
+    def pubsub(self):
+        return self.client.pubsub(ignore_subscribe_messages=True)
+
+    def register_script(self, script):
+        """Return a callable that runs `script` with EVALSHA, loading it on first use."""
+        return self.client.register_script(script)
+
+    @degradable
+    @observe_redis
+    def increment_scores(self, key, scores):
+        """ZINCRBY several members of a sorted set in one pipelined round trip."""
+        with self.pipeline() as pipeline:
+            for member, amount in scores.items():
+                pipeline.zincrby(key, amount, member)
+
+    @degradable
+    @observe_redis
+    def top_members(self, key, count):
+        return self.client.zrevrange(key, 0, count - 1)
+
+    @degradable
+    @observe_redis
+    def decay_scores(self, key, factor, max_members):
+        """Multiply every score by `factor` and keep only the `max_members` highest."""
+        with self.pipeline() as pipeline:
+            pipeline.zunionstore(key, {key: factor})
+            pipeline.zremrangebyrank(key, 0, -(max_members + 1))
@@ -0,0 +1,175 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from redis.exceptions import RedisError
+from app.config import logging, Config
+from app.utils.errors import ServiceUnavailableError
+from app.utils.process_local import ProcessLocal
+
+
+class SingleFlight:
+    """
+    Coalesces cache fills across threads, workers and dynos: a short-lived Redis lock per
+    cache key lets exactly one caller hit the upstream API while everyone else polls the
+    cache for the result, falling back to the last known value once the wait budget runs out.
+    """
+
+    def __init__(self, redis_client, lock_ttl_ms=None, wait_ms=None, poll_ms=None):
+        self.redis_client = redis_client
+        self.lock_ttl_ms = lock_ttl_ms or Config.SINGLE_FLIGHT_LOCK_TTL_MS
+        self.wait_ms = wait_ms or Config.SINGLE_FLIGHT_WAIT_MS
+        self.poll_ms = poll_ms or Config.SINGLE_FLIGHT_POLL_MS
+
+        # Background refreshes run on a small per-process pool; `pending` skips the Redis
+        # lock round trip for keys this process is already refreshing
+        self._executor = ProcessLocal(lambda: ThreadPoolExecutor(max_workers=Config.REFRESH_WORKERS, thread_name_prefix="rate-refresh"))
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+
+
+    def load(self, cache_key, read_fresh, fetch, read_last_known=None):
+        """
+        Return `read_fresh()` if another caller already filled the key, otherwise run
+        `fetch()` while holding the key's lock. Callers that lose the race wait for the
+        winner for at most `wait_ms`.
+        """
+        lock_key = f"lock_{cache_key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_ms / 1000
+
+        while True:
+            if self.acquire_lock(lock_key, token):
+                try:
+                    # The previous holder may have filled the key just before we got the lock
+                    value = read_fresh()
+                    return value if value is not None else fetch()
+                finally:
+                    self.release_lock(lock_key, token)
+
+            if time.monotonic() >= deadline:
+                break
+
+            time.sleep(self.poll_ms / 1000)
+
+            value = read_fresh()
+            if value is not None:
+                return value
+
+        value = read_last_known() if read_last_known else None
+
+        if value is not None:
+            logging.warning("Single-flight wait budget exhausted for %s, serving last known value.", cache_key)
+            return value
+
+        raise ServiceUnavailableError(f"Refresh of {cache_key} is still in progress, please retry.")
+
+
+    def refresh(self, cache_key, fetch):
+        """
+        Start a background `fetch()` for a stale key unless one is already running
+        anywhere. Returns immediately; the caller keeps serving the stale value.
+        """
+        with self._pending_lock:
+            if cache_key in self._pending:
+                return False
+            self._pending.add(cache_key)
+
+        def run():
+            try:
+                self.try_run(cache_key, fetch)
+            except Exception as err:
+                logging.warning("Background refresh of %s failed: %s", cache_key, err)
+            finally:
+                with self._pending_lock:
+                    self._pending.discard(cache_key)
+
+        self._executor.get().submit(run)
+        return True
+
+
+    def refresh_many(self, cache_keys, fetch):
+        """
+        Refresh several stale keys in one background `fetch(keys)`. Each key takes the same
+        lock as `refresh`, so `fetch` only gets the keys no other caller is refreshing,
+        whether through a single-key refresh or another batch.
+        """
+        with self._pending_lock:
+            cache_keys = [cache_key for cache_key in cache_keys if cache_key not in self._pending]
+            self._pending.update(cache_keys)
+
+        if not cache_keys:
+            return False
+
+        def run():
+            try:
+                self.try_run_many(cache_keys, fetch)
+            except Exception as err:
+                logging.warning("Background refresh of %s failed: %s", ', '.join(cache_keys), err)
+            finally:
+                with self._pending_lock:
+                    self._pending.difference_update(cache_keys)
+
+        self._executor.get().submit(run)
+        return True
+
+
+    def try_run(self, cache_key, fetch):
+        """Run `fetch()` now unless another caller holds the key's lock. Returns False if skipped."""
+
+        lock_key = f"lock_{cache_key}"
+        token = uuid.uuid4().hex
+
+        if not self.acquire_lock(lock_key, token):
+            return False
+
+        try:
+            fetch()
+            return True
+        finally:
+            self.release_lock(lock_key, token)
+
+
+    def acquire_lock(self, lock_key, token):
+        """
+        Take `lock_key` for this caller. While Redis is unavailable nobody can hold the
+        lock, so the caller goes ahead unlocked, the same way reads bypass the cache.
+        """
+        try:
+            return self.redis_client.acquire_lock(lock_key, token, self.lock_ttl_ms)
+        except RedisError as err:
+            logging.warning("Could not take %s, fetching without the lock: %s", lock_key, err)
+            return True
+
+
+    def release_lock(self, lock_key, token):
+        """Release `lock_key`; a lock Redis could not release expires after lock_ttl_ms."""
+
+        try:
+            self.redis_client.release_lock(lock_key, token)
+        except RedisError as err:
+            logging.warning("Could not release %s: %s", lock_key, err)
+
+
+    def try_run_many(self, cache_keys, fetch):
+        """
+        Run `fetch(keys)` now with the keys whose locks no other caller holds.
+        Returns False if every key was skipped.
+        """
+        tokens = {}
+
+        try:
+            for cache_key in cache_keys:
+                token = uuid.uuid4().hex
+
+                if self.acquire_lock(f"lock_{cache_key}", token):
+                    tokens[cache_key] = token
+
+            if not tokens:
+                return False
+
+            fetch(list(tokens))
+            return True
+        finally:
+            for cache_key, token in tokens.items():
+                self.release_lock(f"lock_{cache_key}", token)
@@ -1,7 +1,6 @@
 import os
 import logging
 from dotenv import load_dotenv
-from colorlog import ColoredFormatter
 
 # Load environment variables from .env file
 load_dotenv()
@@ -16,11 +15,100 @@ OPEN_XR_BASE_URL_VAR = "OPEN_XR_BASE_URL"
 XECD_API_ID_VAR = "XECD_API_ID"
 XECD_API_KEY_VAR = "XECD_API_KEY"
 XECD_BASE_URL_VAR = "XECD_BASE_URL"
+OPEN_XR_TABLE_MODE_VAR = "OPEN_XR_TABLE_MODE"
+OPEN_XR_TABLE_BASE_VAR = "OPEN_XR_TABLE_BASE"
+BATCH_MAX_PAIRS_VAR = "BATCH_MAX_PAIRS"
+HTTP_POOL_SIZE_VAR = "HTTP_POOL_SIZE"
+HTTP_CONNECT_TIMEOUT_VAR = "HTTP_CONNECT_TIMEOUT"
+HTTP_READ_TIMEOUT_VAR = "HTTP_READ_TIMEOUT"
+RATE_SOFT_TTL_VAR = "RATE_SOFT_TTL"
+RATE_HARD_TTL_VAR = "RATE_HARD_TTL"
+SINGLE_FLIGHT_LOCK_TTL_MS_VAR = "SINGLE_FLIGHT_LOCK_TTL_MS"
+SINGLE_FLIGHT_WAIT_MS_VAR = "SINGLE_FLIGHT_WAIT_MS"
+SINGLE_FLIGHT_POLL_MS_VAR = "SINGLE_FLIGHT_POLL_MS"
+REFRESH_WORKERS_VAR = "REFRESH_WORKERS"
+LOCAL_CACHE_ENABLED_VAR = "LOCAL_CACHE_ENABLED"
+LOCAL_CACHE_MAX_ENTRIES_VAR = "LOCAL_CACHE_MAX_ENTRIES"
+LOCAL_CACHE_TTL_VAR = "LOCAL_CACHE_TTL"
+CACHE_INVALIDATION_CHANNEL_VAR = "CACHE_INVALIDATION_CHANNEL"
+RATE_LIMIT_DEFAULT_VAR = "RATE_LIMIT_DEFAULT"
+RATE_LIMIT_ROUTES_VAR = "RATE_LIMIT_ROUTES"
+RATE_LIMIT_API_KEYS_VAR = "RATE_LIMIT_API_KEYS"
+RATE_LIMIT_API_KEY_HEADER_VAR = "RATE_LIMIT_API_KEY_HEADER"
+RATE_LIMIT_LOCAL_MAX_KEYS_VAR = "RATE_LIMIT_LOCAL_MAX_KEYS"
+RATE_LIMIT_REDIS_RETRY_SECONDS_VAR = "RATE_LIMIT_REDIS_RETRY_SECONDS"
+PREFETCH_ENABLED_VAR = "PREFETCH_ENABLED"
+PREFETCH_INTERVAL_VAR = "PREFETCH_INTERVAL"
+PREFETCH_TOP_N_VAR = "PREFETCH_TOP_N"
+PREFETCH_BUDGET_VAR = "PREFETCH_BUDGET"
+PREFETCH_CONCURRENCY_VAR = "PREFETCH_CONCURRENCY"
+PREFETCH_LEAD_VAR = "PREFETCH_LEAD"
+HOT_PAIR_HALF_LIFE_VAR = "HOT_PAIR_HALF_LIFE"
+HISTORY_RETENTION_DAYS_VAR = "HISTORY_RETENTION_DAYS"
+HISTORY_MAX_RANGE_DAYS_VAR = "HISTORY_MAX_RANGE_DAYS"
+HISTORY_MAX_POINTS_VAR = "HISTORY_MAX_POINTS"
+CURRENCIES_SOFT_TTL_VAR = "CURRENCIES_SOFT_TTL"
+CURRENCIES_HARD_TTL_VAR = "CURRENCIES_HARD_TTL"
+ACCOUNT_INFO_SOFT_TTL_VAR = "ACCOUNT_INFO_SOFT_TTL"
+ACCOUNT_INFO_HARD_TTL_VAR = "ACCOUNT_INFO_HARD_TTL"
+RESPONSE_CACHE_MAX_ENTRIES_VAR = "RESPONSE_CACHE_MAX_ENTRIES"
+RESPONSE_COMPRESS_MIN_BYTES_VAR = "RESPONSE_COMPRESS_MIN_BYTES"
+APP_ENV_VAR = "APP_ENV"
+LOG_LEVEL_VAR = "LOG_LEVEL"
+LOG_FORMAT_VAR = "LOG_FORMAT"
+LOG_QUEUE_SIZE_VAR = "LOG_QUEUE_SIZE"
+LOG_PAYLOAD_SAMPLE_RATE_VAR = "LOG_PAYLOAD_SAMPLE_RATE"
+LOG_PAYLOAD_MAX_BYTES_VAR = "LOG_PAYLOAD_MAX_BYTES"
+PROVIDER_FAILURE_THRESHOLD_VAR = "PROVIDER_FAILURE_THRESHOLD"
+PROVIDER_RESET_TIMEOUT_VAR = "PROVIDER_RESET_TIMEOUT"
+PROVIDER_LATENCY_WINDOW_VAR = "PROVIDER_LATENCY_WINDOW"
+HEDGE_ENABLED_VAR = "HEDGE_ENABLED"
+HEDGE_MIN_DELAY_MS_VAR = "HEDGE_MIN_DELAY_MS"
+HEDGE_DEFAULT_DELAY_MS_VAR = "HEDGE_DEFAULT_DELAY_MS"
+HEDGE_WORKERS_VAR = "HEDGE_WORKERS"
+BULK_CHUNK_ROWS_VAR = "BULK_CHUNK_ROWS"
+SNAPSHOT_ENABLED_VAR = "SNAPSHOT_ENABLED"
+SNAPSHOT_DIR_VAR = "SNAPSHOT_DIR"
+SNAPSHOT_INTERVAL_VAR = "SNAPSHOT_INTERVAL"
+SNAPSHOT_CHECK_INTERVAL_VAR = "SNAPSHOT_CHECK_INTERVAL"
+REDIS_MAX_CONNECTIONS_VAR = "REDIS_MAX_CONNECTIONS"
+REDIS_POOL_TIMEOUT_VAR = "REDIS_POOL_TIMEOUT"
+REDIS_SOCKET_TIMEOUT_VAR = "REDIS_SOCKET_TIMEOUT"
+REDIS_CONNECT_TIMEOUT_VAR = "REDIS_CONNECT_TIMEOUT"
+REDIS_HEALTH_CHECK_INTERVAL_VAR = "REDIS_HEALTH_CHECK_INTERVAL"
+REDIS_RETRY_ATTEMPTS_VAR = "REDIS_RETRY_ATTEMPTS"
+REDIS_RETRY_BASE_MS_VAR = "REDIS_RETRY_BASE_MS"
+REDIS_RETRY_CAP_MS_VAR = "REDIS_RETRY_CAP_MS"
+REDIS_DEGRADED_COOLDOWN_VAR = "REDIS_DEGRADED_COOLDOWN"
+RATE_STREAM_CHANNEL_VAR = "RATE_STREAM_CHANNEL"
+RATE_STREAM_MAX_CONNECTIONS_VAR = "RATE_STREAM_MAX_CONNECTIONS"
+RATE_STREAM_MAX_PAIRS_VAR = "RATE_STREAM_MAX_PAIRS"
+RATE_STREAM_HEARTBEAT_VAR = "RATE_STREAM_HEARTBEAT"
+RATE_STREAM_MAX_DURATION_VAR = "RATE_STREAM_MAX_DURATION"
+ADAPTIVE_TTL_ENABLED_VAR = "ADAPTIVE_TTL_ENABLED"
+ADAPTIVE_TTL_MIN_VAR = "ADAPTIVE_TTL_MIN"
+ADAPTIVE_TTL_MAX_VAR = "ADAPTIVE_TTL_MAX"
+ADAPTIVE_TTL_DRIFT_TOLERANCE_VAR = "ADAPTIVE_TTL_DRIFT_TOLERANCE"
+ADAPTIVE_TTL_CHECK_INTERVAL_VAR = "ADAPTIVE_TTL_CHECK_INTERVAL"
+XE_MONTHLY_BUDGET_VAR = "XE_MONTHLY_BUDGET"
+CURRENCY_INDEX_ENABLED_VAR = "CURRENCY_INDEX_ENABLED"
+CURRENCY_INDEX_TTL_VAR = "CURRENCY_INDEX_TTL"
+CURRENCY_INDEX_HARD_TTL_VAR = "CURRENCY_INDEX_HARD_TTL"
+CURRENCY_INDEX_CHECK_INTERVAL_VAR = "CURRENCY_INDEX_CHECK_INTERVAL"
+NEGATIVE_CACHE_TTL_VAR = "NEGATIVE_CACHE_TTL"
+SERVER_TIMING_ENABLED_VAR = "SERVER_TIMING_ENABLED"
+PROFILE_SAMPLE_RATE_VAR = "PROFILE_SAMPLE_RATE"
+PROFILE_SECRET_VAR = "PROFILE_SECRET"
+PROFILE_HEADER_VAR = "PROFILE_HEADER"
+PROFILE_MODE_VAR = "PROFILE_MODE"
+PROFILE_INTERVAL_MS_VAR = "PROFILE_INTERVAL_MS"
+PROFILE_DIR_VAR = "PROFILE_DIR"
+PROFILE_MAX_FILES_VAR = "PROFILE_MAX_FILES"
 
 
-# Configuration class
+# Configuration class. A blank value, as left by copying .env.example, means the default.
 class Config:
-    APP_PORT: int = int(os.getenv(APP_PORT_VAR))
+    APP_PORT: int = int(os.getenv(APP_PORT_VAR) or 5000)
     APP_HOST: str = os.getenv(APP_HOST_VAR)
     APP_NAME: str = os.getenv(APP_NAME_VAR)
     REDISCLOUD_URL: str = os.getenv(REDISCLOUD_URL_VAR)
@@ -29,6 +117,95 @@ class Config:
     XECD_API_ID: str = os.getenv(XECD_API_ID_VAR)
     XECD_API_KEY: str = os.getenv(XECD_API_KEY_VAR)
     XECD_BASE_URL: str = os.getenv(XECD_BASE_URL_VAR)
+    OPEN_XR_TABLE_MODE: bool = (os.getenv(OPEN_XR_TABLE_MODE_VAR) or "false").lower() == "true"
+    OPEN_XR_TABLE_BASE: str = (os.getenv(OPEN_XR_TABLE_BASE_VAR) or "USD").upper()
+    BATCH_MAX_PAIRS: int = int(os.getenv(BATCH_MAX_PAIRS_VAR) or 100)
+    HTTP_POOL_SIZE: int = int(os.getenv(HTTP_POOL_SIZE_VAR) or 10)
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv(HTTP_CONNECT_TIMEOUT_VAR) or 3.05)
+    HTTP_READ_TIMEOUT: float = float(os.getenv(HTTP_READ_TIMEOUT_VAR) or 10)
+    RATE_SOFT_TTL: int = int(os.getenv(RATE_SOFT_TTL_VAR) or 3600)
+    RATE_HARD_TTL: int = int(os.getenv(RATE_HARD_TTL_VAR) or 86400)
+    SINGLE_FLIGHT_LOCK_TTL_MS: int = int(os.getenv(SINGLE_FLIGHT_LOCK_TTL_MS_VAR) or 15000)
+    SINGLE_FLIGHT_WAIT_MS: int = int(os.getenv(SINGLE_FLIGHT_WAIT_MS_VAR) or 3000)
+    SINGLE_FLIGHT_POLL_MS: int = int(os.getenv(SINGLE_FLIGHT_POLL_MS_VAR) or 25)
+    REFRESH_WORKERS: int = int(os.getenv(REFRESH_WORKERS_VAR) or 4)
+    LOCAL_CACHE_ENABLED: bool = (os.getenv(LOCAL_CACHE_ENABLED_VAR) or "true").lower() == "true"
+    LOCAL_CACHE_MAX_ENTRIES: int = int(os.getenv(LOCAL_CACHE_MAX_ENTRIES_VAR) or 10000)
+    LOCAL_CACHE_TTL: int = int(os.getenv(LOCAL_CACHE_TTL_VAR) or 60)
+    CACHE_INVALIDATION_CHANNEL: str = os.getenv(CACHE_INVALIDATION_CHANNEL_VAR) or "cache-invalidation"
+    RATE_LIMIT_DEFAULT: str = os.getenv(RATE_LIMIT_DEFAULT_VAR) or "60/3600"  # 60 requests per hour
+    RATE_LIMIT_ROUTES: str = os.getenv(RATE_LIMIT_ROUTES_VAR) or ""  # e.g. /api/v2/conversion/batch=10/60
+    RATE_LIMIT_API_KEYS: str = os.getenv(RATE_LIMIT_API_KEYS_VAR) or ""  # e.g. partner-key=5000/3600
+    RATE_LIMIT_API_KEY_HEADER: str = os.getenv(RATE_LIMIT_API_KEY_HEADER_VAR) or "X-API-Key"
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = int(os.getenv(RATE_LIMIT_LOCAL_MAX_KEYS_VAR) or 10000)
+    RATE_LIMIT_REDIS_RETRY_SECONDS: int = int(os.getenv(RATE_LIMIT_REDIS_RETRY_SECONDS_VAR) or 5)
+    PREFETCH_ENABLED: bool = (os.getenv(PREFETCH_ENABLED_VAR) or "false").lower() == "true"
+    PREFETCH_INTERVAL: int = int(os.getenv(PREFETCH_INTERVAL_VAR) or 60)
+    PREFETCH_TOP_N: int = int(os.getenv(PREFETCH_TOP_N_VAR) or 100)
+    PREFETCH_BUDGET: int = int(os.getenv(PREFETCH_BUDGET_VAR) or 20)  # Max upstream calls per cycle
+    PREFETCH_CONCURRENCY: int = int(os.getenv(PREFETCH_CONCURRENCY_VAR) or 4)
+    PREFETCH_LEAD: int = int(os.getenv(PREFETCH_LEAD_VAR) or 300)  # Refresh this many seconds before the soft TTL
+    HOT_PAIR_HALF_LIFE: int = int(os.getenv(HOT_PAIR_HALF_LIFE_VAR) or 86400)
+    HISTORY_RETENTION_DAYS: int = int(os.getenv(HISTORY_RETENTION_DAYS_VAR) or 400)
+    HISTORY_MAX_RANGE_DAYS: int = int(os.getenv(HISTORY_MAX_RANGE_DAYS_VAR) or 366)
+    HISTORY_MAX_POINTS: int = int(os.getenv(HISTORY_MAX_POINTS_VAR) or 1000)
+    CURRENCIES_SOFT_TTL: int = int(os.getenv(CURRENCIES_SOFT_TTL_VAR) or 86400)
+    CURRENCIES_HARD_TTL: int = int(os.getenv(CURRENCIES_HARD_TTL_VAR) or 7 * 86400)
+    ACCOUNT_INFO_SOFT_TTL: int = int(os.getenv(ACCOUNT_INFO_SOFT_TTL_VAR) or 300)
+    ACCOUNT_INFO_HARD_TTL: int = int(os.getenv(ACCOUNT_INFO_HARD_TTL_VAR) or 3600)
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv(RESPONSE_CACHE_MAX_ENTRIES_VAR) or 10000)
+    RESPONSE_COMPRESS_MIN_BYTES: int = int(os.getenv(RESPONSE_COMPRESS_MIN_BYTES_VAR) or 1024)
+    APP_ENV: str = os.getenv(APP_ENV_VAR) or "production"  # Set to development for colored logs
+    LOG_LEVEL: str = (os.getenv(LOG_LEVEL_VAR) or "INFO").upper()
+    LOG_FORMAT: str = os.getenv(LOG_FORMAT_VAR) or ("color" if APP_ENV == "development" else "json")
+    LOG_QUEUE_SIZE: int = int(os.getenv(LOG_QUEUE_SIZE_VAR) or 10000)
+    LOG_PAYLOAD_SAMPLE_RATE: float = float(os.getenv(LOG_PAYLOAD_SAMPLE_RATE_VAR) or 0.0)
+    LOG_PAYLOAD_MAX_BYTES: int = int(os.getenv(LOG_PAYLOAD_MAX_BYTES_VAR) or 2048)
+    PROVIDER_FAILURE_THRESHOLD: int = int(os.getenv(PROVIDER_FAILURE_THRESHOLD_VAR) or 5)
+    PROVIDER_RESET_TIMEOUT: float = float(os.getenv(PROVIDER_RESET_TIMEOUT_VAR) or 30)
+    PROVIDER_LATENCY_WINDOW: int = int(os.getenv(PROVIDER_LATENCY_WINDOW_VAR) or 200)
+    HEDGE_ENABLED: bool = (os.getenv(HEDGE_ENABLED_VAR) or "false").lower() == "true"
+    HEDGE_MIN_DELAY_MS: int = int(os.getenv(HEDGE_MIN_DELAY_MS_VAR) or 50)
+    HEDGE_DEFAULT_DELAY_MS: int = int(os.getenv(HEDGE_DEFAULT_DELAY_MS_VAR) or 500)
+    HEDGE_WORKERS: int = int(os.getenv(HEDGE_WORKERS_VAR) or 8)
+    BULK_CHUNK_ROWS: int = int(os.getenv(BULK_CHUNK_ROWS_VAR) or 5000)
+    SNAPSHOT_ENABLED: bool = (os.getenv(SNAPSHOT_ENABLED_VAR) or "false").lower() == "true"
+    SNAPSHOT_DIR: str = os.getenv(SNAPSHOT_DIR_VAR) or "/tmp/currency-rate-snapshots"
+    SNAPSHOT_INTERVAL: float = float(os.getenv(SNAPSHOT_INTERVAL_VAR) or 30)
+    SNAPSHOT_CHECK_INTERVAL: float = float(os.getenv(SNAPSHOT_CHECK_INTERVAL_VAR) or 1.0)
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv(REDIS_MAX_CONNECTIONS_VAR) or 50)  # Per worker process
+    REDIS_POOL_TIMEOUT: float = float(os.getenv(REDIS_POOL_TIMEOUT_VAR) or 1.0)  # Seconds to wait for a free pooled connection
+    REDIS_SOCKET_TIMEOUT: float = float(os.getenv(REDIS_SOCKET_TIMEOUT_VAR) or 0.5)
+    REDIS_CONNECT_TIMEOUT: float = float(os.getenv(REDIS_CONNECT_TIMEOUT_VAR) or 0.5)
+    REDIS_HEALTH_CHECK_INTERVAL: int = int(os.getenv(REDIS_HEALTH_CHECK_INTERVAL_VAR) or 30)
+    REDIS_RETRY_ATTEMPTS: int = int(os.getenv(REDIS_RETRY_ATTEMPTS_VAR) or 2)
+    REDIS_RETRY_BASE_MS: int = int(os.getenv(REDIS_RETRY_BASE_MS_VAR) or 10)
+    REDIS_RETRY_CAP_MS: int = int(os.getenv(REDIS_RETRY_CAP_MS_VAR) or 200)
+    REDIS_DEGRADED_COOLDOWN: float = float(os.getenv(REDIS_DEGRADED_COOLDOWN_VAR) or 5)  # Seconds to bypass Redis after it fails
+    RATE_STREAM_CHANNEL: str = os.getenv(RATE_STREAM_CHANNEL_VAR) or "rate-updates"
+    RATE_STREAM_MAX_CONNECTIONS: int = int(os.getenv(RATE_STREAM_MAX_CONNECTIONS_VAR) or 100)  # Per worker process
+    RATE_STREAM_MAX_PAIRS: int = int(os.getenv(RATE_STREAM_MAX_PAIRS_VAR) or 20)
+    RATE_STREAM_HEARTBEAT: float = float(os.getenv(RATE_STREAM_HEARTBEAT_VAR) or 15)
+    RATE_STREAM_MAX_DURATION: float = float(os.getenv(RATE_STREAM_MAX_DURATION_VAR) or 3600)  # Clients reconnect after this many seconds
+    ADAPTIVE_TTL_ENABLED: bool = (os.getenv(ADAPTIVE_TTL_ENABLED_VAR) or "false").lower() == "true"
+    ADAPTIVE_TTL_MIN: int = int(os.getenv(ADAPTIVE_TTL_MIN_VAR) or 60)
+    ADAPTIVE_TTL_MAX: int = int(os.getenv(ADAPTIVE_TTL_MAX_VAR) or 43200)  # Longest TTL from drift alone; the XE quota can stretch up to RATE_HARD_TTL
+    ADAPTIVE_TTL_DRIFT_TOLERANCE: float = float(os.getenv(ADAPTIVE_TTL_DRIFT_TOLERANCE_VAR) or 0.0005)  # Relative change a cached rate may miss
+    ADAPTIVE_TTL_CHECK_INTERVAL: int = int(os.getenv(ADAPTIVE_TTL_CHECK_INTERVAL_VAR) or 300)
+    XE_MONTHLY_BUDGET: int = int(os.getenv(XE_MONTHLY_BUDGET_VAR) or 0)  # XE calls per billing period; 0 uses the package limit
+    CURRENCY_INDEX_ENABLED: bool = (os.getenv(CURRENCY_INDEX_ENABLED_VAR) or "true").lower() == "true"
+    CURRENCY_INDEX_TTL: int = int(os.getenv(CURRENCY_INDEX_TTL_VAR) or 86400)  # Rebuilt from the providers after this
+    CURRENCY_INDEX_HARD_TTL: int = int(os.getenv(CURRENCY_INDEX_HARD_TTL_VAR) or 7 * 86400)
+    CURRENCY_INDEX_CHECK_INTERVAL: int = int(os.getenv(CURRENCY_INDEX_CHECK_INTERVAL_VAR) or 300)  # Workers reload the shared copy this often
+    NEGATIVE_CACHE_TTL: int = int(os.getenv(NEGATIVE_CACHE_TTL_VAR) or 600)  # How long a pair the provider does not quote is remembered
+    SERVER_TIMING_ENABLED: bool = (os.getenv(SERVER_TIMING_ENABLED_VAR) or "true").lower() == "true"
+    PROFILE_SAMPLE_RATE: float = float(os.getenv(PROFILE_SAMPLE_RATE_VAR) or 0.0)  # Fraction of requests profiled without a token
+    PROFILE_SECRET: str = os.getenv(PROFILE_SECRET_VAR) or ""  # Signs profiling tokens; unset, the header is ignored
+    PROFILE_HEADER: str = os.getenv(PROFILE_HEADER_VAR) or "X-Profile-Token"
+    PROFILE_MODE: str = (os.getenv(PROFILE_MODE_VAR) or "sample").lower()  # sample or cprofile
+    PROFILE_INTERVAL_MS: float = float(os.getenv(PROFILE_INTERVAL_MS_VAR) or 5)
+    PROFILE_DIR: str = os.getenv(PROFILE_DIR_VAR) or "/tmp/currency-profiles"
+    PROFILE_MAX_FILES: int = int(os.getenv(PROFILE_MAX_FILES_VAR) or 500)  # Oldest profiles are deleted past this
 
 
     @classmethod
@@ -50,18 +227,16 @@ class Config:
         if missing_vars:
             raise EnvironmentError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
-# Define color format for log messages
-formatter = ColoredFormatter(
-    "%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    log_colors={
-        "INFO": "green",
-        "WARNING": "yellow",
-        "ERROR": "red",
-    },
-)
 
-# Set up logging with color formatter
-handler = logging.StreamHandler()
-handler.setFormatter(formatter)
-logging.basicConfig(level=logging.INFO, handlers=[handler])
\ No newline at end of file
+    @classmethod
+    def configure_logging(cls):
+        """Colored lines in development, JSON lines in production, written by a background thread."""
+        from app.utils.log_pipeline import configure_logging
+
+        configure_logging(
+            level=cls.LOG_LEVEL,
+            log_format=cls.LOG_FORMAT,
+            queue_size=cls.LOG_QUEUE_SIZE,
+            sample_rate=cls.LOG_PAYLOAD_SAMPLE_RATE,
+            max_bytes=cls.LOG_PAYLOAD_MAX_BYTES
+        )
@@ -0,0 +1,102 @@
+from starlette.routing import Route
+from starlette.responses import JSONResponse
+from app.utils.errors import UnprocessableEntityError
+from app.utils.api_responses import success_body, error_body
+
+API_PREFIX = "/api"
+VERSION_TWO_PREFIX = "/v2"
+
+
+def build_success_response(message, status=200, data=None):
+    return JSONResponse(success_body(message, status, data), status_code=status)
+
+
+def build_error_response(message, status=400, data=None):
+    return JSONResponse(error_body(message, status, data), status_code=status)
+
+
+async def version_one_conversion(request):
+    from_currency = request.query_params.get('from')
+    to_currency = request.query_params.get('to')
+
+    try:
+        currency_service = request.app.state.currency_service
+        conversion_rate = await currency_service.get_conversion_rate_v1(from_currency.upper(), to_currency.upper())
+
+        response = {
+            "from": from_currency.upper(),
+            "to": to_currency.upper(),
+            "rate": conversion_rate['rate'],
+            "timestamp": conversion_rate['timestamp']
+        }
+
+        return JSONResponse(response, status_code=200)
+
+    except UnprocessableEntityError as e:
+        return build_error_response(message="[V1] currency conversion failed.", status=422, data=e.message)
+    except Exception as e:
+        return build_error_response(message="[V1] currency conversion failed.", status=400, data=str(e))
+
+
+async def version_two_conversion(request):
+    from_currency = request.query_params.get('from')
+    to_currency = request.query_params.get('to')
+
+    try:
+        currency_service = request.app.state.currency_service
+        conversion_rate = await currency_service.get_conversion_rate_v2(from_currency.upper(), to_currency.upper())
+
+        response = {
+            "from": from_currency.upper(),
+            "to": to_currency.upper(),
+            "rate": conversion_rate['rate'],
+            "timestamp": conversion_rate['timestamp']
+        }
+
+        return build_success_response(message="[V2] currency converted successfully.", data=response)
+
+    except UnprocessableEntityError as e:
+        return build_error_response(message="[V2] currency conversion failed.", status=422, data=e.message)
+    except Exception as e:
+        return build_error_response(message="[V2] currency conversion failed.", status=400, data=str(e))
+
+
+async def get_account_info(request):
+    try:
+        account_info = await request.app.state.currency_service.get_account_info()
+
+        return build_success_response(message="XE account info retrieved", data=account_info)
+
+    except Exception as e:
+        return build_error_response(message="Failed to retrieve account info", status=400, data=str(e))
+
+
+async def get_currencies(request):
+    try:
+        params = request.query_params
+
+        result = await request.app.state.currency_service.get_currencies(
+            iso=params.get("iso"),
+            obsolete=params.get("obsolete", "false").lower() == "true",
+            language=params.get("language", "en"),
+            additional_info=params.get("additionalInfo"),
+            crypto=params.get("crypto", "false").lower() == "true"
+        )
+
+        return build_success_response(message="XE currencies list retrieved", data=result)
+
+    except Exception as e:
+        return build_error_response(message="Failed to retrieve currencies", status=400, data=str(e))
+
+
+async def home(request):
+    return build_success_response(message="Welcome to currency-converter-service")
+
+
+routes = [
+    Route(API_PREFIX, home, methods=['GET']),
+    Route(API_PREFIX + "/conversion", version_one_conversion, methods=['GET']),
+    Route(API_PREFIX + VERSION_TWO_PREFIX + "/conversion", version_two_conversion, methods=['GET']),
+    Route(API_PREFIX + VERSION_TWO_PREFIX + "/account-info", get_account_info, methods=['GET']),
+    Route(API_PREFIX + VERSION_TWO_PREFIX + "/currencies", get_currencies, methods=['GET']),
+]
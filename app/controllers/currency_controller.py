@@ -1,11 +1,16 @@
-from app import app
-from flask import Blueprint, request, jsonify
-from app.services.currency_service import CurrencyService
-from app.utils.api_responses import build_success_response, build_error_response
+import time
+import datetime
+from app.config import Config
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from app.utils.errors import UnprocessableEntityError, ServiceUnavailableError
+from app.services.rate_stream import format_event, RECONNECT_DELAY_MS
+from app.utils.http_caching import ResponseCache, strong_etag, remaining_ttl
+from app.utils.api_responses import success_body, raw_success_body, build_success_response, build_raw_success_response, build_error_response
 
 VERSION_ONE_PREFIX = "/v1"
 VERSION_TWO_PREFIX = "/v2"
 currency_bp = Blueprint('currency', __name__)
+response_cache = ResponseCache()
 
 # @currency_bp.route(VERSION_ONE_PREFIX + "/conversion", methods=['GET'])
 @currency_bp.route("/conversion", methods=['GET'])
@@ -14,8 +19,9 @@ def version_one_conversion():
     to_currency = request.args.get('to')
     
     try:
-        currency_service = CurrencyService(app.redis_client)
-        conversion_rate = currency_service.get_conversion_rate_v1(from_currency.upper(), to_currency.upper())
+        currency_service = current_app.currency_service
+        conversion_rate = currency_service.get_conversion_rate_v1(from_currency.upper(), to_currency.upper(), include_fetched_at=True)
+        soft_ttl = currency_service.ttl_policy.soft_ttl("v1", conversion_rate)
 
         response = {
             "from": from_currency.upper(),
@@ -24,9 +30,18 @@ def version_one_conversion():
             "timestamp": conversion_rate['timestamp']
         }
 
-        return jsonify(response), 200
+        resource_key = f"v1_conversion_{response['from']}_{response['to']}"
+
+        return response_cache.respond(
+            resource_key,
+            strong_etag(resource_key, response['rate'], response['timestamp']),
+            remaining_ttl(conversion_rate.get('fetched_at'), soft_ttl),
+            lambda: jsonify(response).get_data()
+        )
         # return build_success_response(message="[V1] currency converted successfully", data=response)
     
+    except UnprocessableEntityError as e:
+        return build_error_response(message="[V1] currency conversion failed.", status=422, data=e.message)
     except Exception as e:
         return build_error_response(message="[V1] currency conversion failed.", status=400, data=str(e))
     
@@ -37,8 +52,9 @@ def version_two_conversion():
     to_currency = request.args.get('to')
 
     try:
-        currency_service = CurrencyService(app.redis_client)
-        conversion_rate = currency_service.get_conversion_rate_v2(from_currency.upper(), to_currency.upper())
+        currency_service = current_app.currency_service
+        conversion_rate = currency_service.get_conversion_rate_v2(from_currency.upper(), to_currency.upper(), include_fetched_at=True)
+        soft_ttl = currency_service.ttl_policy.soft_ttl("v2", conversion_rate)
 
         response = {
             "from": from_currency.upper(),
@@ -47,19 +63,354 @@ def version_two_conversion():
             "timestamp": conversion_rate['timestamp']
         }
 
-        return build_success_response(message="[V2] currency converted successfully.", data=response)
+        resource_key = f"v2_conversion_{response['from']}_{response['to']}"
 
+        return response_cache.respond(
+            resource_key,
+            strong_etag(resource_key, response['rate'], response['timestamp']),
+            remaining_ttl(conversion_rate.get('fetched_at'), soft_ttl),
+            lambda: jsonify(success_body("[V2] currency converted successfully.", data=response)).get_data()
+        )
+
+    except UnprocessableEntityError as e:
+        return build_error_response(message="[V2] currency conversion failed.", status=422, data=e.message)
     except Exception as e:
         return build_error_response(message="[V2] currency conversion failed.", status=400, data=str(e))
     
 
+def parse_batch_payload(payload):
+    """Turn a batch body into a list of (from, to, amount) items."""
+
+    items = (payload or {}).get("pairs")
+
+    if not isinstance(items, list) or not items:
+        raise UnprocessableEntityError("Body must contain a non-empty 'pairs' list.")
+
+    if len(items) > Config.BATCH_MAX_PAIRS:
+        raise UnprocessableEntityError(f"A batch may contain at most {Config.BATCH_MAX_PAIRS} pairs.")
+
+    parsed = []
+
+    for item in items:
+        if not isinstance(item, dict) or not item.get("from") or not item.get("to"):
+            raise UnprocessableEntityError("Every pair needs a 'from' and a 'to' currency.")
+
+        amount = item.get("amount")
+
+        if amount is not None and (isinstance(amount, bool) or not isinstance(amount, (int, float))):
+            raise UnprocessableEntityError(f"Invalid amount: {amount}")
+
+        parsed.append((str(item["from"]).upper(), str(item["to"]).upper(), amount))
+
+    return parsed
+
+
+def build_batch_results(items, rates):
+    results = []
+
+    for from_currency, to_currency, amount in items:
+        rate = rates[(from_currency, to_currency)]
+        result = {"from": from_currency, "to": to_currency, **rate}
+
+        if amount is not None and 'rate' in rate:
+            result["amount"] = amount
+            result["converted"] = amount * rate['rate']
+
+        results.append(result)
+
+    return results
+
+
+@currency_bp.route("/conversion/batch", methods=['POST'])
+def version_one_batch_conversion():
+    try:
+        items = parse_batch_payload(request.get_json(silent=True))
+
+        currency_service = current_app.currency_service
+        rates = currency_service.get_conversion_rates_batch([(f, t) for f, t, _ in items], version="v1")
+
+        return build_success_response(message="[V1] batch conversion completed.", data={"results": build_batch_results(items, rates)})
+
+    except UnprocessableEntityError as e:
+        return build_error_response(message="[V1] batch conversion failed.", status=422, data=e.message)
+    except Exception as e:
+        return build_error_response(message="[V1] batch conversion failed.", status=400, data=str(e))
+
+
+@currency_bp.route(VERSION_TWO_PREFIX + "/conversion/batch", methods=['POST'])
+def version_two_batch_conversion():
+    try:
+        items = parse_batch_payload(request.get_json(silent=True))
+
+        currency_service = current_app.currency_service
+        rates = currency_service.get_conversion_rates_batch([(f, t) for f, t, _ in items], version="v2")
+
+        return build_success_response(message="[V2] batch conversion completed.", data={"results": build_batch_results(items, rates)})
+
+    except UnprocessableEntityError as e:
+        return build_error_response(message="[V2] batch conversion failed.", status=422, data=e.message)
+    except Exception as e:
+        return build_error_response(message="[V2] batch conversion failed.", status=400, data=str(e))
+
+
+def stream_bulk_conversion(version):
+    """
+    Convert a CSV (text/csv) or NDJSON (application/x-ndjson) upload of amount/from/to rows,
+    streaming the results back in the same format as they are produced.
+    """
+    # numpy is only loaded once a bulk upload arrives, not at boot
+    from app.services.bulk_conversion import BulkConverter, ROUNDING_MODES, read_csv_rows, read_ndjson_rows, csv_lines, ndjson_lines
+
+    content_type = (request.mimetype or "").lower()
+
+    try:
+        decimals = int(request.args.get("decimals", 2))
+    except ValueError:
+        raise UnprocessableEntityError("decimals must be an integer.")
+
+    rounding = request.args.get("rounding", "half_even")
+
+    if not 0 <= decimals <= 8:
+        raise UnprocessableEntityError("decimals must be between 0 and 8.")
+
+    if rounding not in ROUNDING_MODES:
+        raise UnprocessableEntityError(f"rounding must be one of {', '.join(ROUNDING_MODES)}.")
+
+    if content_type == "text/csv":
+        rows, write, mimetype = read_csv_rows(request.stream), csv_lines, "text/csv"
+    elif content_type in ("application/x-ndjson", "application/ndjson"):
+        rows, write, mimetype = read_ndjson_rows(request.stream), ndjson_lines, "application/x-ndjson"
+    else:
+        raise UnprocessableEntityError("Upload rows as text/csv or application/x-ndjson.")
+
+    converter = BulkConverter(current_app.currency_service, version, decimals, rounding)
+    lines = write(converter.convert(rows))
+
+    # Pull the first chunk now so a bad header is reported as an error response, not mid-stream
+    first = next(lines, "")
+
+    def generate():
+        yield first
+        yield from lines
+
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+@currency_bp.route("/conversion/bulk", methods=['POST'])
+def version_one_bulk_conversion():
+    try:
+        return stream_bulk_conversion("v1")
+
+    except Exception as e:
+        return build_error_response(message="[V1] bulk conversion failed.", status=400, data=str(e))
+
+
+@currency_bp.route(VERSION_TWO_PREFIX + "/conversion/bulk", methods=['POST'])
+def version_two_bulk_conversion():
+    try:
+        return stream_bulk_conversion("v2")
+
+    except Exception as e:
+        return build_error_response(message="[V2] bulk conversion failed.", status=400, data=str(e))
+
+
+def parse_stream_pairs(value):
+    """Turn `pairs=USD_EUR,GBP_JPY` into a list of (from, to) tuples."""
+
+    names = [name.strip().upper() for name in (value or "").split(",") if name.strip()]
+
+    if not names:
+        raise UnprocessableEntityError("Pass the pairs to watch as pairs=USD_EUR,GBP_JPY.")
+
+    if len(names) > Config.RATE_STREAM_MAX_PAIRS:
+        raise UnprocessableEntityError(f"A stream may watch at most {Config.RATE_STREAM_MAX_PAIRS} pairs.")
+
+    pairs = []
+
+    for name in names:
+        codes = name.split("_")
+
+        if len(codes) != 2 or not all(codes):
+            raise UnprocessableEntityError(f"Invalid pair: {name}")
+
+        pairs.append((codes[0], codes[1]))
+
+    return list(dict.fromkeys(pairs))
+
+
+def stream_rates(version):
+    """
+    Server-sent events for a set of pairs: the current rates first, then one `rate` event
+    whenever CurrencyService stores a changed rate for a watched pair, on any worker.
+    """
+    pairs = parse_stream_pairs(request.args.get("pairs"))
+    broker = current_app.rate_stream
+
+    # Subscribe before reading the current rates so an update in between is not lost
+    subscription = broker.subscribe(version, pairs)
+
+    try:
+        rates = current_app.currency_service.get_conversion_rates_batch(pairs, version=version)
+    except Exception:
+        broker.unsubscribe(subscription)
+        raise
+
+    def generate():
+        try:
+            yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+
+            for (from_currency, to_currency), rate in rates.items():
+                yield format_event("error" if 'error' in rate else "rate", {"from": from_currency, "to": to_currency, **rate})
+
+            closes_at = time.monotonic() + Config.RATE_STREAM_MAX_DURATION
+
+            while time.monotonic() < closes_at:
+                updates = subscription.wait(Config.RATE_STREAM_HEARTBEAT)
+
+                if not updates:
+                    # Keeps proxies from timing out an idle connection
+                    yield ": heartbeat\n\n"
+
+                for update in updates:
+                    yield format_event("rate", update)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@currency_bp.route("/conversion/stream", methods=['GET'])
+def version_one_rate_stream():
+    try:
+        return stream_rates("v1")
+
+    except ServiceUnavailableError as e:
+        return build_error_response(message="[V1] rate stream unavailable.", status=503, data=e.message)
+    except UnprocessableEntityError as e:
+        return build_error_response(message="[V1] rate stream failed.", status=422, data=e.message)
+    except Exception as e:
+        return build_error_response(message="[V1] rate stream failed.", status=400, data=str(e))
+
+
+@currency_bp.route(VERSION_TWO_PREFIX + "/conversion/stream", methods=['GET'])
+def version_two_rate_stream():
+    try:
+        return stream_rates("v2")
+
+    except ServiceUnavailableError as e:
+        return build_error_response(message="[V2] rate stream unavailable.", status=503, data=e.message)
+    except UnprocessableEntityError as e:
+        return build_error_response(message="[V2] rate stream failed.", status=422, data=e.message)
+    except Exception as e:
+        return build_error_response(message="[V2] rate stream failed.", status=400, data=str(e))
+
+
+def parse_history_time(value, default):
+    """Accept unix seconds or an ISO 8601 date/datetime (UTC if no offset is given)."""
+
+    if not value:
+        return default
+
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise UnprocessableEntityError(f"Invalid time: {value}")
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+
+    return parsed.timestamp()
+
+
+def parse_history_interval(value, start, end):
+    """Accept seconds or a 30s/5m/1h/1d style interval; default to HISTORY_MAX_POINTS buckets."""
+
+    if not value:
+        return max(60, int((end - start) // Config.HISTORY_MAX_POINTS) + 1)
+
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+    try:
+        interval = int(value[:-1]) * units[value[-1]] if value[-1] in units else int(value)
+    except ValueError:
+        raise UnprocessableEntityError(f"Invalid interval: {value}")
+
+    if interval <= 0 or (end - start) / interval > Config.HISTORY_MAX_POINTS:
+        raise UnprocessableEntityError(f"Interval must be positive and yield at most {Config.HISTORY_MAX_POINTS} points.")
+
+    return interval
+
+
+@currency_bp.route(VERSION_TWO_PREFIX + "/history", methods=['GET'])
+def get_rate_history():
+    from_currency = request.args.get('from', '')
+    to_currency = request.args.get('to', '')
+    version = request.args.get('provider', 'v2').lower()
+
+    try:
+        if version not in ("v1", "v2"):
+            raise UnprocessableEntityError(f"Unknown provider: {version}")
+
+        end = parse_history_time(request.args.get('end'), time.time())
+        start = parse_history_time(request.args.get('start'), end - 86400)
+
+        if start >= end or end - start > Config.HISTORY_MAX_RANGE_DAYS * 86400:
+            raise UnprocessableEntityError(f"start must be before end and the range at most {Config.HISTORY_MAX_RANGE_DAYS} days.")
+
+        interval = parse_history_interval(request.args.get('interval'), start, end)
+
+        currency_service = current_app.currency_service
+        points = currency_service.get_rate_history(version, from_currency.upper(), to_currency.upper(), start, end, interval)
+
+        response = {
+            "from": from_currency.upper(),
+            "to": to_currency.upper(),
+            "provider": version,
+            "interval": interval,
+            "points": points
+        }
+
+        return build_success_response(message="Rate history retrieved", data=response)
+
+    except Exception as e:
+        return build_error_response(message="Failed to retrieve rate history", status=400, data=str(e))
+
+
+@currency_bp.route(VERSION_TWO_PREFIX + "/ttl-policy", methods=['GET'])
+def get_ttl_policy():
+    from_currency = request.args.get('from', '').upper()
+    to_currency = request.args.get('to', '').upper()
+    version = request.args.get('provider', 'v2').lower()
+
+    try:
+        if version not in ("v1", "v2"):
+            raise UnprocessableEntityError(f"Unknown provider: {version}")
+
+        currency_service = current_app.currency_service
+        policy = currency_service.get_rate_policy(version, from_currency, to_currency)
+
+        return build_success_response(message="TTL policy retrieved", data=policy)
+
+    except Exception as e:
+        return build_error_response(message="Failed to retrieve TTL policy", status=400, data=str(e))
+
+
 @currency_bp.route(VERSION_TWO_PREFIX + "/account-info", methods=['GET'])
 def get_account_info():
     try:
-        currency_service = CurrencyService(app.redis_client)
-        account_info = currency_service.get_account_info()
+        currency_service = current_app.currency_service
+        account_info = currency_service.get_account_info_json()
 
-        return build_success_response(message="XE account info retrieved", data=account_info)
+        return build_raw_success_response(message="XE account info retrieved", raw_data=account_info)
 
     except Exception as e:
         return build_error_response(message="Failed to retrieve account info", status=400, data=str(e))
@@ -74,8 +425,8 @@ def get_currencies():
         additional_info = request.args.get("additionalInfo")
         crypto = request.args.get("crypto", "false").lower() == "true"
 
-        currency_service = CurrencyService(app.redis_client)
-        result = currency_service.get_currencies(
+        currency_service = current_app.currency_service
+        document = currency_service.get_currencies_document(
             iso=iso,
             obsolete=obsolete,
             language=language,
@@ -83,7 +434,14 @@ def get_currencies():
             crypto=crypto
         )
 
-        return build_success_response(message="XE currencies list retrieved", data=result)
+        resource_key = f"v2_currencies_{request.query_string.decode('utf-8')}"
+
+        return response_cache.respond(
+            resource_key,
+            strong_etag(resource_key, document['etag'] or document['fetched_at']),
+            remaining_ttl(document['fetched_at'], Config.CURRENCIES_SOFT_TTL),
+            lambda: raw_success_body("XE currencies list retrieved", document['body']).encode('utf-8')
+        )
 
     except Exception as e:
         return build_error_response(message="Failed to retrieve currencies", status=400, data=str(e))
\ No newline at end of file
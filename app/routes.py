@@ -1,56 +1,162 @@
-from . import app
-from flask import request
-from .config import logging
+import time
+from flask import Blueprint, current_app, request, g, Response
+from .config import logging, Config
 from .utils.errors import BaseError
-from .utils.rate_limiting import RateLimiter
+from .utils.metrics import REQUEST_LATENCY, RATE_LIMIT_REJECTIONS, render_metrics
+from .utils.profiling import start_profile
+from .utils.server_timing import start_timings, stop_timings, timed_phase
 from app.controllers.currency_controller import currency_bp
 from .utils.api_responses import build_error_response, build_success_response
 
 # Global API prefix
 API_PREFIX = "/api"
 
-rate_limiter = RateLimiter()
+# App-wide hooks, error handlers and the routes outside the currency API
+core_bp = Blueprint('core', __name__)
 
-@app.before_request
+# Scraped or fetched by machines on a fixed schedule, so never rate limited
+UNLIMITED_ENDPOINTS = {"core.metrics", "core.favicon"}
+
+def route_label():
+    # The URL rule rather than the raw path, so label cardinality stays bounded
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+@core_bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.profile = start_profile(request.headers.get(Config.PROFILE_HEADER))
+
+    if Config.SERVER_TIMING_ENABLED or g.profile:
+        g.timings = start_timings()
+
+
+@core_bp.before_app_request
 def check_rate_limiting():
-    ip = request.remote_addr
+    if request.endpoint in UNLIMITED_ENDPOINTS:
+        return None
+
+    api_key = request.headers.get(Config.RATE_LIMIT_API_KEY_HEADER)
+    rate_limiter = current_app.rate_limiter
+    key, limit, window = rate_limiter.resolve(request.remote_addr, request.path, api_key)
+
+    with timed_phase("rate_limit"):
+        g.rate_limit = rate_limiter.hit(key, limit, window)
 
-    if rate_limiter.is_rate_limited(ip):
+    if not g.rate_limit.allowed:
+        RATE_LIMIT_REJECTIONS.labels(route_label()).inc()
         logging.error("Rate limit exceeded")
         return build_error_response(message="Rate limit exceeded", status=429)
+
+
+# Registered first so it runs after every other after-request hook
+@core_bp.after_app_request
+def finish_request_timings(response):
+    ended = time.perf_counter()
+    timings = g.get("timings")
+    profile = g.get("profile")
+
+    if timings and Config.SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = timings.header(ended)
+
+    if profile:
+        profile.stop()
+
+        details = {
+            "method": request.method,
+            "path": request.path,
+            "route": route_label(),
+            "status": response.status_code,
+            "phases": timings.summary(ended)
+        }
+
+        # Written once the response has gone out, so the client does not wait on the disk
+        response.call_on_close(lambda: write_profile(profile, details))
+
+    return response
+
+
+@core_bp.teardown_app_request
+def stop_request_timings(error=None):
+    profile = g.get("profile")
+
+    # Only still running when the after-request hooks never ran
+    if profile:
+        profile.stop()
+
+    stop_timings()
+
+
+def write_profile(profile, details):
+    try:
+        path = profile.write(details)
+        logging.info("Profiled %s %s in %.1f ms: %s", details["method"], details["path"], details["phases"]["total"]["ms"], path)
+    except OSError as err:
+        logging.warning("Could not write request profile: %s", err)
+
+
+@core_bp.after_app_request
+def add_rate_limit_headers(response):
+    result = g.get("rate_limit")
+
+    if result:
+        response.headers["RateLimit-Limit"] = str(result.limit)
+        response.headers["RateLimit-Remaining"] = str(result.remaining)
+        response.headers["RateLimit-Reset"] = str(result.reset)
+
+        if not result.allowed:
+            response.headers["Retry-After"] = str(result.reset)
+
+    return response
+
+
+@core_bp.after_app_request
+def observe_request_latency(response):
+    started = g.get("request_started")
+
+    if started is not None:
+        REQUEST_LATENCY.labels(request.method, route_label(), response.status_code).observe(time.perf_counter() - started)
+
+    return response
     
 
-@app.route("/favicon.ico")
+@core_bp.route("/favicon.ico")
 def favicon():
     """Handle favicon requests to prevent 404 errors."""
     return "", 204
 
 
+@core_bp.route("/metrics")
+def metrics():
+    """Prometheus scrape endpoint, aggregated across workers."""
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
+
+
 # Define the home route
-@app.route(API_PREFIX, methods=['GET'])
+@core_bp.route(API_PREFIX, methods=['GET'])
 def home():
     return build_success_response(message="Welcome to currency-converter-service")
 
 
 # Error handler for undefined routes
-@app.errorhandler(404)
+@core_bp.app_errorhandler(404)
 def not_found(error):    
     logging.error("Route not found")
     return build_error_response(message="Route not found", status=404)
 
 
-# Register the HubSpot routes
-app.register_blueprint(currency_bp, url_prefix=API_PREFIX)
-
-
-@app.errorhandler(Exception)
+@core_bp.app_errorhandler(Exception)
 def handle_exception(error):
     """
     Global error handler that checks if the error is a custom BaseError
     and uses its properties. Otherwise, returns a generic 500.
     """
-    # Log the error for debugging
-    logging.error(f"Unhandled exception: {error}", exc_info=True)
+    # Client errors are expected, so they get one line; server errors keep the traceback
+    if isinstance(error, BaseError) and error.httpCode < 500:
+        logging.warning("%s: %s", type(error).__name__, error.message)
+    else:
+        logging.error("Unhandled exception: %s", error, exc_info=True)
 
     if isinstance(error, BaseError):
         # A custom error we explicitly raised
@@ -65,4 +171,11 @@ def handle_exception(error):
             message="Internal Server Error",
             status=500,
             data=str(error)
-        )
\ No newline at end of file
+        )
+
+
+def register_routes(app):
+    app.register_blueprint(core_bp)
+
+    # Register the HubSpot routes
+    app.register_blueprint(currency_bp, url_prefix=API_PREFIX)
\ No newline at end of file
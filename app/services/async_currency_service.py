@@ -0,0 +1,388 @@
+import json
+import time
+import httpx
+from redis.exceptions import RedisError
+from app.config import logging, Config
+from app.cache.async_single_flight import AsyncSingleFlight
+from app.services.rate_table import META_FIELD, RateTable
+from app.services.rate_cache import encode_rate, decode_rate, is_fresh, public_rate, encode_document, decode_document, document_cache_key, CACHED_PAIRS_KEY
+from app.services import upstream
+from app.services.rate_history import RateHistoryStore, retention_seconds
+from app.services.currency_index import AsyncCurrencyIndex
+from app.services.rate_stream import rate_update_message, table_update_message
+from app.utils.errors import BaseError, ServiceUnavailableError, NotFoundError, BadRequestError
+
+
+class AsyncCurrencyService:
+    """
+    asyncio version of CurrencyService for the ASGI entry point. It uses the same cache
+    keys, entry format and TTLs, so both serving paths can share one Redis.
+    """
+
+    def __init__(self, redis_client, open_xr_client=None, xecd_client=None):
+        self.redis_client = redis_client
+        self.single_flight = AsyncSingleFlight(redis_client)
+        self.currency_index = AsyncCurrencyIndex(self)
+        self.open_xr_app_id = Config.OPEN_XR_APP_ID
+        self.open_xr_base_url = Config.OPEN_XR_BASE_URL
+
+        self.xecd_api_id = Config.XECD_API_ID
+        self.xecd_api_key = Config.XECD_API_KEY
+        self.xecd_base_url = Config.XECD_BASE_URL
+
+        limits = httpx.Limits(max_connections=Config.HTTP_POOL_SIZE, max_keepalive_connections=Config.HTTP_POOL_SIZE)
+        timeout = httpx.Timeout(Config.HTTP_READ_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT)
+
+        self.open_xr_client = open_xr_client or httpx.AsyncClient(headers={"accept": "application/json"}, limits=limits, timeout=timeout)
+        self.xecd_client = xecd_client or httpx.AsyncClient(auth=(self.xecd_api_id, self.xecd_api_key), limits=limits, timeout=timeout)
+
+
+    async def aclose(self):
+        await self.open_xr_client.aclose()
+        await self.xecd_client.aclose()
+
+
+    def validate_pair(self, version, from_currency, to_currency):
+        """The same checks as CurrencyService.validate_pair, made before any I/O."""
+
+        if Config.CURRENCY_INDEX_ENABLED:
+            self.currency_index.check(version)
+
+        self.currency_index.validate_pair(version, from_currency, to_currency)
+
+
+    async def fetch_supported_codes(self, version):
+        if version == "v1":
+            response = await self.open_xr_client.get(upstream.open_xr_currencies_url(self.open_xr_base_url))
+            response.raise_for_status()
+            return set(response.json())
+
+        return {currency["iso"] for currency in (await self.get_currencies(obsolete=True)).get("currencies", [])}
+
+
+    async def get_conversion_rate_v1(self, from_currency, to_currency):
+        self.validate_pair("v1", from_currency, to_currency)
+
+        if Config.OPEN_XR_TABLE_MODE:
+            table = await self.get_rate_table_v1((from_currency, to_currency))
+            return {'rate': table.cross_rate(from_currency, to_currency), 'timestamp': table.timestamp}
+
+        return await self.get_cached_rate("v1", from_currency, to_currency, lambda: self.fetch_conversion_rate_v1(from_currency, to_currency))
+
+
+    async def get_conversion_rate_v2(self, from_currency, to_currency):
+        self.validate_pair("v2", from_currency, to_currency)
+
+        return await self.get_cached_rate("v2", from_currency, to_currency, lambda: self.fetch_conversion_rate_v2(from_currency, to_currency))
+
+
+    async def get_cached_rate(self, version, from_currency, to_currency, fetch):
+        cache_key = f"{version}_{from_currency}_{to_currency}"
+
+        try:
+            cached = await self.redis_client.get_value(cache_key)
+        except RedisError as err:
+            return public_rate(await self.bypass_cache(version, "rate", fetch, err))
+
+        if cached:
+            entry = decode_rate(cached)
+
+            if not is_fresh(entry['fetched_at']):
+                self.single_flight.refresh(cache_key, fetch)
+
+            return public_rate(entry)
+
+        try:
+            negative = await self.redis_client.get_value(f"missing_{cache_key}")
+        except RedisError:
+            negative = None
+
+        if negative:
+            # The same error the first miss raised, so a negative-cache hit answers the same way
+            raise BadRequestError(negative.decode('utf-8') if isinstance(negative, bytes) else negative)
+
+        return await self.single_flight.load(
+            cache_key,
+            read_fresh=lambda: self.read_cached_rate(cache_key, fresh_only=True),
+            fetch=fetch,
+            read_last_known=lambda: self.read_cached_rate(cache_key)
+        )
+
+
+    async def read_cached_rate(self, cache_key, fresh_only=False):
+        cached = await self.redis_client.get_value(cache_key)
+
+        if not cached:
+            return None
+
+        entry = decode_rate(cached)
+
+        if fresh_only and not is_fresh(entry['fetched_at']):
+            return None
+
+        return public_rate(entry)
+
+
+    async def remember_missing(self, version, errors):
+        """Negative-cache pairs the provider answered without, for NEGATIVE_CACHE_TTL seconds."""
+
+        await self.write_cache(
+            self.redis_client.set_values,
+            {f"missing_{version}_{from_currency}_{to_currency}": message for (from_currency, to_currency), message in errors.items()},
+            Config.NEGATIVE_CACHE_TTL
+        )
+
+
+    async def bypass_cache(self, version, kind, fetch, err):
+        """Redis is down or in degraded mode: answer from the provider instead of failing."""
+        logging.debug("[%s] Cache unavailable, fetching %s upstream: %s", version.upper(), kind, err)
+        return await fetch()
+
+
+    async def write_cache(self, write, *args):
+        """Run a cache write, logging instead of failing when Redis is unavailable."""
+        try:
+            await write(*args)
+        except RedisError as err:
+            logging.debug("Cache write skipped: %s", err)
+
+
+    async def fetch_conversion_rate_v1(self, from_currency, to_currency):
+        try:
+            rates = await self.fetch_rates_v1(from_currency, [to_currency])
+
+            if to_currency not in rates:
+                raise NotFoundError(f"{from_currency} || {to_currency}")
+
+            return rates[to_currency]
+
+        except httpx.RequestError as err:
+            logging.error("[V1] Request error: %s", err)
+            raise ServiceUnavailableError("Could not connect to Open Exchange Rates.")
+        except ServiceUnavailableError:
+            raise
+        except NotFoundError as err:
+            message = f"Invalid currency code: {err.message}"
+            await self.remember_missing("v1", {(from_currency, to_currency): message})
+            raise BadRequestError(message)
+        except Exception as err:
+            logging.error("ExceptionError: %s", err)
+            raise BadRequestError(f"Invalid currency code: {err}")
+
+
+    async def fetch_rates_v1(self, from_currency, to_currencies):
+        url = upstream.open_xr_latest_url(self.open_xr_base_url, self.open_xr_app_id, from_currency, to_currencies)
+        response = await self.open_xr_client.get(url)
+        payload = upstream.read_json(response)
+
+        upstream.check_open_xr_status(response.status_code, payload)
+
+        rates = upstream.parse_open_xr_rates(payload, to_currencies)
+        await self.store_rates("v1", from_currency, rates)
+
+        return rates
+
+
+    async def fetch_conversion_rate_v2(self, from_currency, to_currency):
+        try:
+            rates = await self.fetch_rates_v2(from_currency, [to_currency])
+
+            if to_currency not in rates:
+                raise NotFoundError(f"No conversion rate found for {from_currency} to {to_currency}.")
+
+            return rates[to_currency]
+
+        except httpx.RequestError as e:
+            logging.error("[V2] Request error: %s", e)
+            raise ServiceUnavailableError("Could not connect to XE API.")
+
+        except ServiceUnavailableError:
+            raise
+        except NotFoundError as err:
+            await self.remember_missing("v2", {(from_currency, to_currency): err.message})
+            raise BadRequestError(err.message)
+        except Exception as e:
+            logging.error("[V2] General exception: %s", e)
+            raise BadRequestError(str(e))
+
+
+    async def fetch_rates_v2(self, from_currency, to_currencies):
+        url = upstream.xe_convert_from_url(self.xecd_base_url, from_currency, to_currencies)
+        response = await self.xecd_client.get(url)
+
+        upstream.check_xe_status(response.status_code, from_currency, to_currencies)
+
+        rates = upstream.parse_xe_rates(response.json(), to_currencies)
+        await self.store_rates("v2", from_currency, rates)
+
+        return rates
+
+
+    async def store_rates(self, version, from_currency, rates):
+        fetched_at = time.time()
+
+        await self.write_cache(
+            self.redis_client.set_values,
+            {f"{version}_{from_currency}_{to_currency}": encode_rate(rate['rate'], rate['timestamp'], fetched_at) for to_currency, rate in rates.items()},
+            Config.RATE_HARD_TTL
+        )
+        await self.write_cache(self.redis_client.add_members, CACHED_PAIRS_KEY.format(version=version), [f"{from_currency}_{to_currency}" for to_currency in rates], Config.RATE_HARD_TTL)
+        await self.record_history(version, [(from_currency, to_currency, rate['rate'], fetched_at) for to_currency, rate in rates.items()])
+        await self.write_cache(self.redis_client.publish, Config.RATE_STREAM_CHANNEL, rate_update_message(version, from_currency, rates, fetched_at))
+
+
+    async def record_history(self, version, points):
+        try:
+            await self.redis_client.append_values(RateHistoryStore.pack(version, points), retention_seconds())
+        except Exception as err:
+            logging.warning("[%s] Could not record rate history: %s", version.upper(), err)
+
+
+    async def get_rate_table_v1(self, currencies=None):
+        cache_key = f"v1_table_{Config.OPEN_XR_TABLE_BASE}"
+
+        try:
+            table = await self.read_cached_rate_table(cache_key, currencies)
+        except RedisError as err:
+            return await self.bypass_cache("v1", "table", self.fetch_rate_table_v1, err)
+
+        if table:
+            if not is_fresh(table.fetched_at):
+                self.single_flight.refresh(cache_key, self.fetch_rate_table_v1)
+
+            return table
+
+        return await self.single_flight.load(
+            cache_key,
+            read_fresh=lambda: self.read_cached_rate_table(cache_key, currencies, fresh_only=True),
+            fetch=self.fetch_rate_table_v1,
+            read_last_known=lambda: self.read_cached_rate_table(cache_key, currencies)
+        )
+
+
+    async def read_cached_rate_table(self, cache_key, currencies=None, fresh_only=False):
+        if currencies is None:
+            fields = await self.redis_client.get_hash(cache_key)
+        else:
+            names = [META_FIELD, *currencies]
+            fields = dict(zip(names, await self.redis_client.get_hash_fields(cache_key, names)))
+
+        table = RateTable.from_hash(fields)
+
+        if not table or (fresh_only and not is_fresh(table.fetched_at)):
+            return None
+
+        return table
+
+
+    async def fetch_rate_table_v1(self):
+        base_currency = Config.OPEN_XR_TABLE_BASE
+
+        try:
+            url = upstream.open_xr_latest_url(self.open_xr_base_url, self.open_xr_app_id, base_currency)
+            response = await self.open_xr_client.get(url)
+            response.raise_for_status()
+
+            table = RateTable.from_response(response.json())
+            await self.write_cache(self.redis_client.set_hash, f"v1_table_{base_currency}", table.to_hash(), Config.RATE_HARD_TTL)
+            await self.record_history("v1", [(base_currency, symbol, rate, table.fetched_at) for symbol, rate in table.rates.items()])
+            await self.write_cache(self.redis_client.publish, Config.RATE_STREAM_CHANNEL, table_update_message(table))
+            return table
+
+        except BaseError:
+            raise
+        except Exception as err:
+            logging.error("ExceptionError: %s", err)
+            raise BadRequestError(f"Rate table request failed: {err}")
+
+
+    async def get_account_info(self):
+        return json.loads(await self.get_account_info_json())
+
+
+    async def get_account_info_json(self):
+        return await self.get_cached_document(
+            "v2_account_info",
+            f"{self.xecd_base_url}/account_info/",
+            None,
+            Config.ACCOUNT_INFO_SOFT_TTL,
+            Config.ACCOUNT_INFO_HARD_TTL
+        )
+
+
+    async def get_currencies(self, iso=None, obsolete=False, language="en", additional_info=None, crypto=False):
+        return json.loads(await self.get_currencies_json(iso, obsolete, language, additional_info, crypto))
+
+
+    async def get_currencies_json(self, iso=None, obsolete=False, language="en", additional_info=None, crypto=False):
+        params = upstream.xe_currencies_params(iso, obsolete, language, additional_info, crypto)
+
+        return await self.get_cached_document(
+            document_cache_key("v2_currencies", params),
+            f"{self.xecd_base_url}/currencies",
+            params,
+            Config.CURRENCIES_SOFT_TTL,
+            Config.CURRENCIES_HARD_TTL
+        )
+
+
+    async def get_cached_document(self, cache_key, url, params, soft_ttl, hard_ttl):
+        try:
+            cached = await self.redis_client.get_value(cache_key)
+        except RedisError as err:
+            return await self.bypass_cache("v2", "document", lambda: self.xe_lookup(cache_key, url, params, hard_ttl), err)
+
+        if cached:
+            document = decode_document(cached)
+
+            if not is_fresh(document['fetched_at'], soft_ttl):
+                self.single_flight.refresh(cache_key, lambda: self.xe_lookup(cache_key, url, params, hard_ttl, document))
+
+            return document['body']
+
+        return await self.single_flight.load(
+            cache_key,
+            read_fresh=lambda: self.read_cached_document(cache_key, soft_ttl),
+            fetch=lambda: self.xe_lookup(cache_key, url, params, hard_ttl),
+            read_last_known=lambda: self.read_cached_document(cache_key)
+        )
+
+
+    async def read_cached_document(self, cache_key, soft_ttl=None):
+        cached = await self.redis_client.get_value(cache_key)
+
+        if not cached:
+            return None
+
+        document = decode_document(cached)
+
+        if soft_ttl and not is_fresh(document['fetched_at'], soft_ttl):
+            return None
+
+        return document['body']
+
+
+    async def xe_lookup(self, cache_key, url, params, hard_ttl, previous=None):
+        try:
+            headers = {"If-None-Match": previous['etag']} if previous and previous['etag'] else None
+            response = await self.xecd_client.get(url, params=params, headers=headers)
+
+            if response.status_code == 304 and previous:
+                body, etag = previous['body'], previous['etag']
+            else:
+                upstream.check_xe_lookup_status(response.status_code, response.text)
+
+                json.loads(response.text)
+                body, etag = response.text, response.headers.get("ETag", "")
+
+            await self.write_cache(self.redis_client.set_value, cache_key, encode_document(body, etag), hard_ttl)
+            return body
+
+        except httpx.RequestError as e:
+            logging.error("[V2] Request error: %s", e)
+            raise ServiceUnavailableError("Could not connect to XE API.")
+        except BaseError:
+            raise
+        except Exception as e:
+            logging.error("[V2] XE lookup error: %s", e)
+            raise BadRequestError(str(e))
@@ -0,0 +1,193 @@
+import io
+import csv
+import json
+import math
+import numpy as np
+from itertools import islice
+from app.config import Config
+from app.utils.errors import UnprocessableEntityError
+
+ROUNDING_MODES = ("half_even", "half_up", "down")
+CSV_COLUMNS = ["amount", "from", "to", "rate", "converted", "error"]
+
+
+def round_amounts(values, decimals, mode):
+    """
+    Round converted amounts to `decimals` places:
+      half_even - ties to the nearest even digit (banker's rounding), the default
+      half_up   - ties away from zero
+      down      - truncate toward zero
+    Values are first snapped to 9 decimal places so binary noise such as
+    1.005 -> 1.00499999 does not decide a tie.
+    """
+    scale = 10.0 ** decimals
+    scaled = np.round(values * scale, 9)
+
+    if mode == "half_up":
+        scaled = np.sign(scaled) * np.floor(np.abs(scaled) + 0.5)
+    elif mode == "down":
+        scaled = np.trunc(scaled)
+    else:
+        scaled = np.round(scaled)
+
+    return scaled / scale
+
+
+def read_csv_rows(stream):
+    """Yield (amount, from, to) text fields from a CSV upload with an amount,from,to header."""
+
+    reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8", newline=""))
+    header = [column.strip().lower() for column in next(reader, [])]
+
+    try:
+        positions = [header.index(column) for column in ("amount", "from", "to")]
+    except ValueError:
+        raise UnprocessableEntityError("CSV header must contain amount, from and to columns.")
+
+    width = max(positions) + 1
+
+    for row in reader:
+        if not row:
+            continue
+
+        if len(row) < width:
+            yield None, None, None
+            continue
+
+        yield tuple(row[position] for position in positions)
+
+
+def finite_or_text(text):
+    # Keeps 1e999 and NaN as the text that was sent, so an error row echoes valid JSON
+    value = float(text)
+    return value if math.isfinite(value) else text
+
+
+def read_ndjson_rows(stream):
+    """Yield (amount, from, to) from one JSON object per line."""
+
+    for line in stream:
+        line = line.strip()
+
+        if not line:
+            continue
+
+        try:
+            row = json.loads(line, parse_float=finite_or_text, parse_constant=str)
+            yield row.get("amount"), row.get("from"), row.get("to")
+        except (ValueError, AttributeError):
+            yield None, None, None
+
+
+class BulkConverter:
+    """
+    Converts an unbounded stream of (amount, from, to) rows chunk by chunk. Every distinct
+    pair is resolved once through the service's cached batch lookup and remembered for the
+    rest of the stream; amounts are converted a chunk at a time with array arithmetic.
+    """
+
+    def __init__(self, currency_service, version, decimals=2, rounding="half_even", chunk_size=None):
+        self.currency_service = currency_service
+        self.version = version
+        self.decimals = decimals
+        self.rounding = rounding
+        self.chunk_size = chunk_size or Config.BULK_CHUNK_ROWS
+        self.rates = {}
+
+
+    def convert(self, rows):
+        """Yield lists of result dicts, one list per chunk of input rows."""
+
+        rows = iter(rows)
+
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+
+            if not chunk:
+                return
+
+            yield self.convert_chunk(chunk)
+
+
+    def convert_chunk(self, chunk):
+        amounts = []
+        pairs = []
+        errors = [None] * len(chunk)
+
+        for index, (amount, from_currency, to_currency) in enumerate(chunk):
+            from_currency = str(from_currency or "").strip().upper()
+            to_currency = str(to_currency or "").strip().upper()
+            pairs.append((from_currency, to_currency))
+
+            try:
+                value = float(amount)
+            except (TypeError, ValueError, OverflowError):
+                value = np.nan
+
+            # float() accepts "nan" and "inf", which would stream out as invalid JSON
+            if not math.isfinite(value):
+                value = np.nan
+                errors[index] = f"Invalid amount: {amount}"
+
+            amounts.append(value)
+
+            # The same check as single conversions, failing the row instead of the stream
+            try:
+                self.currency_service.validate_currency_code(from_currency)
+                self.currency_service.validate_currency_code(to_currency)
+            except UnprocessableEntityError as err:
+                errors[index] = err.message
+
+        self.resolve_rates({pair for pair, error in zip(pairs, errors) if error is None})
+
+        rates = []
+
+        for index, pair in enumerate(pairs):
+            rate = None if errors[index] else self.rates[pair]
+
+            if rate is None or 'error' in rate:
+                errors[index] = errors[index] or rate['error']
+                rates.append(np.nan)
+            else:
+                rates.append(rate['rate'])
+
+        amounts = np.array(amounts, dtype=np.float64)
+        rates = np.array(rates, dtype=np.float64)
+        converted = round_amounts(amounts * rates, self.decimals, self.rounding).tolist()
+        amounts, rates = amounts.tolist(), rates.tolist()
+
+        return [
+            {"amount": chunk[index][0], "from": pairs[index][0], "to": pairs[index][1], "error": errors[index]}
+            if errors[index] else
+            {"amount": amounts[index], "from": pairs[index][0], "to": pairs[index][1], "rate": rates[index], "converted": converted[index]}
+            for index in range(len(chunk))
+        ]
+
+
+    def resolve_rates(self, pairs):
+        missing = [pair for pair in pairs if pair not in self.rates]
+
+        if missing:
+            self.rates.update(self.currency_service.get_conversion_rates_batch(missing, version=self.version))
+
+
+def ndjson_lines(results):
+    for chunk in results:
+        yield "".join(json.dumps(row) + "\n" for row in chunk)
+
+
+def csv_lines(results):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+
+    for chunk in results:
+        writer.writerows([row.get(column) for column in CSV_COLUMNS] for row in chunk)
+        yield buffer.getvalue()
+
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Header only, for an upload without data rows
+    if buffer.getvalue():
+        yield buffer.getvalue()
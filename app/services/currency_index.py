@@ -0,0 +1,182 @@
+import time
+import asyncio
+import threading
+from redis.exceptions import RedisError
+from app.config import logging, Config
+from app.services.rate_cache import is_fresh, encode_document, decode_document
+from app.utils.process_local import ProcessLocal
+from app.utils.errors import UnprocessableEntityError
+
+VERSIONS = ("v1", "v2")
+
+
+def validate_currency_code(code):
+    if len(code) != 3 or not code.isalpha():
+        raise UnprocessableEntityError(f"Invalid currency code: {code}")
+
+
+class SupportedCodes:
+    """The in-memory code lists and the checks made against them, shared by the sync and async indexes."""
+
+    def __init__(self):
+        self.codes = {}
+
+
+    def supports(self, version, code):
+        codes = self.codes.get(version)
+        return codes is None or code in codes
+
+
+    def validate_pair(self, version, from_currency, to_currency):
+        """Reject malformed codes and codes the provider does not quote, before any I/O."""
+
+        validate_currency_code(from_currency)
+        validate_currency_code(to_currency)
+
+        code = next((code for code in (from_currency, to_currency) if not self.supports(version, code)), None)
+
+        if code:
+            raise UnprocessableEntityError(f"Unsupported currency code: {code}")
+
+
+class CurrencyIndex(SupportedCodes):
+    """
+    The ISO codes each provider supports, held in worker memory so an unknown code is
+    turned away without any I/O. A background thread reloads the shared copy from Redis
+    every CURRENCY_INDEX_CHECK_INTERVAL seconds; once that is older than
+    CURRENCY_INDEX_TTL, one worker across the fleet rebuilds it from the provider.
+    Until a provider's list has loaded, every well-formed code is accepted.
+    """
+
+    def __init__(self, currency_service):
+        super().__init__()
+        self.currency_service = currency_service
+        self.redis_client = currency_service.redis_client
+        self.interval = Config.CURRENCY_INDEX_CHECK_INTERVAL
+        self._thread = ProcessLocal(self._start_thread)
+        self._stopped = threading.Event()
+
+
+    def start(self):
+        self._thread.get()
+
+
+    def stop(self):
+        self._stopped.set()
+
+
+    def _start_thread(self):
+        thread = threading.Thread(target=self._loop, name="currency-index", daemon=True)
+        thread.start()
+        return thread
+
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            for version in VERSIONS:
+                try:
+                    self.reload(version)
+                except Exception as err:
+                    logging.warning("[%s] Currency index refresh failed: %s", version.upper(), err)
+
+            self._stopped.wait(self.interval)
+
+
+    def reload(self, version):
+        cache_key = f"currency_index_{version}"
+
+        try:
+            cached = self.redis_client.get_value(cache_key)
+        except RedisError as err:
+            logging.debug("[%s] Currency index unavailable: %s", version.upper(), err)
+            return
+
+        document = decode_document(cached) if cached else None
+
+        if document:
+            self.codes[version] = frozenset(document['body'].split(","))
+
+        if not document or not is_fresh(document['fetched_at'], Config.CURRENCY_INDEX_TTL):
+            self.currency_service.single_flight.try_run(cache_key, lambda: self.rebuild(version))
+
+
+    def rebuild(self, version):
+        codes = self.currency_service.fetch_supported_codes(version)
+
+        if not codes:
+            logging.warning("[%s] Provider returned no currencies, keeping the current index.", version.upper())
+            return None
+
+        self.currency_service.write_cache(
+            self.redis_client.set_value,
+            f"currency_index_{version}",
+            encode_document(",".join(sorted(codes))),
+            Config.CURRENCY_INDEX_HARD_TTL
+        )
+
+        self.codes[version] = frozenset(codes)
+        logging.info("[%s] Currency index rebuilt with %d codes.", version.upper(), len(codes))
+        return codes
+
+
+class AsyncCurrencyIndex(SupportedCodes):
+    """
+    asyncio version of CurrencyIndex for the ASGI service. There is no thread: the first
+    request after each CURRENCY_INDEX_CHECK_INTERVAL schedules a reload of the shared copy
+    as a task, and a stale copy is rebuilt through the service's single-flight refresh.
+    """
+
+    def __init__(self, currency_service):
+        super().__init__()
+        self.currency_service = currency_service
+        self.redis_client = currency_service.redis_client
+        self.interval = Config.CURRENCY_INDEX_CHECK_INTERVAL
+        self.checked_at = {}
+        self._tasks = set()
+
+
+    def check(self, version):
+        """Schedule a reload when this version's list is due; never blocks the caller."""
+
+        now = time.monotonic()
+
+        if version in self.checked_at and now - self.checked_at[version] < self.interval:
+            return
+
+        self.checked_at[version] = now
+
+        task = asyncio.ensure_future(self.reload(version))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+    async def reload(self, version):
+        cache_key = f"currency_index_{version}"
+
+        try:
+            cached = await self.redis_client.get_value(cache_key)
+        except RedisError as err:
+            logging.debug("[%s] Currency index unavailable: %s", version.upper(), err)
+            return
+
+        document = decode_document(cached) if cached else None
+
+        if document:
+            self.codes[version] = frozenset(document['body'].split(","))
+
+        if not document or not is_fresh(document['fetched_at'], Config.CURRENCY_INDEX_TTL):
+            self.currency_service.single_flight.refresh(cache_key, lambda: self.rebuild(version))
+
+
+    async def rebuild(self, version):
+        codes = await self.currency_service.fetch_supported_codes(version)
+
+        if not codes:
+            logging.warning("[%s] Provider returned no currencies, keeping the current index.", version.upper())
+            return None
+
+        await self.redis_client.set_value(f"currency_index_{version}", encode_document(",".join(sorted(codes))), Config.CURRENCY_INDEX_HARD_TTL)
+
+        self.codes[version] = frozenset(codes)
+        logging.info("[%s] Currency index rebuilt with %d codes.", version.upper(), len(codes))
+        return codes
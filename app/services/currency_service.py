@@ -1,188 +1,741 @@
+import json
+import time
 import requests
-import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from app.config import logging, Config
 from requests.exceptions import HTTPError
-from app.utils.errors import ServiceUnavailableError, UnauthorizedError, UnprocessableEntityError, NotFoundError, BadRequestError, OperationForbiddenError
+from redis.exceptions import RedisError
+from app.cache.single_flight import SingleFlight
+from app.services.rate_table import META_FIELD, RateTable
+from app.services.rate_cache import encode_rate, decode_rate, is_fresh, public_rate, encode_document, decode_document, document_cache_key, CACHED_PAIRS_KEY
+from app.services import upstream
+from app.services.hot_pairs import HotPairTracker
+from app.services.rate_history import RateHistoryStore, downsample
+from app.services.rate_stream import rate_update_message, table_update_message
+from app.services.ttl_policy import TtlPolicy, observe_drift
+from app.services.currency_index import CurrencyIndex, validate_currency_code
+from app.services.providers import OpenExchangeRatesProvider, XEProvider
+from app.utils.process_local import ProcessLocal
+from app.utils.metrics import record_cache, PROVIDER_HEDGES
+from app.utils.server_timing import timed_phase
+from app.utils.http_client import build_session, request_timeout
+from app.utils.errors import BaseError, ServiceUnavailableError, UnprocessableEntityError, NotFoundError, BadRequestError, OperationForbiddenError
 
 
 class CurrencyService:
     def __init__(self, redis_client):
         self.redis_client = redis_client
+        self.single_flight = SingleFlight(redis_client)
+        self.hot_pairs = HotPairTracker(redis_client)
+        self.history = RateHistoryStore(redis_client)
+        self.ttl_policy = TtlPolicy(redis_client)
+        self.currency_index = CurrencyIndex(self)
         self.open_xr_app_id = Config.OPEN_XR_APP_ID
         self.open_xr_base_url = Config.OPEN_XR_BASE_URL
 
         self.xecd_api_id = Config.XECD_API_ID
         self.xecd_api_key = Config.XECD_API_KEY
         self.xecd_base_url = Config.XECD_BASE_URL
+
+        # One pooled keep-alive session per provider, rebuilt in each forked worker
+        self._open_xr_session = ProcessLocal(lambda: build_session(headers={"accept": "application/json"}, provider="open_xr"))
+        self._xecd_session = ProcessLocal(lambda: build_session(auth=(self.xecd_api_id, self.xecd_api_key), provider="xe"))
+
+        # Each API version is served by its own provider; with hedging on, the other one backs it up
+        self.providers = {
+            "v1": OpenExchangeRatesProvider(self._open_xr_session, self.open_xr_base_url, self.open_xr_app_id),
+            "v2": XEProvider(self._xecd_session, self.xecd_base_url)
+        }
+        self._hedge_executor = ProcessLocal(lambda: ThreadPoolExecutor(max_workers=Config.HEDGE_WORKERS, thread_name_prefix="hedge"))
+
+        # Memory-mapped rate matrices shared by every worker on the host
+        self.snapshots = {}
+
+        if Config.SNAPSHOT_ENABLED:
+            # Imported here so numpy only loads when snapshots are on
+            from app.services.rate_snapshot import SnapshotReader
+            self.snapshots = {"v1": SnapshotReader("v1"), "v2": SnapshotReader("v2")}
+
+
+    def reset_connections(self):
+        """Drop the HTTP sessions and hedge pool so this process builds its own on next use."""
+        for local in (self._open_xr_session, self._xecd_session, self._hedge_executor):
+            local.reset()
+
+
+    @property
+    def open_xr_session(self):
+        return self._open_xr_session.get()
+
+
+    @property
+    def xecd_session(self):
+        return self._xecd_session.get()
     
 
     def validate_currency_code(self, code):
-    
-        if len(code) != 3:
-            raise UnprocessableEntityError(f"Invalid currency code: {code}")
+        validate_currency_code(code)
 
 
-    def get_conversion_rate_v1(self, from_currency, to_currency):
-        self.validate_currency_code(from_currency)
-        self.validate_currency_code(to_currency)
+    def validate_pair(self, version, from_currency, to_currency):
+        self.currency_index.validate_pair(version, from_currency, to_currency)
+
+
+    def fetch_supported_codes(self, version):
+        """Every ISO code the version's provider quotes, for the currency index."""
+
+        if version == "v1":
+            return self.providers["v1"].fetch_currencies()
+
+        return {currency["iso"] for currency in self.get_currencies(obsolete=True).get("currencies", [])}
+
+
+    def get_conversion_rate_v1(self, from_currency, to_currency, include_fetched_at=False):
+        self.validate_pair("v1", from_currency, to_currency)
+
+        logging.debug("[V1] %s -> %s", from_currency, to_currency)
+
+        self.hot_pairs.record("v1", from_currency, to_currency)
+
+        snapshot_entry = self.read_snapshot("v1", from_currency, to_currency)
+
+        if snapshot_entry:
+            return snapshot_entry if include_fetched_at else public_rate(snapshot_entry)
+
+        if Config.OPEN_XR_TABLE_MODE:
+            return self.get_conversion_rate_v1_from_table(from_currency, to_currency, include_fetched_at)
 
-        logging.info(f"[V1] {from_currency}")
-        logging.warning(f"[V1] {to_currency}")
+        return self.get_cached_rate("v1", from_currency, to_currency, lambda: self.fetch_conversion_rate_v1(from_currency, to_currency), include_fetched_at)
 
-        cache_key = f"v1_{from_currency}_{to_currency}"
-        cached = self.redis_client.get_value(cache_key).decode('utf-8') if self.redis_client.get_value(cache_key) else None
+
+    def get_cached_rate(self, version, from_currency, to_currency, fetch, include_fetched_at=False):
+        """
+        Serve a cached rate if there is one: fresh entries as-is, entries past the soft TTL
+        while a single background refresh runs. Past the hard TTL the key is gone and
+        exactly one caller across all workers runs `fetch`. With `include_fetched_at` the
+        result keeps the entry's `fetched_at` (None when it was fetched for this call).
+        """
+        cache_key = f"{version}_{from_currency}_{to_currency}"
+
+        try:
+            cached = self.redis_client.get_value(cache_key)
+        except RedisError as err:
+            rate = self.bypass_cache(version, "rate", fetch, err)
+            return rate if include_fetched_at else public_rate(rate)
 
         if cached:
-            logging.info(f"[V1] {from_currency}/{to_currency} is already cached.")
+            entry = decode_rate(cached)
+
+            if self.is_fresh_rate(version, entry):
+                record_cache(version, "rate", "hit")
+                logging.debug("[%s] %s/%s is already cached.", version.upper(), from_currency, to_currency)
+            else:
+                record_cache(version, "rate", "stale")
+                logging.info("[%s] %s/%s is stale, refreshing in background.", version.upper(), from_currency, to_currency)
+                self.single_flight.refresh(cache_key, fetch)
+
+            return entry if include_fetched_at else public_rate(entry)
+
+        negative = self.read_missing(version, [(from_currency, to_currency)])
+
+        if negative:
+            # The same error the first miss raised, so a negative-cache hit answers the same way
+            record_cache(version, "rate", "negative")
+            raise BadRequestError(negative[(from_currency, to_currency)])
+
+        record_cache(version, "rate", "miss")
+
+        rate = self.single_flight.load(
+            cache_key,
+            read_fresh=lambda: self.read_cached_rate(version, cache_key, fresh_only=True),
+            fetch=fetch,
+            read_last_known=lambda: self.read_cached_rate(version, cache_key)
+        )
+
+        return rate if include_fetched_at else public_rate(rate)
+
+
+    def read_missing(self, version, pairs):
+        """The pairs a provider recently confirmed it does not quote, with the error to answer."""
 
-            rate, timestamp = cached.split('|')
-            return {'rate': float(rate), 'timestamp': timestamp}
-     
         try:
-            url = f"{self.open_xr_base_url}?app_id={self.open_xr_app_id}&base={from_currency}&symbols={to_currency}&prettyprint=false&show_alternative=false"
-            headers = {"accept": "application/json"}
+            values = self.redis_client.get_values([f"missing_{version}_{from_currency}_{to_currency}" for from_currency, to_currency in pairs])
+        except RedisError:
+            return {}
+
+        return {pair: value.decode('utf-8') if isinstance(value, bytes) else value for pair, value in zip(pairs, values) if value}
+
+
+    def remember_missing(self, version, errors):
+        """Negative-cache pairs the provider answered without, for NEGATIVE_CACHE_TTL seconds."""
+
+        if errors:
+            self.write_cache(
+                self.redis_client.set_values,
+                {f"missing_{version}_{from_currency}_{to_currency}": message for (from_currency, to_currency), message in errors.items()},
+                Config.NEGATIVE_CACHE_TTL
+            )
+
+
+    def bypass_cache(self, version, kind, fetch, err):
+        """Redis is down or in degraded mode: answer from the provider instead of failing."""
+        record_cache(version, kind, "bypass")
+        logging.debug("[%s] Cache unavailable, fetching %s upstream: %s", version.upper(), kind, err)
+        return fetch()
+
+
+    def write_cache(self, write, *args):
+        """Run a cache write, logging instead of failing when Redis is unavailable."""
+        try:
+            write(*args)
+        except RedisError as err:
+            logging.debug("Cache write skipped: %s", err)
+
+
+    def read_snapshot(self, version, from_currency, to_currency):
+        """A fresh rate from the shared snapshot, or None to fall back to Redis."""
 
-            response = requests.get(url, headers=headers)
-            actual_res = response.json()
+        reader = self.snapshots.get(version)
+        entry = reader.lookup(from_currency, to_currency) if reader else None
 
-            logging.warning("[V1] actual OPEN exhange response:")
-            logging.info(actual_res)
+        if not entry or entry['timestamp'] is None or not self.is_fresh_rate(version, entry):
+            return None
 
-            if not actual_res.get("rates") or to_currency not in actual_res["rates"]:
+        record_cache(version, "snapshot", "hit")
+        return entry
+
+
+    def read_cached_rate(self, version, cache_key, fresh_only=False):
+        cached = self.redis_client.get_value(cache_key)
+
+        if not cached:
+            return None
+
+        entry = decode_rate(cached)
+
+        if fresh_only and not self.is_fresh_rate(version, entry):
+            return None
+
+        return entry
+
+
+    def is_fresh_rate(self, version, entry):
+        return is_fresh(entry['fetched_at'], self.ttl_policy.soft_ttl(version, entry))
+
+
+    def get_rate_policy(self, version, from_currency, to_currency):
+        """The TTL policy currently applied to one pair's cached rate."""
+
+        self.validate_currency_code(from_currency)
+        self.validate_currency_code(to_currency)
+
+        try:
+            cached = self.redis_client.get_value(f"{version}_{from_currency}_{to_currency}")
+        except RedisError:
+            cached = None
+
+        entry = decode_rate(cached) if cached else None
+        return {"from": from_currency, "to": to_currency, "provider": version, **self.ttl_policy.describe(version, entry)}
+
+
+    def fetch_conversion_rate_v1(self, from_currency, to_currency):
+        try:
+            rates = self.fetch_rates_v1(from_currency, [to_currency])
+
+            if to_currency not in rates:
                 raise NotFoundError(f"{from_currency} || {to_currency}")
 
-            rate = actual_res["rates"][to_currency]
-            timestamp = datetime.datetime.utcnow().isoformat() + "Z"
+            return rates[to_currency]
 
-            self.redis_client.set_value(cache_key, f"{rate}|{timestamp}", 3600)  # Cache for 1 hour
-            return {'rate': rate, 'timestamp': timestamp}
-        
+        except ServiceUnavailableError:
+            raise
+        except NotFoundError as err:
+            message = f"Invalid currency code: {err.message}"
+            self.remember_missing("v1", {(from_currency, to_currency): message})
+            raise BadRequestError(message)
         except HTTPError as http_err:
-            logging.error(f"HTTPError: {http_err}")
+            logging.error("HTTPError: %s", http_err)
             raise OperationForbiddenError(f"Invalid currency code: {http_err}")
         except Exception as err:
-            logging.error(f"ExceptionError: {err}")
+            logging.error("ExceptionError: %s", err)
             raise BadRequestError(f"Invalid currency code: {err}")
-        
-    
-    def get_conversion_rate_v2(self, from_currency, to_currency):
+
+
+    def fetch_rates_v1(self, from_currency, to_currencies):
+        """Fetch and cache every FROM -> TO rate for one base with a single Open Exchange Rates call."""
+        return self.fetch_rates("v1", from_currency, to_currencies)
+
+
+    def fetch_rates(self, version, from_currency, to_currencies):
+        """
+        Fetch every FROM -> TO rate for one base from the version's provider and cache it
+        under that version. With HEDGE_ENABLED the other provider backs it up.
+        """
+        primary = self.providers[version]
+
+        if Config.HEDGE_ENABLED:
+            secondary = self.providers["v2" if version == "v1" else "v1"]
+            rates = self.hedged_fetch(primary, secondary, from_currency, to_currencies)
+        else:
+            rates = primary.fetch_rates(from_currency, to_currencies)
+
+        self.store_rates(version, from_currency, rates)
+        return rates
+
+
+    def hedged_fetch(self, primary, secondary, from_currency, to_currencies):
+        """
+        Ask `primary` first. If it has not answered within its recent p95 latency, ask
+        `secondary` as well and return whichever succeeds first. A primary whose breaker
+        is open, or that fails outright, hands the lookup straight to `secondary`.
+        """
+        if not secondary.available():
+            return primary.fetch_rates(from_currency, to_currencies)
+
+        if not primary.available():
+            PROVIDER_HEDGES.labels(primary.name, secondary.name).inc()
+            return secondary.fetch_rates(from_currency, to_currencies)
+
+        # The calls run on pool threads, so the request is charged the time it waits on them
+        with timed_phase("upstream"):
+            executor = self._hedge_executor.get()
+            first = executor.submit(primary.fetch_rates, from_currency, to_currencies)
+            done, _ = wait([first], timeout=primary.hedge_delay())
+
+            if done:
+                err = first.exception()
+
+                if err is None or not primary.is_failure(err):
+                    return first.result()
+
+                PROVIDER_HEDGES.labels(primary.name, secondary.name).inc()
+                return secondary.fetch_rates(from_currency, to_currencies)
+
+            PROVIDER_HEDGES.labels(primary.name, secondary.name).inc()
+            pending = {first, executor.submit(secondary.fetch_rates, from_currency, to_currencies)}
+            error = None
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+
+                    error = error or future.exception()
+
+            raise error
+
+
+    def store_rates(self, version, from_currency, rates):
+        """Cache freshly fetched rates for one base and append them to the rate history."""
+
+        fetched_at = time.time()
+        drifts = self.observe_drifts(version, from_currency, rates, fetched_at)
+
+        self.write_cache(
+            self.redis_client.set_values,
+            {f"{version}_{from_currency}_{to_currency}": encode_rate(rate['rate'], rate['timestamp'], fetched_at, drifts.get(to_currency)) for to_currency, rate in rates.items()},
+            Config.RATE_HARD_TTL
+        )
+        self.write_cache(
+            self.redis_client.add_members,
+            CACHED_PAIRS_KEY.format(version=version),
+            [f"{from_currency}_{to_currency}" for to_currency in rates],
+            Config.RATE_HARD_TTL
+        )
+        self.record_history(version, [(from_currency, to_currency, rate['rate'], fetched_at) for to_currency, rate in rates.items()])
+
+        # Streaming clients on every worker get the new rates through Redis pub/sub
+        self.write_cache(self.redis_client.publish, Config.RATE_STREAM_CHANNEL, rate_update_message(version, from_currency, rates, fetched_at))
+
+
+    def observe_drifts(self, version, from_currency, rates, fetched_at):
+        """How fast each pair is moving, from the entries these rates replace. Empty unless ADAPTIVE_TTL_ENABLED."""
+
+        if not self.ttl_policy.enabled:
+            return {}
+
+        to_currencies = list(rates)
+
+        try:
+            previous = self.redis_client.get_values([f"{version}_{from_currency}_{to_currency}" for to_currency in to_currencies])
+        except RedisError:
+            return {}
+
+        return {
+            to_currency: observe_drift(decode_rate(cached) if cached else None, rates[to_currency]['rate'], fetched_at)
+            for to_currency, cached in zip(to_currencies, previous)
+        }
+
+
+    def record_history(self, version, points):
+        try:
+            self.history.append(version, points)
+        except Exception as err:
+            logging.warning("[%s] Could not record rate history: %s", version.upper(), err)
+
+
+    def get_rate_history(self, version, from_currency, to_currency, start, end, interval):
         self.validate_currency_code(from_currency)
         self.validate_currency_code(to_currency)
 
-        logging.info(f"[V2] {from_currency}")
-        logging.warning(f"[V2] {to_currency}")
+        points = self.history.range(version, from_currency, to_currency, start, end)
+        return downsample(points, start, interval)
 
-        cache_key = f"v2_{from_currency}_{to_currency}"
-        cached = self.redis_client.get_value(cache_key).decode('utf-8') if self.redis_client.get_value(cache_key) else None
 
-        if cached:
-            logging.info(f"[V2] {from_currency}/{to_currency} is already cached.")
-            rate, timestamp = cached.split('|')
+    def get_conversion_rate_v1_from_table(self, from_currency, to_currency, include_fetched_at=False):
+        table = self.get_rate_table_v1((from_currency, to_currency))
+        rate = table.cross_rate(from_currency, to_currency)
+
+        if include_fetched_at:
+            return {'rate': rate, 'timestamp': table.timestamp, 'fetched_at': table.fetched_at}
 
-            return {'rate': float(rate), 'timestamp': timestamp}
+        return {'rate': rate, 'timestamp': table.timestamp}
+
+
+    def get_rate_table_v1(self, currencies=None):
+        """
+        Return the base-currency rate table, fetching it at most once per TTL. With
+        `currencies`, only those rates are read from the cached hash.
+        """
+        cache_key = f"v1_table_{Config.OPEN_XR_TABLE_BASE}"
 
         try:
-            url = f"{self.xecd_base_url}/convert_from.json?from={from_currency}&to={to_currency}&amount=1"
-
-            response = requests.get(url, auth=(self.xecd_api_id, self.xecd_api_key))
-            
-            logging.warning("[V2] Actual XE API response:")
-            logging.info(response.json())
-
-            if response.status_code == 401:
-                raise UnauthorizedError("Invalid XE API credentials.")
-            
-            elif response.status_code == 400:
-                raise BadRequestError("Bad request to XE API.")
-            
-            elif response.status_code == 404:
-                raise NotFoundError(f"Currency {from_currency} to {to_currency} not found.")
-            
-            elif response.status_code == 429:
-                raise OperationForbiddenError("Rate limit exceeded with XE API.")
-            
-            elif response.status_code >= 500:
-                raise ServiceUnavailableError("XE API is currently unavailable.")
-
-            data = response.json()
-
-            # Get the rate for the specific target currency
-            target_data = next((item for item in data["to"] if item["quotecurrency"] == to_currency), None)
-
-            if not target_data:
-                raise NotFoundError(f"No conversion rate found for {from_currency} to {to_currency}.")
+            table = self.read_cached_rate_table(cache_key, currencies)
+        except RedisError as err:
+            return self.bypass_cache("v1", "table", self.fetch_rate_table_v1, err)
 
-            rate = target_data["mid"]
-            timestamp = data.get("timestamp", datetime.datetime.utcnow().isoformat() + "Z")
+        if table:
+            if is_fresh(table.fetched_at):
+                record_cache("v1", "table", "hit")
+            else:
+                record_cache("v1", "table", "stale")
+                self.single_flight.refresh(cache_key, self.fetch_rate_table_v1)
 
-            self.redis_client.set_value(cache_key, f"{rate}|{timestamp}", 3600)
-            return {'rate': rate, 'timestamp': timestamp}
+            return table
 
-        except requests.exceptions.RequestException as e:
-            logging.error(f"[V2] Request error: {e}")
-            raise ServiceUnavailableError("Could not connect to XE API.")
-        
-        except Exception as e:
-            logging.error(f"[V2] General exception: {e}")
-            raise BadRequestError(str(e))
-        
+        record_cache("v1", "table", "miss")
+
+        return self.single_flight.load(
+            cache_key,
+            read_fresh=lambda: self.read_cached_rate_table(cache_key, currencies, fresh_only=True),
+            fetch=self.fetch_rate_table_v1,
+            read_last_known=lambda: self.read_cached_rate_table(cache_key, currencies)
+        )
+
+
+    def read_cached_rate_table(self, cache_key, currencies=None, fresh_only=False):
+        """The cached table hash: every rate, or with `currencies` just those (an empty tuple reads only the metadata)."""
+
+        if currencies is None:
+            fields = self.redis_client.get_hash(cache_key)
+        else:
+            names = [META_FIELD, *currencies]
+            fields = dict(zip(names, self.redis_client.get_hash_fields(cache_key, names)))
+
+        table = RateTable.from_hash(fields)
+
+        if not table or (fresh_only and not is_fresh(table.fetched_at)):
+            return None
+
+        return table
+
+
+    def fetch_rate_table_v1(self):
+        base_currency = Config.OPEN_XR_TABLE_BASE
+        cache_key = f"v1_table_{base_currency}"
 
-    def get_account_info(self): 
         try:
-            url = f"{self.xecd_base_url}/account_info/"
-            response = requests.get(url, auth=(self.xecd_api_id, self.xecd_api_key))
+            table = self.providers["v1"].fetch_table(base_currency)
+            logging.info("[V1] Fetched %d rates for base %s (version %s).", len(table.rates), base_currency, table.version)
+
+            self.write_cache(self.redis_client.set_hash, cache_key, table.to_hash(), Config.RATE_HARD_TTL)
+            self.record_history("v1", [(base_currency, symbol, rate, table.fetched_at) for symbol, rate in table.rates.items()])
+            self.write_cache(self.redis_client.publish, Config.RATE_STREAM_CHANNEL, table_update_message(table))
+            return table
 
-            logging.info("[V2] Account Info response:")
-            logging.info(response.text)
+        except BaseError:
+            raise
+        except HTTPError as http_err:
+            logging.error("HTTPError: %s", http_err)
+            raise OperationForbiddenError(f"Rate table request failed: {http_err}")
+        except Exception as err:
+            logging.error("ExceptionError: %s", err)
+            raise BadRequestError(f"Rate table request failed: {err}")
+        
+    
+    def get_conversion_rate_v2(self, from_currency, to_currency, include_fetched_at=False):
+        self.validate_pair("v2", from_currency, to_currency)
+
+        logging.debug("[V2] %s -> %s", from_currency, to_currency)
+
+        self.hot_pairs.record("v2", from_currency, to_currency)
+
+        snapshot_entry = self.read_snapshot("v2", from_currency, to_currency)
+
+        if snapshot_entry:
+            return snapshot_entry if include_fetched_at else public_rate(snapshot_entry)
+
+        return self.get_cached_rate("v2", from_currency, to_currency, lambda: self.fetch_conversion_rate_v2(from_currency, to_currency), include_fetched_at)
+
+
+    def fetch_conversion_rate_v2(self, from_currency, to_currency):
+        try:
+            rates = self.fetch_rates_v2(from_currency, [to_currency])
 
-            if response.status_code == 401:
-                raise UnauthorizedError("Invalid XE API credentials.")
-            elif response.status_code >= 500:
-                raise ServiceUnavailableError("XE API is currently unavailable.")
-            elif response.status_code != 200:
-                raise BadRequestError(f"Unexpected error: {response.text}")
+            if to_currency not in rates:
+                raise NotFoundError(f"No conversion rate found for {from_currency} to {to_currency}.")
 
-            return response.json()
+            return rates[to_currency]
 
         except requests.exceptions.RequestException as e:
-            logging.error(f"[V2] Request error in account info: {e}")
+            logging.error("[V2] Request error: %s", e)
             raise ServiceUnavailableError("Could not connect to XE API.")
+
+        except ServiceUnavailableError:
+            raise
+        except NotFoundError as err:
+            self.remember_missing("v2", {(from_currency, to_currency): err.message})
+            raise BadRequestError(err.message)
         except Exception as e:
-            logging.error(f"[V2] Account info error: {e}")
+            logging.error("[V2] General exception: %s", e)
             raise BadRequestError(str(e))
 
 
+    def fetch_rates_v2(self, from_currency, to_currencies):
+        """Fetch and cache every FROM -> TO rate for one base with a single XE call."""
+        return self.fetch_rates("v2", from_currency, to_currencies)
+
+
+    def get_conversion_rates_batch(self, pairs, version="v2"):
+        """
+        Resolve many (from, to) pairs at once: one MGET for every cache key and
+        at most one upstream call per distinct base currency. Returns a dict keyed
+        by pair holding either the rate or an `error` message for that pair.
+        """
+        fetch_rates = self.fetch_rates_v1 if version == "v1" else self.fetch_rates_v2
+        unique_pairs = list(dict.fromkeys(pairs))
+        unsupported = {}
+
+        for from_currency, to_currency in unique_pairs:
+            # Malformed and unquoted codes fail on their own instead of failing the batch
+            try:
+                self.validate_pair(version, from_currency, to_currency)
+            except UnprocessableEntityError as err:
+                unsupported[(from_currency, to_currency)] = {'error': err.message}
+            else:
+                self.hot_pairs.record(version, from_currency, to_currency)
+
+        unique_pairs = [pair for pair in unique_pairs if pair not in unsupported]
+
+        if not unique_pairs:
+            return unsupported
+
+        if version == "v1" and Config.OPEN_XR_TABLE_MODE:
+            table = self.get_rate_table_v1(tuple({code for pair in unique_pairs for code in pair}))
+            results = {}
+
+            for from_currency, to_currency in unique_pairs:
+                try:
+                    results[(from_currency, to_currency)] = {'rate': table.cross_rate(from_currency, to_currency), 'timestamp': table.timestamp}
+                except NotFoundError as err:
+                    results[(from_currency, to_currency)] = {'error': err.message}
+
+            return {**unsupported, **results}
+
+        results = {}
+
+        if self.snapshots:
+            for pair in unique_pairs:
+                entry = self.read_snapshot(version, *pair)
+
+                if entry:
+                    results[pair] = public_rate(entry)
+
+            unique_pairs = [pair for pair in unique_pairs if pair not in results]
+
+        snapshot_hits = len(results)
+        cache_keys = [f"{version}_{from_currency}_{to_currency}" for from_currency, to_currency in unique_pairs]
+        bypassed = 0
+
+        # Negative-cache entries come back in the same MGET as the rates
+        try:
+            values = self.redis_client.get_values(cache_keys + [f"missing_{key}" for key in cache_keys])
+        except RedisError as err:
+            logging.debug("[%s] Cache unavailable, fetching the whole batch upstream: %s", version.upper(), err)
+            values = [None] * len(cache_keys) * 2
+            bypassed = len(cache_keys)
+
+        stale = {}
+        missing = {}
+        negative = 0
+
+        for pair, cached, missing_error in zip(unique_pairs, values, values[len(cache_keys):]):
+            if not cached and missing_error:
+                results[pair] = {'error': missing_error.decode('utf-8') if isinstance(missing_error, bytes) else missing_error}
+                negative += 1
+                continue
+
+            if not cached:
+                missing.setdefault(pair[0], []).append(pair[1])
+                continue
+
+            entry = decode_rate(cached)
+            results[pair] = public_rate(entry)
+
+            if not self.is_fresh_rate(version, entry):
+                stale.setdefault(pair[0], []).append(pair[1])
+
+        # Stale pairs are answered from cache and refreshed per base in the background, under
+        # the same per-pair locks as single conversions so the two never refresh a pair twice
+        for from_currency, to_currencies in stale.items():
+            self.single_flight.refresh_many(
+                [f"{version}_{from_currency}_{to_currency}" for to_currency in to_currencies],
+                lambda cache_keys, from_currency=from_currency: fetch_rates(from_currency, [cache_key.rsplit("_", 1)[1] for cache_key in cache_keys])
+            )
+
+        cached_count = len(results) - snapshot_hits - negative
+        stale_count = sum(len(to_currencies) for to_currencies in stale.values())
+        record_cache(version, "rate", "hit", cached_count - stale_count)
+        record_cache(version, "rate", "stale", stale_count)
+        record_cache(version, "rate", "negative", negative)
+        record_cache(version, "rate", "miss", len(unique_pairs) - cached_count - bypassed - negative)
+        record_cache(version, "rate", "bypass", bypassed)
+
+        logging.info("[%s] Batch of %d pairs: %d cached, %d upstream calls, %d background refreshes.", version.upper(), len(unique_pairs) + snapshot_hits, len(results), len(missing), len(stale))
+
+        for from_currency, to_currencies in missing.items():
+            try:
+                rates = fetch_rates(from_currency, to_currencies)
+                error_message = "No conversion rate found."
+
+                # The provider answered without these pairs, so asking again would not help
+                self.remember_missing(version, {(from_currency, to_currency): error_message for to_currency in to_currencies if to_currency not in rates})
+            except BaseError as err:
+                rates = {}
+                error_message = err.message
+            except requests.exceptions.RequestException as err:
+                logging.error("[%s] Batch request error: %s", version.upper(), err)
+                rates = {}
+                error_message = "Could not connect to the rates provider."
+
+            for to_currency in to_currencies:
+                results[(from_currency, to_currency)] = rates.get(to_currency) or {'error': error_message}
+
+        return {**unsupported, **results}
+        
+
+    def get_account_info(self):
+        return json.loads(self.get_account_info_json())
+
+
+    def get_account_info_json(self):
+        """Account info as the raw XE JSON body, cached for ACCOUNT_INFO_SOFT_TTL seconds."""
+        return self.get_account_info_document()['body']
+
+
+    def get_account_info_document(self):
+        return self.get_cached_document(
+            "v2_account_info",
+            f"{self.xecd_base_url}/account_info/",
+            None,
+            Config.ACCOUNT_INFO_SOFT_TTL,
+            Config.ACCOUNT_INFO_HARD_TTL,
+            "account info"
+        )
+
+
     def get_currencies(self, iso=None, obsolete=False, language="en", additional_info=None, crypto=False):
+        return json.loads(self.get_currencies_json(iso, obsolete, language, additional_info, crypto))
+
+
+    def get_currencies_json(self, iso=None, obsolete=False, language="en", additional_info=None, crypto=False):
+        """The currencies list as the raw XE JSON body, cached per distinct query."""
+        return self.get_currencies_document(iso, obsolete, language, additional_info, crypto)['body']
+
+
+    def get_currencies_document(self, iso=None, obsolete=False, language="en", additional_info=None, crypto=False):
+        params = upstream.xe_currencies_params(iso, obsolete, language, additional_info, crypto)
+
+        return self.get_cached_document(
+            document_cache_key("v2_currencies", params),
+            f"{self.xecd_base_url}/currencies",
+            params,
+            Config.CURRENCIES_SOFT_TTL,
+            Config.CURRENCIES_HARD_TTL,
+            "currencies list"
+        )
+
+
+    def get_cached_document(self, cache_key, url, params, soft_ttl, hard_ttl, label):
+        """
+        Serve an XE lookup from cache as its `fetched_at`/`etag`/`body` document. Past the
+        soft TTL it is revalidated in the background, conditionally when XE sent an ETag.
+        """
         try:
-            params = {
-                "obsolete": str(obsolete).lower(),
-                "language": language,
-                "crypto": str(crypto).lower()
-            }
+            cached = self.redis_client.get_value(cache_key)
+        except RedisError as err:
+            return self.bypass_cache("v2", "document", lambda: self.fetch_document(cache_key, url, params, hard_ttl, label), err)
+
+        if cached:
+            document = decode_document(cached)
+
+            if is_fresh(document['fetched_at'], soft_ttl):
+                record_cache("v2", "document", "hit")
+            else:
+                record_cache("v2", "document", "stale")
+                self.single_flight.refresh(cache_key, lambda: self.fetch_document(cache_key, url, params, hard_ttl, label, document))
 
-            if iso:
-                params["iso"] = iso
-            if additional_info:
-                params["additionalInfo"] = additional_info
+            return document
 
-            url = f"{self.xecd_base_url}/currencies"
-            response = requests.get(url, params=params, auth=(self.xecd_api_id, self.xecd_api_key))
+        record_cache("v2", "document", "miss")
 
-            logging.info("[V2] Currencies list response:")
-            logging.info(response.text)
+        return self.single_flight.load(
+            cache_key,
+            read_fresh=lambda: self.read_cached_document(cache_key, soft_ttl),
+            fetch=lambda: self.fetch_document(cache_key, url, params, hard_ttl, label),
+            read_last_known=lambda: self.read_cached_document(cache_key)
+        )
 
-            if response.status_code == 401:
-                raise UnauthorizedError("Invalid XE API credentials.")
-            elif response.status_code >= 500:
-                raise ServiceUnavailableError("XE API is currently unavailable.")
-            elif response.status_code != 200:
-                raise BadRequestError(f"Unexpected error: {response.text}")
 
-            return response.json()
+    def read_cached_document(self, cache_key, soft_ttl=None):
+        cached = self.redis_client.get_value(cache_key)
+
+        if not cached:
+            return None
+
+        document = decode_document(cached)
+
+        if soft_ttl and not is_fresh(document['fetched_at'], soft_ttl):
+            return None
+
+        return document
+
+
+    def fetch_document(self, cache_key, url, params, hard_ttl, label, previous=None):
+        try:
+            headers = {"If-None-Match": previous['etag']} if previous and previous['etag'] else None
+            response = self.xecd_session.get(url, params=params, headers=headers, timeout=request_timeout())
+
+            if response.status_code == 304 and previous:
+                logging.info("[V2] %s not modified upstream.", label)
+                body, etag = previous['body'], previous['etag']
+            else:
+                logging.info("[V2] %s response: %s, %d bytes", label, response.status_code, len(response.content))
+                upstream.check_xe_lookup_status(response.status_code, response.text)
+
+                # Validate the payload once, then keep the upstream bytes as the cached serialization
+                json.loads(response.text)
+                body, etag = response.text, response.headers.get("ETag", "")
+
+            raw = encode_document(body, etag)
+            self.write_cache(self.redis_client.set_value, cache_key, raw, hard_ttl)
+            return decode_document(raw)
 
         except requests.exceptions.RequestException as e:
-            logging.error(f"[V2] Request error in currencies list: {e}")
+            logging.error("[V2] Request error in %s: %s", label, e)
             raise ServiceUnavailableError("Could not connect to XE API.")
         except Exception as e:
-            logging.error(f"[V2] Currencies fetch error: {e}")
-            raise BadRequestError(str(e))
\ No newline at end of file
+            logging.error("[V2] %s error: %s", label, e)
+            raise BadRequestError(str(e))
@@ -0,0 +1,61 @@
+import threading
+from collections import Counter
+from app.config import logging, Config
+
+HOT_PAIRS_KEY = "hot_pairs_{version}"
+
+# Distinct pairs held between flushes; new pairs past this wait for the next flush
+MAX_PENDING_PAIRS = 10000
+
+
+class HotPairTracker:
+    """
+    Counts conversion requests per pair. Requests only bump an in-process Counter; the
+    prefetch scheduler flushes it into a Redis sorted set per provider, so tracking adds
+    no network round trip to the request path. Without prefetching nothing flushes the
+    Counter, so nothing is recorded.
+    """
+
+    def __init__(self, redis_client, enabled=None):
+        self.redis_client = redis_client
+        self.enabled = Config.PREFETCH_ENABLED if enabled is None else enabled
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, version, from_currency, to_currency):
+        if not self.enabled:
+            return
+
+        key = (version, f"{from_currency}_{to_currency}")
+
+        with self.lock:
+            if key in self.counts or len(self.counts) < MAX_PENDING_PAIRS:
+                self.counts[key] += 1
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+
+        if not counts:
+            return
+
+        by_version = {}
+        for (version, pair), count in counts.items():
+            by_version.setdefault(version, {})[pair] = count
+
+        try:
+            for version, scores in by_version.items():
+                self.redis_client.increment_scores(HOT_PAIRS_KEY.format(version=version), scores)
+        except Exception as err:
+            logging.warning("Could not flush hot pair counts: %s", err)
+
+    def top(self, version, count):
+        """The `count` most requested pairs for a provider as (from, to) tuples."""
+        members = self.redis_client.top_members(HOT_PAIRS_KEY.format(version=version), count)
+        pairs = (member.decode('utf-8') if isinstance(member, bytes) else member for member in members)
+
+        return [tuple(pair.split('_')) for pair in pairs]
+
+    def decay(self, version, factor, max_members):
+        """Age the scores so yesterday's traffic does not pin pairs forever, and cap the set size."""
+        self.redis_client.decay_scores(HOT_PAIRS_KEY.format(version=version), factor, max_members)
@@ -0,0 +1,129 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.config import logging, Config
+from app.services.rate_cache import decode_rate
+from app.utils.process_local import ProcessLocal
+
+PREFETCH_LEADER_KEY = "prefetch_leader"
+
+
+class PrefetchScheduler:
+    """
+    Background thread that keeps the hottest pairs warm. Every PREFETCH_INTERVAL seconds
+    each worker flushes its hot-pair counts; one worker across the fleet (holding a
+    leader lease) then refreshes the top-N pairs per provider that are missing or about
+    to pass their soft TTL. The first cycle runs at startup to warm an empty cache.
+    """
+
+    def __init__(self, currency_service):
+        self.currency_service = currency_service
+        self.redis_client = currency_service.redis_client
+        self.hot_pairs = currency_service.hot_pairs
+        self.interval = Config.PREFETCH_INTERVAL
+        self._thread = ProcessLocal(self._start_thread)
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._thread.get()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _start_thread(self):
+        thread = threading.Thread(target=self._loop, name="rate-prefetch", daemon=True)
+        thread.start()
+        return thread
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            try:
+                self.run_cycle()
+            except Exception as err:
+                logging.warning("Prefetch cycle failed: %s", err)
+
+            self._stopped.wait(self.interval)
+
+    def run_cycle(self):
+        self.hot_pairs.flush()
+
+        # The lease is left to expire so the fleet runs at most one refresh per interval
+        if not self.redis_client.acquire_lock(PREFETCH_LEADER_KEY, uuid.uuid4().hex, int(self.interval * 1000)):
+            return 0
+
+        started = time.monotonic()
+        budget = Config.PREFETCH_BUDGET
+        jobs = []
+
+        for version in ("v1", "v2"):
+            version_jobs = self.plan(version, budget - len(jobs))
+            jobs.extend(version_jobs)
+
+            self.hot_pairs.decay(version, 0.5 ** (self.interval / Config.HOT_PAIR_HALF_LIFE), Config.PREFETCH_TOP_N * 10)
+
+        with ThreadPoolExecutor(max_workers=Config.PREFETCH_CONCURRENCY, thread_name_prefix="rate-prefetch") as executor:
+            results = list(executor.map(self._run_job, jobs))
+
+        refreshed = sum(results)
+        logging.info("Prefetch refreshed %d/%d groups in %.2fs.", refreshed, len(jobs), time.monotonic() - started)
+        return refreshed
+
+    def plan(self, version, budget):
+        """
+        Build at most `budget` upstream jobs for the provider's hottest pairs that are
+        missing or within PREFETCH_LEAD seconds of their soft TTL, one job per base currency.
+        Each job is a list of cache keys and a `fetch(cache_keys)` for the keys it gets to lock.
+        """
+        if budget <= 0:
+            return []
+
+        service = self.currency_service
+
+        if version == "v1" and Config.OPEN_XR_TABLE_MODE:
+            table = service.read_cached_rate_table(f"v1_table_{Config.OPEN_XR_TABLE_BASE}", currencies=())
+
+            if table and not self.is_due(table.fetched_at):
+                return []
+
+            return [([f"v1_table_{Config.OPEN_XR_TABLE_BASE}"], lambda cache_keys: service.fetch_rate_table_v1())]
+
+        pairs = self.hot_pairs.top(version, Config.PREFETCH_TOP_N)
+        cached_values = self.redis_client.get_values([f"{version}_{from_currency}_{to_currency}" for from_currency, to_currency in pairs])
+
+        due = {}
+        for (from_currency, to_currency), cached in zip(pairs, cached_values):
+            entry = decode_rate(cached) if cached else None
+
+            if not entry or self.is_due(entry['fetched_at'], service.ttl_policy.soft_ttl(version, entry)):
+                due.setdefault(from_currency, []).append(to_currency)
+
+        fetch_rates = service.fetch_rates_v1 if version == "v1" else service.fetch_rates_v2
+
+        # Jobs lock the same per-pair keys as conversions and batch refreshes, so a pair
+        # that is already being refreshed elsewhere is left out of the upstream call
+        return [
+            (
+                [f"{version}_{from_currency}_{to_currency}" for to_currency in to_currencies],
+                lambda cache_keys, from_currency=from_currency: fetch_rates(from_currency, [cache_key.rsplit("_", 1)[1] for cache_key in cache_keys])
+            )
+            for from_currency, to_currencies in list(due.items())[:budget]
+        ]
+
+    def is_due(self, fetched_at, ttl=None):
+        if fetched_at is None:
+            return False
+
+        ttl = ttl or Config.RATE_SOFT_TTL
+
+        # Adaptive TTLs can be shorter than the lead; refresh those halfway through
+        return time.time() - fetched_at >= ttl - min(Config.PREFETCH_LEAD, ttl / 2)
+
+    def _run_job(self, job):
+        cache_keys, fetch = job
+
+        try:
+            return self.currency_service.single_flight.try_run_many(cache_keys, fetch)
+        except Exception as err:
+            logging.warning("Prefetch of %s failed: %s", ', '.join(cache_keys), err)
+            return False
@@ -0,0 +1,156 @@
+import time
+import requests
+from abc import ABC, abstractmethod
+from app.config import logging, Config
+from app.services import upstream
+from app.services.rate_table import RateTable
+from app.utils.http_client import request_timeout
+from app.utils.log_pipeline import log_payload
+from app.utils.circuit_breaker import CircuitBreaker, LatencyTracker
+from app.utils.metrics import PROVIDER_REJECTIONS, PROVIDER_CIRCUIT_OPENED
+from app.utils.errors import ServiceUnavailableError
+
+
+class RateProvider(ABC):
+    """
+    One upstream rate source. Subclasses implement `request_rates`; `call` wraps every
+    request in the provider's circuit breaker and records its latency. `session` is a
+    ProcessLocal holding the provider's pooled requests session.
+    """
+
+    name = None
+    label = None
+
+    def __init__(self, session):
+        self._session = session
+        self.breaker = CircuitBreaker(Config.PROVIDER_FAILURE_THRESHOLD, Config.PROVIDER_RESET_TIMEOUT)
+        self.latency = LatencyTracker(Config.PROVIDER_LATENCY_WINDOW)
+
+
+    @property
+    def session(self):
+        return self._session.get()
+
+
+    def available(self):
+        return self.breaker.state != "open"
+
+
+    def hedge_delay(self):
+        """How long to wait on this provider before hedging: its recent p95, within bounds."""
+
+        p95 = self.latency.percentile(0.95)
+
+        if p95 is None:
+            return Config.HEDGE_DEFAULT_DELAY_MS / 1000
+
+        return max(p95, Config.HEDGE_MIN_DELAY_MS / 1000)
+
+
+    def is_failure(self, err):
+        """Whether an error means the provider is unhealthy, as opposed to a bad request."""
+
+        if isinstance(err, requests.exceptions.HTTPError):
+            return err.response is None or err.response.status_code >= 500
+
+        return isinstance(err, (requests.exceptions.RequestException, ServiceUnavailableError))
+
+
+    def call(self, request, *args):
+        if not self.breaker.allow():
+            PROVIDER_REJECTIONS.labels(self.name).inc()
+            raise ServiceUnavailableError(f"{self.label} is unavailable, its circuit breaker is open.")
+
+        started = time.perf_counter()
+
+        try:
+            result = request(*args)
+        except Exception as err:
+            if not self.is_failure(err):
+                self.breaker.record_success()
+            elif self.breaker.record_failure():
+                PROVIDER_CIRCUIT_OPENED.labels(self.name).inc()
+                logging.warning("%s circuit breaker opened after %d failures.", self.label, self.breaker.failures)
+
+            raise
+
+        self.breaker.record_success()
+        self.latency.observe(time.perf_counter() - started)
+        return result
+
+
+    def fetch_rates(self, from_currency, to_currencies):
+        """Every FROM -> TO rate for one base as {to: {'rate', 'timestamp'}}."""
+        return self.call(self.request_rates, from_currency, to_currencies)
+
+
+    @abstractmethod
+    def request_rates(self, from_currency, to_currencies):
+        """One upstream call for FROM -> each TO, returning {to: {'rate', 'timestamp'}}."""
+
+
+class OpenExchangeRatesProvider(RateProvider):
+    name = "open_xr"
+    label = "Open Exchange Rates"
+
+    def __init__(self, session, base_url, app_id):
+        super().__init__(session)
+        self.base_url = base_url
+        self.app_id = app_id
+
+
+    def request_rates(self, from_currency, to_currencies):
+        url = upstream.open_xr_latest_url(self.base_url, self.app_id, from_currency, to_currencies)
+        response = self.session.get(url, timeout=request_timeout())
+        payload = upstream.read_json(response)
+
+        upstream.check_open_xr_status(response.status_code, payload)
+
+        log_payload("[V1] Open Exchange Rates response", payload)
+
+        return upstream.parse_open_xr_rates(payload, to_currencies)
+
+
+    def fetch_currencies(self):
+        """The ISO codes Open Exchange Rates quotes."""
+        return self.call(self.request_currencies)
+
+
+    def request_currencies(self):
+        response = self.session.get(upstream.open_xr_currencies_url(self.base_url), timeout=request_timeout())
+        response.raise_for_status()
+
+        return set(response.json())
+
+
+    def fetch_table(self, base_currency):
+        return self.call(self.request_table, base_currency)
+
+
+    def request_table(self, base_currency):
+        url = upstream.open_xr_latest_url(self.base_url, self.app_id, base_currency)
+        response = self.session.get(url, timeout=request_timeout())
+        response.raise_for_status()
+
+        return RateTable.from_response(response.json())
+
+
+class XEProvider(RateProvider):
+    name = "xe"
+    label = "XE"
+
+    def __init__(self, session, base_url):
+        super().__init__(session)
+        self.base_url = base_url
+
+
+    def request_rates(self, from_currency, to_currencies):
+        url = upstream.xe_convert_from_url(self.base_url, from_currency, to_currencies)
+        response = self.session.get(url, timeout=request_timeout())
+
+        upstream.check_xe_status(response.status_code, from_currency, to_currencies)
+        payload = response.json()
+
+        log_payload("[V2] XE API response", payload)
+
+        return upstream.parse_xe_rates(payload, to_currencies)
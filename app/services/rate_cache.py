@@ -0,0 +1,67 @@
+import json
+import time
+import hashlib
+from app.config import Config
+
+
+def encode_rate(rate, timestamp, fetched_at=None, drift=None):
+    """
+    Serialise a rate as the `rate|timestamp|fetched_at` string kept in Redis, followed by
+    `|drift` when the adaptive TTL policy has measured how fast the pair moves.
+    """
+    fetched_at = time.time() if fetched_at is None else fetched_at
+    encoded = f"{rate}|{timestamp}|{fetched_at:.3f}"
+
+    return encoded if drift is None else f"{encoded}|{drift:.4e}"
+
+
+def decode_rate(raw):
+    """Parse a cached rate. Fields an older entry was written without decode as None."""
+    if isinstance(raw, bytes):
+        raw = raw.decode('utf-8')
+
+    parts = raw.split('|')
+    fetched_at = float(parts[2]) if len(parts) > 2 else None
+    drift = float(parts[3]) if len(parts) > 3 else None
+
+    return {'rate': float(parts[0]), 'timestamp': parts[1], 'fetched_at': fetched_at, 'drift': drift}
+
+
+def is_fresh(fetched_at, ttl=None):
+    """
+    A cached value is fresh for RATE_SOFT_TTL seconds after it was fetched. Between the
+    soft and hard TTL it is served stale while a background refresh runs; Redis drops
+    it once RATE_HARD_TTL has passed.
+    """
+    if fetched_at is None:
+        return True
+
+    return time.time() - fetched_at < (ttl or Config.RATE_SOFT_TTL)
+
+
+def public_rate(entry):
+    return {'rate': entry['rate'], 'timestamp': entry['timestamp']}
+
+
+def encode_document(body, etag="", fetched_at=None):
+    """Serialise an upstream JSON body as `fetched_at|etag|body`, keeping the body as sent."""
+    fetched_at = time.time() if fetched_at is None else fetched_at
+    return f"{fetched_at:.3f}|{etag}|{body}"
+
+
+def decode_document(raw):
+    if isinstance(raw, bytes):
+        raw = raw.decode('utf-8')
+
+    fetched_at, etag, body = raw.split('|', 2)
+    return {'fetched_at': float(fetched_at), 'etag': etag, 'body': body}
+
+
+# Set of the FROM_TO pairs cached for a version, so the snapshot refresher never scans the keyspace
+CACHED_PAIRS_KEY = "cached_pairs_{version}"
+
+
+def document_cache_key(prefix, params):
+    """A stable cache key for a lookup, independent of parameter order."""
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return f"{prefix}_{digest}"
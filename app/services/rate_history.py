@@ -0,0 +1,90 @@
+import struct
+import datetime
+from app.config import Config
+
+# Each point is a little-endian (unix seconds, rate) pair of float64s appended to one
+# Redis string per pair per UTC day, so a day of hourly rates is 384 bytes.
+POINT = struct.Struct('<dd')
+SECONDS_PER_DAY = 86400
+
+
+def retention_seconds():
+    return Config.HISTORY_RETENTION_DAYS * SECONDS_PER_DAY
+
+
+class RateHistoryStore:
+    """Compact append-only time series of every rate fetched from upstream."""
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+    @staticmethod
+    def series_key(version, from_currency, to_currency, day):
+        return f"history_{version}_{from_currency}_{to_currency}_{day:%Y%m%d}"
+
+    @classmethod
+    def pack(cls, version, points):
+        """Group (from, to, rate, fetched_at) points into the bytes to append per series key."""
+
+        chunks = {}
+
+        for from_currency, to_currency, rate, fetched_at in points:
+            day = datetime.datetime.utcfromtimestamp(fetched_at).date()
+            key = cls.series_key(version, from_currency, to_currency, day)
+            chunks[key] = chunks.get(key, b"") + POINT.pack(fetched_at, float(rate))
+
+        return chunks
+
+    def append(self, version, points):
+        """Append `points` to their series in one pipelined round trip."""
+        self.redis_client.append_values(self.pack(version, points), retention_seconds())
+
+    def range(self, version, from_currency, to_currency, start, end):
+        """All (timestamp, rate) points with start <= timestamp < end, read with a single MGET."""
+
+        first_day = datetime.datetime.utcfromtimestamp(start).date()
+        last_day = datetime.datetime.utcfromtimestamp(end).date()
+        days = [first_day + datetime.timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+
+        values = self.redis_client.get_values([self.series_key(version, from_currency, to_currency, day) for day in days])
+        points = []
+
+        for value in values:
+            if value:
+                points.extend(point for point in POINT.iter_unpack(value) if start <= point[0] < end)
+
+        points.sort()
+        return points
+
+
+def downsample(points, start, interval):
+    """Bucket sorted points into `interval`-second OHLC bars aligned to `start`."""
+
+    buckets = []
+
+    for timestamp, rate in points:
+        bucket_start = start + int((timestamp - start) // interval) * interval
+
+        if not buckets or buckets[-1]["start"] != bucket_start:
+            buckets.append({"start": bucket_start, "open": rate, "high": rate, "low": rate, "close": rate, "sum": rate, "count": 1})
+            continue
+
+        bucket = buckets[-1]
+        bucket["high"] = max(bucket["high"], rate)
+        bucket["low"] = min(bucket["low"], rate)
+        bucket["close"] = rate
+        bucket["sum"] += rate
+        bucket["count"] += 1
+
+    return [
+        {
+            "timestamp": datetime.datetime.utcfromtimestamp(bucket["start"]).isoformat() + "Z",
+            "open": bucket["open"],
+            "high": bucket["high"],
+            "low": bucket["low"],
+            "close": bucket["close"],
+            "mean": bucket["sum"] / bucket["count"],
+            "count": bucket["count"]
+        }
+        for bucket in buckets
+    ]
@@ -0,0 +1,265 @@
+import os
+import mmap
+import time
+import fcntl
+import struct
+import datetime
+import threading
+import numpy as np
+from app.config import logging, Config
+from app.services.rate_table import RateTable
+from app.services.rate_cache import decode_rate, CACHED_PAIRS_KEY
+from app.utils.process_local import ProcessLocal
+
+# File layout: header, then `count` 3-byte currency codes, then three count x count
+# float64 matrices (rate, upstream timestamp, fetched_at) indexed [from][to]. NaN marks
+# a pair that is not in the snapshot.
+MAGIC = b"RSNP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHIQd")
+MATRICES = 3
+
+
+def snapshot_path(version, directory=None):
+    return os.path.join(directory or Config.SNAPSHOT_DIR, f"rates_{version}.snap")
+
+
+def to_epoch(timestamp):
+    try:
+        return datetime.datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return np.nan
+
+
+def to_iso(epoch):
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+
+
+def write_snapshot(path, generation, entries):
+    """
+    Write `entries` (from, to, rate, timestamp, fetched_at) to `path`. The file is written
+    beside the target and renamed over it, so readers see either the old or the new version.
+    """
+    codes = sorted({code for entry in entries for code in entry[:2]})
+    index = {code: position for position, code in enumerate(codes)}
+    count = len(codes)
+
+    matrices = np.full((MATRICES, count, count), np.nan)
+
+    for from_currency, to_currency, rate, timestamp, fetched_at in entries:
+        cell = (index[from_currency], index[to_currency])
+        matrices[0][cell] = rate
+        matrices[1][cell] = to_epoch(timestamp)
+        matrices[2][cell] = fetched_at if fetched_at is not None else np.nan
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+
+    with open(temporary, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, FORMAT_VERSION, count, generation, time.time()))
+        handle.write("".join(codes).encode("ascii"))
+        handle.write(matrices.tobytes())
+
+    os.replace(temporary, path)
+    return count
+
+
+class RateSnapshot:
+    """A read-only mapping of one snapshot file. The matrices are views over the mapped pages."""
+
+    def __init__(self, path):
+        with open(path, "rb") as handle:
+            self.identity = os.fstat(handle.fileno()).st_ino
+            self.buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, format_version, count, self.generation, self.created_at = HEADER.unpack_from(self.buffer, 0)
+
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} rate snapshot.")
+
+        codes = self.buffer[HEADER.size:HEADER.size + 3 * count].decode("ascii")
+        self.index = {codes[position:position + 3]: position // 3 for position in range(0, len(codes), 3)}
+
+        offset = HEADER.size + 3 * count
+        self.matrices = np.frombuffer(self.buffer, dtype=np.float64, count=MATRICES * count * count, offset=offset).reshape(MATRICES, count, count)
+
+
+    def lookup(self, from_currency, to_currency):
+        """The cached entry for a pair, in decode_rate's shape, or None."""
+
+        row = self.index.get(from_currency)
+        column = self.index.get(to_currency)
+
+        if row is None or column is None:
+            return None
+
+        rate, timestamp, fetched_at = self.matrices[:, row, column].tolist()
+
+        if rate != rate:
+            return None
+
+        return {
+            'rate': rate,
+            'timestamp': to_iso(timestamp) if timestamp == timestamp else None,
+            'fetched_at': fetched_at if fetched_at == fetched_at else None
+        }
+
+
+class SnapshotReader:
+    """
+    Per-worker view of the latest snapshot for one version. At most every
+    SNAPSHOT_CHECK_INTERVAL seconds it stats the file, and maps the new one when the
+    refresher has renamed a newer version into place.
+    """
+
+    def __init__(self, version, directory=None):
+        self.path = snapshot_path(version, directory)
+        self.snapshot = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+
+    def current(self):
+        now = time.monotonic()
+
+        if now - self.checked_at >= Config.SNAPSHOT_CHECK_INTERVAL and self.lock.acquire(blocking=False):
+            try:
+                self.checked_at = now
+                self.reload()
+            finally:
+                self.lock.release()
+
+        return self.snapshot
+
+
+    def reload(self):
+        try:
+            identity = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            self.snapshot = None
+            return
+
+        if self.snapshot is None or self.snapshot.identity != identity:
+            try:
+                self.snapshot = RateSnapshot(self.path)
+            except (OSError, ValueError) as err:
+                logging.warning("Could not map rate snapshot %s: %s", self.path, err)
+
+
+    def lookup(self, from_currency, to_currency):
+        snapshot = self.current()
+        return snapshot.lookup(from_currency, to_currency) if snapshot else None
+
+
+class SnapshotRefresher:
+    """
+    Rebuilds the snapshot files from Redis every SNAPSHOT_INTERVAL seconds. One refresher
+    runs per host: whichever process holds the directory's flock writes, so workers on
+    the same machine share one set of files.
+    """
+
+    def __init__(self, redis_client, directory=None):
+        self.redis_client = redis_client
+        self.directory = directory or Config.SNAPSHOT_DIR
+        self.generation = 0
+        self.lock_handle = None
+        self.leader_pid = None
+        self._stopped = threading.Event()
+        self._thread = ProcessLocal(self._start_thread)
+
+
+    def collect(self, version):
+        """
+        Every cached pair for a version, plus cross rates from the v1 table if there is one.
+        Pairs come from the set store_rates maintains; those whose rate has expired are dropped from it.
+        """
+        index_key = CACHED_PAIRS_KEY.format(version=version)
+        pairs = sorted(member.decode("utf-8") if isinstance(member, bytes) else member for member in self.redis_client.get_members(index_key))
+        entries = []
+        expired = []
+
+        for start in range(0, len(pairs), 1000):
+            batch = pairs[start:start + 1000]
+
+            for pair, raw in zip(batch, self.redis_client.get_values([f"{version}_{pair}" for pair in batch])):
+                if raw:
+                    entry = decode_rate(raw)
+                    entries.append((pair[:3], pair[4:7], entry['rate'], entry['timestamp'], entry['fetched_at']))
+                else:
+                    expired.append(pair)
+
+        self.redis_client.remove_members(index_key, expired)
+
+        if version == "v1":
+            table = RateTable.from_hash(self.redis_client.get_hash(f"v1_table_{Config.OPEN_XR_TABLE_BASE}"))
+
+            if table:
+                codes = [table.base, *[code for code in table.rates if code != table.base]]
+                entries.extend(
+                    (from_currency, to_currency, table.cross_rate(from_currency, to_currency), table.timestamp, table.fetched_at)
+                    for from_currency in codes for to_currency in codes
+                    if len(from_currency) == 3 and len(to_currency) == 3 and table.rates.get(from_currency, 1.0)
+                )
+
+        return entries
+
+
+    def run_once(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.generation += 1
+
+        for version in ("v1", "v2"):
+            count = write_snapshot(snapshot_path(version, self.directory), self.generation, self.collect(version))
+            logging.debug("Wrote %s rate snapshot %d with %d currencies.", version, self.generation, count)
+
+
+    def acquire_leadership(self):
+        os.makedirs(self.directory, exist_ok=True)
+        handle = open(os.path.join(self.directory, "refresher.lock"), "w")
+
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            return False
+
+        # A forked child inherits the open lock file, so leadership is tied to this pid
+        self.lock_handle = handle
+        self.leader_pid = os.getpid()
+        return True
+
+
+    def is_leader(self):
+        return self.leader_pid == os.getpid() or self.acquire_leadership()
+
+
+    def run_forever(self):
+        while not self._stopped.is_set():
+            if self.is_leader():
+                try:
+                    self.run_once()
+                except Exception as err:
+                    logging.warning("Rate snapshot refresh failed: %s", err)
+
+            self._stopped.wait(Config.SNAPSHOT_INTERVAL)
+
+
+    def start(self):
+        self._thread.get()
+
+
+    def stop(self):
+        self._stopped.set()
+
+
+    def _start_thread(self):
+        thread = threading.Thread(target=self.run_forever, name="rate-snapshot", daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+    # Standalone refresher: python -m app.services.rate_snapshot
+    from app.cache.redis_client import RedisClient
+
+    Config.configure_logging()
+    SnapshotRefresher(RedisClient()).run_forever()
@@ -0,0 +1,166 @@
+import json
+import threading
+from app.config import logging, Config
+from app.cache.pubsub import PubSubListener
+from app.services.rate_table import RateTable
+from app.utils.errors import BaseError, ServiceUnavailableError
+from app.utils.metrics import PROVIDERS, STREAM_CONNECTIONS, STREAM_EVENTS
+
+# How long an EventSource waits before reconnecting after the stream closes
+RECONNECT_DELAY_MS = 3000
+
+
+def rate_update_message(version, from_currency, rates, fetched_at):
+    """Published by CurrencyService whenever it stores freshly fetched rates for one base."""
+    return json.dumps({
+        "version": version,
+        "from": from_currency,
+        "rates": {to_currency: {'rate': rate['rate'], 'timestamp': rate['timestamp']} for to_currency, rate in rates.items()},
+        "fetched_at": fetched_at
+    }, separators=(",", ":"))
+
+
+def table_update_message(table):
+    """Published when a new v1 rate table is stored; subscribers' cross rates are derived from it."""
+    return json.dumps({"version": "v1", "table": table.to_json()}, separators=(",", ":"))
+
+
+def format_event(event, data):
+    """One server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Subscription:
+    """
+    One streaming client's pairs and the updates not yet sent to it. A newer update for a
+    pair replaces an unsent one, so a slow client gets the latest rates, not a backlog.
+    """
+
+    def __init__(self, version, pairs):
+        self.version = version
+        self.pairs = pairs
+        self.pending = {}
+        self.condition = threading.Condition()
+
+
+    def offer(self, pair, update):
+        with self.condition:
+            self.pending[pair] = update
+            self.condition.notify()
+
+
+    def wait(self, timeout):
+        """Block until there are updates or `timeout` passes; returns them (possibly none)."""
+        with self.condition:
+            if not self.pending:
+                self.condition.wait(timeout)
+
+            updates, self.pending = list(self.pending.values()), {}
+
+        return updates
+
+
+class RateStreamBroker:
+    """
+    Fans rate updates out to this worker's streaming clients. CurrencyService publishes
+    every rate it stores on RATE_STREAM_CHANNEL; each worker holds one pub/sub connection
+    and hands each message to the clients watching the affected pairs.
+    """
+
+    def __init__(self, redis_client, channel=None):
+        self.channel = channel or Config.RATE_STREAM_CHANNEL
+        self.listener = PubSubListener(redis_client)
+        self.listener.subscribe(self.channel, self.dispatch)
+        self.lock = threading.Lock()
+        self.watchers = {}
+        self.connections = 0
+
+        # Last update sent per pair, so a refresh that returns the same rate is not pushed again
+        self.latest = {}
+
+
+    def subscribe(self, version, pairs):
+        try:
+            self.listener.start()
+        except Exception as err:
+            logging.warning("Rate stream listener unavailable: %s", err)
+            raise ServiceUnavailableError("Rate streaming is unavailable.")
+
+        with self.lock:
+            if self.connections >= Config.RATE_STREAM_MAX_CONNECTIONS:
+                raise ServiceUnavailableError("Too many rate streams open, try again later.")
+
+            subscription = Subscription(version, pairs)
+            self.connections += 1
+
+            for from_currency, to_currency in pairs:
+                self.watchers.setdefault((version, from_currency, to_currency), set()).add(subscription)
+
+        STREAM_CONNECTIONS.inc()
+        return subscription
+
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.connections -= 1
+
+            for from_currency, to_currency in subscription.pairs:
+                key = (subscription.version, from_currency, to_currency)
+                watchers = self.watchers.get(key)
+
+                if watchers:
+                    watchers.discard(subscription)
+
+                    if not watchers:
+                        del self.watchers[key]
+
+        STREAM_CONNECTIONS.dec()
+
+
+    def dispatch(self, data):
+        message = json.loads(data)
+        version = message["version"]
+
+        if "table" in message:
+            updates = self.table_updates(RateTable.from_json(message["table"]))
+        else:
+            fetched_at = message.get("fetched_at")
+            updates = [
+                ((version, message["from"], to_currency), rate['rate'], rate['timestamp'], fetched_at)
+                for to_currency, rate in message["rates"].items()
+            ]
+
+        delivered = 0
+
+        with self.lock:
+            for key, rate, timestamp, fetched_at in updates:
+                watchers = self.watchers.get(key)
+
+                if not watchers or self.latest.get(key) == (rate, timestamp):
+                    continue
+
+                self.latest[key] = (rate, timestamp)
+                update = {'from': key[1], 'to': key[2], 'rate': rate, 'timestamp': timestamp, 'fetched_at': fetched_at}
+
+                for subscription in watchers:
+                    subscription.offer(key[1:], update)
+
+                delivered += len(watchers)
+
+        if delivered:
+            STREAM_EVENTS.labels(PROVIDERS.get(version, version)).inc(delivered)
+
+
+    def table_updates(self, table):
+        with self.lock:
+            keys = [key for key in self.watchers if key[0] == "v1"]
+
+        updates = []
+
+        for key in keys:
+            try:
+                updates.append((key, table.cross_rate(key[1], key[2]), table.timestamp, table.fetched_at))
+            except BaseError:
+                continue
+
+        return updates
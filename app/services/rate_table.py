@@ -0,0 +1,90 @@
+import json
+import time
+import datetime
+from app.utils.errors import NotFoundError
+
+# Hash field holding everything but the rates; currency codes are always three letters
+META_FIELD = "_meta"
+
+
+class RateTable:
+    """A versioned snapshot of every rate quoted against a single base currency."""
+
+    def __init__(self, base, rates, version, timestamp, fetched_at=None):
+        self.base = base
+        self.rates = rates
+        self.version = version
+        self.timestamp = timestamp
+        self.fetched_at = fetched_at
+
+
+    @classmethod
+    def from_response(cls, payload):
+        """Build a table from an Open Exchange Rates `latest.json` response."""
+
+        if not payload.get("rates"):
+            raise NotFoundError("Open Exchange Rates returned an empty rate table.")
+
+        version = int(payload.get("timestamp") or datetime.datetime.utcnow().timestamp())
+        timestamp = datetime.datetime.utcfromtimestamp(version).isoformat() + "Z"
+
+        return cls(payload.get("base", "USD"), payload["rates"], version, timestamp, time.time())
+
+
+    @classmethod
+    def from_json(cls, raw):
+        data = json.loads(raw)
+        return cls(data["base"], data["rates"], data["version"], data["timestamp"], data.get("fetched_at"))
+
+
+    @classmethod
+    def from_hash(cls, fields):
+        """
+        Rebuild a table from Redis hash fields: `_meta` plus one field per currency. Only
+        the currencies that were read are present. Returns None when there is no `_meta`.
+        """
+        fields = {(key.decode("utf-8") if isinstance(key, bytes) else key): value for key, value in fields.items()}
+        meta = fields.pop(META_FIELD, None)
+
+        if not meta:
+            return None
+
+        data = json.loads(meta)
+        rates = {code: float(rate) for code, rate in fields.items() if rate is not None}
+        return cls(data["base"], rates, data["version"], data["timestamp"], data.get("fetched_at"))
+
+
+    def to_hash(self):
+        meta = json.dumps({
+            "base": self.base,
+            "version": self.version,
+            "timestamp": self.timestamp,
+            "fetched_at": self.fetched_at
+        }, separators=(",", ":"))
+
+        return {META_FIELD: meta, **{code: repr(float(rate)) for code, rate in self.rates.items()}}
+
+
+    def to_json(self):
+        return json.dumps({
+            "base": self.base,
+            "rates": self.rates,
+            "version": self.version,
+            "timestamp": self.timestamp,
+            "fetched_at": self.fetched_at
+        }, separators=(",", ":"))
+
+
+    def cross_rate(self, from_currency, to_currency):
+        """
+        Triangulate FROM -> TO through the table's base currency. The quotient is left
+        unrounded, as rounding to decimal places wipes out small rates such as IDR -> BTC.
+        """
+
+        from_rate = 1.0 if from_currency == self.base else self.rates.get(from_currency)
+        to_rate = 1.0 if to_currency == self.base else self.rates.get(to_currency)
+
+        if not from_rate or to_rate is None:
+            raise NotFoundError(f"{from_currency} || {to_currency}")
+
+        return to_rate / from_rate
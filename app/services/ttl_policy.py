@@ -0,0 +1,221 @@
+import json
+import time
+import datetime
+import threading
+from redis.exceptions import RedisError
+from app.config import logging, Config
+from app.utils.process_local import ProcessLocal
+
+QUOTA_STATE_KEY = "ttl_policy_quota"
+QUOTA_STATE_TTL = 40 * 86400
+
+# Weight of the newest sample in a pair's smoothed drift
+DRIFT_SMOOTHING = 0.3
+
+# Most the quota scale moves per reading. Spend only reacts to new TTLs as entries
+# expire, so larger steps overshoot.
+MAX_SCALE_STEP = 1.25
+
+
+def observe_drift(previous, rate, fetched_at):
+    """
+    A pair's relative change per second, from the entry `rate` replaces, smoothed with
+    the drift that entry carried. None until two fetches of the pair have been seen.
+    """
+    if not previous or not previous['rate'] or previous['fetched_at'] is None or fetched_at <= previous['fetched_at']:
+        return previous.get('drift') if previous else None
+
+    sample = abs(rate - previous['rate']) / previous['rate'] / (fetched_at - previous['fetched_at'])
+
+    if previous.get('drift') is None:
+        return sample
+
+    return DRIFT_SMOOTHING * sample + (1 - DRIFT_SMOOTHING) * previous['drift']
+
+
+def parse_reset(value):
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+def next_quota_state(state, account, read_at):
+    """
+    Fold one XE account-info reading into the shared quota state. The calls XE counted
+    since the previous reading give the fleet's actual spend rate; the budget left over
+    the time to the quota reset gives the rate we can afford. The scale applied to
+    every XE TTL moves by their ratio, within MAX_SCALE_STEP, and never below 1.
+    """
+    limit = account.get("package_limit")
+    remaining = account.get("package_limit_remaining")
+
+    if limit is None or remaining is None:
+        return None
+
+    budget = Config.XE_MONTHLY_BUDGET or limit
+    budget_left = max(0, min(remaining, budget - (limit - remaining)))
+    reset_at = parse_reset(account.get("package_limit_reset")) or read_at + 30 * 86400
+    affordable = budget_left / max(reset_at - read_at, 3600)
+
+    scale = state.get("scale", 1.0) if state else 1.0
+    max_scale = Config.RATE_HARD_TTL / Config.ADAPTIVE_TTL_MIN
+    spending = None
+
+    if state and state.get("remaining") is not None and read_at > state["read_at"] and remaining <= state["remaining"]:
+        spending = (state["remaining"] - remaining) / (read_at - state["read_at"])
+
+    if budget_left == 0:
+        scale = max_scale
+    elif spending is not None:
+        step = min(max(spending / affordable, 1 / MAX_SCALE_STEP), MAX_SCALE_STEP)
+        scale = min(max(scale * step, 1.0), max_scale)
+
+    return {
+        "read_at": read_at,
+        "limit": limit,
+        "remaining": remaining,
+        "budget": budget,
+        "budget_left": budget_left,
+        "reset_at": reset_at,
+        "affordable_per_hour": round(affordable * 3600, 2),
+        "spending_per_hour": round(spending * 3600, 2) if spending is not None else None,
+        "scale": scale
+    }
+
+
+class TtlPolicy:
+    """
+    Soft TTL per cached rate. A pair's TTL is how long it takes, at its measured drift,
+    to move by ADAPTIVE_TTL_DRIFT_TOLERANCE: volatile pairs refresh sooner, stable ones
+    later. XE TTLs are then multiplied by the quota scale, which grows while the fleet
+    spends XE calls faster than the monthly budget allows, up to RATE_HARD_TTL. Spend
+    therefore stays within budget as long as the pairs in use, refreshed once per
+    RATE_HARD_TTL, fit in it. Disabled, every rate keeps RATE_SOFT_TTL.
+    """
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.enabled = Config.ADAPTIVE_TTL_ENABLED
+        self.quota = None
+
+
+    @property
+    def scale(self):
+        return self.quota["scale"] if self.quota else 1.0
+
+
+    def volatility_ttl(self, drift):
+        if drift is None:
+            ttl = Config.RATE_SOFT_TTL
+        elif drift > 0:
+            ttl = Config.ADAPTIVE_TTL_DRIFT_TOLERANCE / drift
+        else:
+            ttl = Config.ADAPTIVE_TTL_MAX
+
+        return min(max(ttl, Config.ADAPTIVE_TTL_MIN), Config.ADAPTIVE_TTL_MAX)
+
+
+    def soft_ttl(self, version, entry):
+        if not self.enabled:
+            return Config.RATE_SOFT_TTL
+
+        ttl = self.volatility_ttl(entry.get('drift'))
+
+        if version == "v2":
+            # Past RATE_HARD_TTL the entry is gone from Redis, so stretching further saves nothing
+            ttl = min(ttl * self.scale, Config.RATE_HARD_TTL)
+
+        return ttl
+
+
+    def update_quota(self, account, read_at):
+        """
+        Apply an account-info reading. Workers share the result through Redis, so the
+        first worker to see a new reading computes it and the rest adopt it.
+        """
+        try:
+            cached = self.redis_client.get_value(QUOTA_STATE_KEY)
+            state = json.loads(cached) if cached else None
+        except RedisError as err:
+            logging.debug("Quota state unavailable: %s", err)
+            state = self.quota
+
+        if state and state["read_at"] >= read_at:
+            self.quota = state
+            return state
+
+        quota = next_quota_state(state, account, read_at)
+
+        if quota is None:
+            logging.debug("XE account info does not report the remaining quota, keeping TTL scale %.2f.", self.scale)
+            return self.quota
+
+        if quota["scale"] != self.scale:
+            logging.info("XE quota: %d of %d budgeted calls left, TTL scale %.2f.", quota["budget_left"], quota["budget"], quota["scale"])
+
+        try:
+            self.redis_client.set_value(QUOTA_STATE_KEY, json.dumps(quota), QUOTA_STATE_TTL)
+        except RedisError as err:
+            logging.debug("Could not share quota state: %s", err)
+
+        self.quota = quota
+        return quota
+
+
+    def describe(self, version, entry):
+        """The policy behind one cached pair, for inspection."""
+
+        drift = entry.get('drift') if entry else None
+        fetched_at = entry.get('fetched_at') if entry else None
+        ttl = self.soft_ttl(version, entry or {})
+
+        return {
+            "enabled": self.enabled,
+            "drift_per_hour": drift * 3600 if drift is not None else None,
+            "volatility_ttl": self.volatility_ttl(drift) if self.enabled else Config.RATE_SOFT_TTL,
+            "quota_scale": self.scale if self.enabled and version == "v2" else 1.0,
+            "soft_ttl": ttl,
+            "fetched_at": fetched_at,
+            "fresh_for": max(0.0, fetched_at + ttl - time.time()) if fetched_at is not None else None,
+            "quota": self.quota if version == "v2" else None
+        }
+
+
+class QuotaMonitor:
+    """
+    Background thread that reads XE account info every ADAPTIVE_TTL_CHECK_INTERVAL
+    seconds and feeds it to the service's TTL policy. The account info goes through the
+    document cache, so the fleet makes one account-info call per ACCOUNT_INFO_SOFT_TTL.
+    """
+
+    def __init__(self, currency_service):
+        self.currency_service = currency_service
+        self.policy = currency_service.ttl_policy
+        self.interval = Config.ADAPTIVE_TTL_CHECK_INTERVAL
+        self._thread = ProcessLocal(self._start_thread)
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._thread.get()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _start_thread(self):
+        thread = threading.Thread(target=self._loop, name="quota-monitor", daemon=True)
+        thread.start()
+        return thread
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            try:
+                self.check()
+            except Exception as err:
+                logging.warning("Quota check failed: %s", err)
+
+            self._stopped.wait(self.interval)
+
+    def check(self):
+        document = self.currency_service.get_account_info_document()
+        return self.policy.update_quota(json.loads(document['body']), document['fetched_at'])
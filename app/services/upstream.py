@@ -0,0 +1,107 @@
+import datetime
+from app.utils.errors import ServiceUnavailableError, UnauthorizedError, NotFoundError, BadRequestError, OperationForbiddenError
+
+# Request building and response parsing shared by the sync and async services
+
+
+def open_xr_latest_url(base_url, app_id, from_currency, to_currencies=None):
+    url = f"{base_url}?app_id={app_id}&base={from_currency}&prettyprint=false&show_alternative=false"
+
+    if to_currencies:
+        url += f"&symbols={','.join(to_currencies)}"
+
+    return url
+
+
+def open_xr_currencies_url(base_url):
+    """currencies.json sits next to latest.json on the Open Exchange Rates API."""
+    return base_url.rsplit("/", 1)[0] + "/currencies.json"
+
+
+def parse_open_xr_rates(payload, to_currencies):
+    upstream_rates = payload.get("rates") or {}
+    timestamp = datetime.datetime.utcnow().isoformat() + "Z"
+
+    return {
+        to_currency: {'rate': upstream_rates[to_currency], 'timestamp': timestamp}
+        for to_currency in to_currencies if to_currency in upstream_rates
+    }
+
+
+def read_json(response):
+    """The decoded body, or None when it is not JSON (an HTML error page, say)."""
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def check_open_xr_status(status_code, payload):
+    """
+    Open Exchange Rates answers auth, plan and quota problems (401, 403, 429) with an
+    `error` body and no rates. Those are upstream failures, never a missing pair, so only
+    a successful response can tell the caller a symbol is not quoted.
+    """
+    if status_code >= 500:
+        raise ServiceUnavailableError("Open Exchange Rates is currently unavailable.")
+
+    if status_code >= 300 or not isinstance(payload, dict) or payload.get("error"):
+        description = payload.get("description") if isinstance(payload, dict) else None
+        raise ServiceUnavailableError(f"Open Exchange Rates request failed with status {status_code}: {description or 'no rates returned'}")
+
+
+def xe_convert_from_url(base_url, from_currency, to_currencies):
+    return f"{base_url}/convert_from.json?from={from_currency}&to={','.join(to_currencies)}&amount=1"
+
+
+def check_xe_status(status_code, from_currency, to_currencies):
+    if status_code == 401:
+        raise UnauthorizedError("Invalid XE API credentials.")
+    
+    elif status_code == 400:
+        raise BadRequestError("Bad request to XE API.")
+    
+    elif status_code == 404:
+        raise NotFoundError(f"Currency {from_currency} to {','.join(to_currencies)} not found.")
+    
+    elif status_code == 429:
+        raise OperationForbiddenError("Rate limit exceeded with XE API.")
+    
+    elif status_code >= 500:
+        raise ServiceUnavailableError("XE API is currently unavailable.")
+
+
+def parse_xe_rates(data, to_currencies):
+    timestamp = data.get("timestamp", datetime.datetime.utcnow().isoformat() + "Z")
+
+    # Keep only the target currencies that were asked for
+    return {
+        item["quotecurrency"]: {'rate': item["mid"], 'timestamp': timestamp}
+        for item in data.get("to", []) if item["quotecurrency"] in to_currencies
+    }
+
+
+def check_xe_lookup_status(status_code, text):
+    """Status handling for the XE account-info and currencies endpoints."""
+
+    if status_code == 401:
+        raise UnauthorizedError("Invalid XE API credentials.")
+    elif status_code >= 500:
+        raise ServiceUnavailableError("XE API is currently unavailable.")
+    elif status_code != 200:
+        raise BadRequestError(f"Unexpected error: {text}")
+
+
+def xe_currencies_params(iso=None, obsolete=False, language="en", additional_info=None, crypto=False):
+    params = {
+        "obsolete": str(obsolete).lower(),
+        "language": language,
+        "crypto": str(crypto).lower()
+    }
+
+    if iso:
+        params["iso"] = iso
+    if additional_info:
+        params["additionalInfo"] = additional_info
+
+    return params
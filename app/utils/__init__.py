@@ -1,3 +1,3 @@
-from .rate_limiting import RateLimiter
+from .rate_limiting import RateLimiter, LocalRateLimiter, RateLimitResult
 from .api_responses import build_success_response, build_error_response
 from .errors import BaseError, UnprocessableEntityError, OperationForbiddenError, NotFoundError, UnauthorizedError, BadRequestError, ServiceUnavailableError
\ No newline at end of file
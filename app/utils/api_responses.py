@@ -1,29 +1,62 @@
-from flask import jsonify
+import json
+from flask import jsonify, Response
+from flask.json.provider import DefaultJSONProvider
+from app.utils.server_timing import timed_phase
 
-def build_success_response(message, status=200, data=None):
-    """Build a standardized success response."""
 
-    response = jsonify({
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, charging the time spent encoding to the `serialize` phase."""
+
+    def dumps(self, obj, **kwargs):
+        with timed_phase("serialize"):
+            return super().dumps(obj, **kwargs)
+
+
+def success_body(message, status=200, data=None):
+    return {
         'success': True,
         'message': message,
         'status_code': status,
         'data': data or {}
-    })
+    }
+
+
+def error_body(message, status=400, data=None):
+    return {
+        'success': False,
+        'error_message': message,
+        'status_code': status,
+        'data': data or {}
+    }
+
+
+def raw_success_body(message, raw_data, status=200):
+    """The success envelope as JSON text around an already-serialized `data` payload."""
+    return '{"data":%s,"message":%s,"status_code":%d,"success":true}' % (raw_data or "{}", json.dumps(message), status)
+
+
+def build_success_response(message, status=200, data=None):
+    """Build a standardized success response."""
+
+    response = jsonify(success_body(message, status, data))
 
     # Set the status code using the response object
     response.status_code = status
     return response
 
 
+def build_raw_success_response(message, raw_data, status=200):
+    """
+    Build a success response around an already-serialized JSON `data` payload,
+    so large cached documents are not decoded and re-encoded on every request.
+    """
+    return Response(raw_success_body(message, raw_data, status), status=status, mimetype="application/json")
+
+
 def build_error_response(message, status=400, data=None):
     """Build a standardized error response."""
 
-    response = jsonify({
-        'success': False,
-        'error_message': message,
-        'status_code': status,
-        'data': data or {}
-    })
+    response = jsonify(error_body(message, status, data))
 
     response.status_code = status
-    return response
\ No newline at end of file
+    return response
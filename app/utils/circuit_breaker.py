@@ -0,0 +1,85 @@
+import time
+import threading
+from collections import deque
+
+
+class CircuitBreaker:
+    """
+    Closed until `failure_threshold` consecutive failures, then open for `reset_timeout`
+    seconds. After that a single trial call is let through: success closes the
+    breaker again, failure reopens it for another `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+
+        return "half_open"
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+
+            if state == "closed":
+                return True
+
+            if state == "open" or self.trial_in_flight:
+                return False
+
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        """Count a failure. Returns True when this failure opened the breaker."""
+
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                opened = self.opened_at is None or time.monotonic() - self.opened_at >= self.reset_timeout
+                self.opened_at = time.monotonic()
+                return opened
+
+            return False
+
+
+class LatencyTracker:
+    """The most recent `window` call latencies, for percentile estimates."""
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, quantile):
+        """The `quantile` latency in seconds, or None before any call has completed."""
+
+        with self.lock:
+            samples = sorted(self.samples)
+
+        if not samples:
+            return None
+
+        return samples[min(len(samples) - 1, int(quantile * len(samples)))]
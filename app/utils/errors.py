@@ -1,16 +1,18 @@
 from .constants import *
-from app.config import logging
 
 
 class BaseError(Exception):
+    """
+    An error with the HTTP status it maps to. Constructing one does not log: expected
+    errors are raised on hot paths, and the app-wide handler logs what reaches it once.
+    """
+
     def __init__(self, message:str, verboseMessage=None, errorType=None, httpCode=None):
         self.message = message or InternalServerErrorMessage
         self.verboseMessage = verboseMessage
         self.errorType = errorType or errorTypes['INTERNAL_SERVER_ERROR']
         self.httpCode = httpCode or statusCodes['500']
 
-        logging.error(self.message)
-
 
 class UnprocessableEntityError(BaseError):
     def __init__(self, message, verboseMessage=None, errorType=None):
@@ -27,7 +29,7 @@ class OperationForbiddenError(BaseError):
         super().__init__(
             message = message or operationForbiddenErrorMessage,
             httpCode= statusCodes["403"],
-            errorType= errorType or errorType["OPERATION_FORBIDDEN"],
+            errorType= errorType or errorTypes["OPERATION_FORBIDDEN"],
             verboseMessage=verboseMessage
         )
 
@@ -0,0 +1,135 @@
+import gzip
+import time
+import hashlib
+from email.utils import formatdate
+from flask import request, Response
+from app.config import Config
+from app.cache.local_cache import LocalCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def strong_etag(*parts):
+    """A strong validator for a representation built from `parts` (cache key, rate, timestamp, ...)."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode('utf-8')).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def coded_etag(etag, encoding):
+    """The ETag of `etag`'s representation in content coding `encoding`, e.g. "abc" -> "abc-gzip"."""
+    if not encoding:
+        return etag
+
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def remaining_ttl(fetched_at, ttl):
+    """Seconds until a cache entry fetched at `fetched_at` goes stale. Unknown means just fetched."""
+    if fetched_at is None:
+        return int(ttl)
+
+    return max(0, int(ttl - (time.time() - fetched_at)))
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+def negotiate_encoding(accept_encoding, size):
+    """Pick br or gzip for bodies of at least RESPONSE_COMPRESS_MIN_BYTES, else None."""
+
+    if not accept_encoding or size < Config.RESPONSE_COMPRESS_MIN_BYTES:
+        return None
+
+    accepted = set()
+
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+
+        accepted.add(coding.strip().lower())
+
+    if brotli and "br" in accepted:
+        return "br"
+
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+
+    return gzip.compress(body, compresslevel=6)
+
+
+class ResponseCache:
+    """
+    Per-process cache of serialized response bodies, one slot per resource and
+    content coding. A slot is reused for as long as the resource's ETag is unchanged.
+    """
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.cache = LocalCache(max_entries or Config.RESPONSE_CACHE_MAX_ENTRIES, ttl or Config.RATE_HARD_TTL)
+
+
+    def body(self, resource_key, etag, encoding, build):
+        slot = f"{resource_key}|{encoding or 'identity'}"
+        cached = self.cache.get(slot)
+
+        if cached and cached[0] == etag:
+            return cached[1]
+
+        body = build()
+        self.cache.set(slot, (etag, body))
+        return body
+
+
+    def respond(self, resource_key, etag, max_age, build, status=200):
+        """
+        Answer the current request with a cacheable JSON representation of `resource_key`.
+        `build` returns the identity-coded body bytes and only runs when the ETag changed.
+        Compressed bodies get the ETag with the coding appended.
+        Responses carry the client's own RateLimit-* headers, so shared caches must not store them.
+        """
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"private, max-age={max_age}",
+            "Expires": formatdate(time.time() + max_age, usegmt=True),
+            "Vary": "Accept-Encoding"
+        }
+
+        # Each content coding is a different strong representation, so the coding is
+        # negotiated first and If-None-Match is checked against that coding's ETag
+        body = self.body(resource_key, etag, None, build)
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding"), len(body))
+        headers["ETag"] = coded_etag(etag, encoding)
+
+        if etag_matches(request.headers.get("If-None-Match"), headers["ETag"]):
+            return Response(status=304, headers=headers)
+
+        if encoding:
+            identity = body
+            body = self.body(resource_key, etag, encoding, lambda: compress(identity, encoding))
+            headers["Content-Encoding"] = encoding
+
+        return Response(body, status=status, mimetype="application/json", headers=headers)
+
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,49 @@
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from app.config import Config
+from app.utils.metrics import record_upstream
+
+
+class InstrumentedSession(requests.Session):
+    """A session that records the latency and status code of every call to its provider."""
+
+    def __init__(self, provider=None):
+        super().__init__()
+        self.provider = provider
+
+    def request(self, method, url, *args, **kwargs):
+        if not self.provider:
+            return super().request(method, url, *args, **kwargs)
+
+        started = time.perf_counter()
+        status = "error"
+
+        try:
+            response = super().request(method, url, *args, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            record_upstream(self.provider, status, time.perf_counter() - started)
+
+
+def build_session(auth=None, headers=None, pool_size=None, provider=None):
+    """Build a keep-alive session with a sized connection pool for one upstream provider."""
+
+    pool_size = pool_size or Config.HTTP_POOL_SIZE
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+
+    session = InstrumentedSession(provider)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.auth = auth
+
+    if headers:
+        session.headers.update(headers)
+
+    return session
+
+
+def request_timeout():
+    """Explicit (connect, read) timeout applied to every upstream call."""
+    return (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
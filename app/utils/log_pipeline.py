@@ -0,0 +1,155 @@
+import os
+import json
+import queue
+import atexit
+import random
+import logging
+import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+# Upstream payload dumps: the fraction of calls that are logged and the size they are cut to
+payload_sample_rate = 0.0
+payload_max_bytes = 2048
+
+listener = None
+queue_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log aggregation in production."""
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process,
+            "thread": record.threadName
+        }
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread without formatting them. Arguments are merged
+    on the writer side, so `logging.info("%s", value)` costs the caller one enqueue.
+    When the queue is full the record is dropped and counted rather than blocking.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Records stay in this process, so there is nothing to pickle. Only the
+        # traceback has to be rendered before the frames it points at go away.
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class PayloadPreview:
+    """Renders an upstream payload as at most `payload_max_bytes` of JSON, on the writer thread."""
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def __str__(self):
+        text = self.payload if isinstance(self.payload, str) else json.dumps(self.payload, default=str)
+
+        if len(text) > payload_max_bytes:
+            return f"{text[:payload_max_bytes]}... ({len(text)} bytes)"
+
+        return text
+
+
+def log_payload(label, payload):
+    """Log a sampled, size-limited dump of an upstream response."""
+
+    if payload_sample_rate <= 0 or random.random() >= payload_sample_rate:
+        return
+
+    logging.info("%s: %s", label, PayloadPreview(payload))
+
+
+def build_formatter(log_format):
+    if log_format == "json":
+        return JsonFormatter()
+
+    from colorlog import ColoredFormatter
+
+    return ColoredFormatter(
+        "%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+        log_colors={
+            "INFO": "green",
+            "WARNING": "yellow",
+            "ERROR": "red",
+        },
+    )
+
+
+def configure_logging(level="INFO", log_format="color", queue_size=10000, sample_rate=0.0, max_bytes=2048):
+    """
+    Route the root logger through a bounded queue to a single writer thread, so request
+    threads never format or write log lines themselves.
+    """
+    global listener, queue_handler, payload_sample_rate, payload_max_bytes
+
+    if listener is not None:
+        # Reconfiguring (another app built in the same process) replaces the writer thread
+        stop_logging()
+    else:
+        atexit.register(stop_logging)
+        os.register_at_fork(after_in_child=restart_listener)
+
+    payload_sample_rate = sample_rate
+    payload_max_bytes = max_bytes
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(build_formatter(log_format))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+
+    return queue_handler
+
+
+def restart_listener():
+    # Neither the writer thread nor the queue's locks survive a fork intact,
+    # so each worker gets a fresh queue and its own writer
+    if listener and listener._thread is not None:
+        log_queue = queue.Queue(maxsize=queue_handler.queue.maxsize)
+        queue_handler.queue = log_queue
+        listener.queue = log_queue
+        listener._thread = None
+        listener.start()
+
+
+def stop_logging():
+    """Flush whatever is still queued. Safe to call more than once."""
+    if listener and listener._thread is not None:
+        listener.stop()
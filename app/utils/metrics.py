@@ -0,0 +1,135 @@
+import os
+import time
+import functools
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import multiprocess
+from app.utils.server_timing import record_phase
+
+# Cache and upstream metrics are labelled by provider rather than API version
+PROVIDERS = {"v1": "open_xr", "v2": "xe"}
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent serving a request, per route.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+CACHE_EVENTS = Counter(
+    "rate_cache_events_total",
+    "Cache lookups by provider, entry kind (rate, table, document, snapshot) and result (hit, stale, miss, negative or bypass).",
+    ["provider", "kind", "result"]
+)
+
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Time spent on upstream provider calls.",
+    ["provider"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+UPSTREAM_RESPONSES = Counter(
+    "upstream_responses_total",
+    "Upstream provider responses by status code, or 'error' when no response arrived.",
+    ["provider", "status"]
+)
+
+REDIS_LATENCY = Histogram(
+    "redis_command_duration_seconds",
+    "Time spent on RedisClient calls.",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+)
+
+REDIS_ERRORS = Counter(
+    "redis_errors_total",
+    "RedisClient calls that raised.",
+    ["command"]
+)
+
+PROVIDER_HEDGES = Counter(
+    "provider_hedged_requests_total",
+    "Lookups sent to a second provider because the first was slow or failing.",
+    ["provider", "fallback"]
+)
+
+PROVIDER_REJECTIONS = Counter(
+    "provider_circuit_rejections_total",
+    "Calls refused because the provider's circuit breaker was open.",
+    ["provider"]
+)
+
+PROVIDER_CIRCUIT_OPENED = Counter(
+    "provider_circuit_opened_total",
+    "Times a provider's circuit breaker opened.",
+    ["provider"]
+)
+
+STREAM_CONNECTIONS = Gauge(
+    "rate_stream_connections",
+    "Open rate-streaming connections.",
+    multiprocess_mode="livesum"
+)
+
+STREAM_EVENTS = Counter(
+    "rate_stream_events_total",
+    "Rate updates pushed to streaming clients.",
+    ["provider"]
+)
+
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by the rate limiter, per route.",
+    ["route"]
+)
+
+
+def record_cache(version, kind, result, count=1):
+    if count:
+        CACHE_EVENTS.labels(PROVIDERS.get(version, version), kind, result).inc(count)
+
+
+def record_upstream(provider, status, seconds):
+    UPSTREAM_LATENCY.labels(provider).observe(seconds)
+    UPSTREAM_RESPONSES.labels(provider, str(status)).inc()
+    record_phase("upstream", seconds)
+
+
+def observe_redis(method):
+    """
+    Time a RedisClient method and count its failures, labelled by method name. The time
+    is also charged to the current request's `cache` phase.
+    """
+
+    latency = REDIS_LATENCY.labels(method.__name__)
+    errors = REDIS_ERRORS.labels(method.__name__)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            latency.observe(elapsed)
+            record_phase("cache", elapsed)
+
+    return wrapper
+
+
+def render_metrics():
+    """
+    The Prometheus text exposition. With PROMETHEUS_MULTIPROC_DIR set, every gunicorn
+    worker writes to its own files there and this merges them, whichever worker answers.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        from prometheus_client import REGISTRY as registry
+
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,47 @@
+import os
+import weakref
+import threading
+
+# Every live ProcessLocal, reset in the child after a fork. Weak, so instances are not kept alive.
+instances = weakref.WeakSet()
+
+
+def reset_all():
+    for instance in list(instances):
+        instance.reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_all)
+
+
+class ProcessLocal:
+    """
+    Lazily builds one object per process. After a fork (e.g. gunicorn workers
+    spawned from a preloaded master) the child gets a fresh instance instead of
+    sharing sockets or threads that belong to the parent.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._pid = None
+        self._value = None
+        instances.add(self)
+
+    def get(self):
+        pid = os.getpid()
+
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._value = self.factory()
+                    self._pid = pid
+
+        return self._value
+
+    def reset(self):
+        """Drop the current instance so the next `get` rebuilds it."""
+        self._lock = threading.Lock()
+        self._pid = None
+        self._value = None
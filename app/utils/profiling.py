@@ -0,0 +1,210 @@
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import random
+import hashlib
+import cProfile
+import datetime
+import functools
+import threading
+import itertools
+from collections import Counter
+from app.config import logging, Config
+
+# Python 3.12 allows one cProfile profiler per interpreter, so that mode profiles one request at a time
+cprofile_lock = threading.Lock()
+sequence = itertools.count()
+
+
+def sign_token(secret, expires):
+    """A profiling token, `expires.signature`, valid until `expires` (epoch seconds)."""
+    expires = str(int(expires))
+    return f"{expires}.{hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()}"
+
+
+def verify_token(secret, token, now=None):
+    if not secret or not token or "." not in token:
+        return False
+
+    expires = token.split(".", 1)[0]
+
+    if not expires.isdigit() or int(expires) < (now or time.time()):
+        return False
+
+    return hmac.compare_digest(sign_token(secret, expires), token)
+
+
+@functools.lru_cache(maxsize=4096)
+def short_path(filename):
+    """A source path relative to the sys.path entry it was imported from."""
+
+    for prefix in sorted(filter(None, sys.path), key=len, reverse=True):
+        if filename.startswith(prefix.rstrip(os.sep) + os.sep):
+            return filename[len(prefix.rstrip(os.sep)) + 1:]
+
+    return filename
+
+
+def collapse_stack(frame):
+    """One stack in collapsed (folded) form: outermost frame first, separated by `;`."""
+
+    names = []
+
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{getattr(code, 'co_qualname', code.co_name)} ({short_path(code.co_filename)})")
+        frame = frame.f_back
+
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """
+    Records one thread's stack every `interval` seconds from a helper thread. The
+    profiled code runs untouched; the cost is one stack walk per sample.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+
+class RequestProfile:
+    """
+    Profiles the calling thread for one request. `sample` mode writes collapsed stacks
+    (`.folded`, for flamegraph.pl or speedscope); `cprofile` mode writes a pstats dump
+    (`.prof`). Either way a `.json` summary holds the request and its phase timings.
+    """
+
+    def __init__(self, mode, reason):
+        self.mode = mode
+        self.reason = reason
+        self.started_at = time.time()
+        self.sampler = None
+        self.profiler = None
+        self.stopped = False
+
+    def start(self):
+        if self.mode == "cprofile":
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self.sampler = StackSampler(threading.get_ident(), Config.PROFILE_INTERVAL_MS / 1000)
+            self.sampler.start()
+
+        return self
+
+    def stop(self):
+        if self.stopped:
+            return
+
+        self.stopped = True
+
+        if self.profiler:
+            self.profiler.disable()
+            cprofile_lock.release()
+
+        if self.sampler:
+            self.sampler.stop()
+
+    def write(self, details, directory=None):
+        """Write the profile and its summary, returning their path without the extension."""
+
+        directory = directory or Config.PROFILE_DIR
+        started = datetime.datetime.fromtimestamp(self.started_at, datetime.timezone.utc)
+        route = re.sub(r"[^A-Za-z0-9]+", "_", details.get("route", "")).strip("_") or "root"
+        path = os.path.join(directory, f"{started.strftime('%Y%m%dT%H%M%S.%f')}-{os.getpid()}-{next(sequence)}-{route}")
+
+        os.makedirs(directory, exist_ok=True)
+
+        summary = {
+            **details,
+            "started_at": started.isoformat(timespec="milliseconds"),
+            "pid": os.getpid(),
+            "mode": self.mode,
+            "reason": self.reason
+        }
+
+        if self.profiler:
+            self.profiler.dump_stats(path + ".prof")
+        else:
+            summary["samples"] = sum(self.sampler.stacks.values())
+            summary["interval_ms"] = Config.PROFILE_INTERVAL_MS
+
+            with open(path + ".folded", "w") as handle:
+                handle.writelines(f"{stack} {count}\n" for stack, count in self.sampler.stacks.most_common())
+
+        with open(path + ".json", "w") as handle:
+            json.dump(summary, handle, indent=2)
+
+        prune(directory, Config.PROFILE_MAX_FILES)
+        return path
+
+
+def profile_reason(token):
+    """Why this request should be profiled, or None: a valid signed token, or the sample rate."""
+
+    if token and verify_token(Config.PROFILE_SECRET, token):
+        return "token"
+
+    if Config.PROFILE_SAMPLE_RATE and random.random() < Config.PROFILE_SAMPLE_RATE:
+        return "sampled"
+
+    return None
+
+
+def start_profile(token=None):
+    reason = profile_reason(token)
+
+    if not reason:
+        return None
+
+    mode = "cprofile" if Config.PROFILE_MODE == "cprofile" else "sample"
+
+    if mode == "cprofile" and not cprofile_lock.acquire(blocking=False):
+        logging.debug("Another request is being profiled, skipping this one.")
+        return None
+
+    return RequestProfile(mode, reason).start()
+
+
+def prune(directory, keep):
+    """Delete the oldest profiles so at most `keep` remain. Names sort by start time."""
+
+    summaries = sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+
+    for name in summaries[:max(len(summaries) - keep, 0)]:
+        for suffix in (".json", ".folded", ".prof"):
+            try:
+                os.remove(os.path.join(directory, name[:-len(".json")] + suffix))
+            except FileNotFoundError:
+                pass
+
+
+if __name__ == "__main__":
+    # Print a profiling token: python -m app.utils.profiling [seconds valid, default 300]
+    if not Config.PROFILE_SECRET:
+        sys.exit("PROFILE_SECRET is not set.")
+
+    print(sign_token(Config.PROFILE_SECRET, time.time() + (int(sys.argv[1]) if len(sys.argv) > 1 else 300)))
@@ -1,37 +1,165 @@
+import uuid
+import math
+import threading
 from time import time
+from collections import OrderedDict, namedtuple
+from redis.exceptions import RedisError
+from app.config import logging, Config
+
+RateLimitResult = namedtuple("RateLimitResult", ["allowed", "limit", "remaining", "reset"])
+
+# Sliding-window log kept in one sorted set per client. Trims expired hits, counts,
+# records the hit if allowed and returns {allowed, remaining, ms until a slot frees up},
+# all in a single atomic round trip. Redis TIME keeps every dyno on the same clock.
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+local count = redis.call('ZCARD', key)
+local allowed = 0
+
+if count < limit then
+    redis.call('ZADD', key, now, ARGV[3])
+    count = count + 1
+    allowed = 1
+end
+
+redis.call('PEXPIRE', key, window)
+
+local reset = window
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+if oldest[2] then
+    reset = tonumber(oldest[2]) + window - now
+end
+
+return {allowed, limit - count, reset}
+"""
+
+
+def parse_limit(value):
+    """Parse a `requests/seconds` limit such as `60/3600`."""
+    limit, window = value.split("/")
+    return int(limit), int(window)
+
+
+def parse_limit_map(value):
+    """Parse `name=60/3600,other=10/60` into {name: (60, 3600), other: (10, 60)}."""
+    limits = {}
+
+    for item in filter(None, (part.strip() for part in (value or "").split(","))):
+        name, limit = item.rsplit("=", 1)
+        limits[name.strip()] = parse_limit(limit)
+
+    return limits
+
+
+class LocalRateLimiter:
+    """Per-process fixed-window limiter with a bounded, LRU-evicted client table."""
+
+    def __init__(self, max_keys=None):
+        self.max_keys = max_keys or Config.RATE_LIMIT_LOCAL_MAX_KEYS
+        self.requests = OrderedDict()
+        self.lock = threading.Lock()
+
+    def hit(self, key, limit, window):
+        with self.lock:
+            return self._hit(key, limit, window)
+
+    def _hit(self, key, limit, window):
+        current_time = time()
+        requests_info = self.requests.get(key)
+
+        # Start a new window for unknown clients or once the current window has passed
+        if requests_info is None or current_time - requests_info['time'] > window:
+            requests_info = {'count': 0, 'time': current_time}
+            self.requests[key] = requests_info
+
+        self.requests.move_to_end(key)
+
+        while len(self.requests) > self.max_keys:
+            self.requests.popitem(last=False)
+
+        allowed = requests_info['count'] < limit
+        if allowed:
+            requests_info['count'] += 1
+
+        reset = math.ceil(requests_info['time'] + window - current_time)
+        return RateLimitResult(allowed, limit, limit - requests_info['count'], reset)
+
 
 class RateLimiter:
-    def __init__(self):
-        self.requests = {}
-        self.limit = 60  # 60 requests per hour
-        self.reset_time = 3600  # 1 hour in seconds
+    """
+    Distributed sliding-window limiter: one Lua script call per request shared by every
+    worker and dyno. Falls back to a bounded per-process limiter while Redis is unreachable.
+    """
+
+    def __init__(self, redis_client=None, fallback=None):
+        self.redis_client = redis_client
+        self.fallback = fallback or LocalRateLimiter()
+        self.script = redis_client.register_script(SLIDING_WINDOW_SCRIPT) if redis_client else None
+        self.redis_retry_at = 0
+
+        self.default_limit = parse_limit(Config.RATE_LIMIT_DEFAULT)
+        self.route_limits = parse_limit_map(Config.RATE_LIMIT_ROUTES)
+        self.route_prefixes = sorted(self.route_limits, key=len, reverse=True)
+        self.api_key_limits = parse_limit_map(Config.RATE_LIMIT_API_KEYS)
+
+    def resolve(self, ip, path, api_key=None):
+        """Pick the (bucket key, limit, window) for a request: API key first, then route, then default."""
+
+        scope = next((prefix for prefix in self.route_prefixes if path.startswith(prefix)), "default")
+        limit, window = self.route_limits.get(scope, self.default_limit)
+
+        if api_key and api_key in self.api_key_limits:
+            limit, window = self.api_key_limits[api_key]
+            return f"ratelimit:{scope}:key:{api_key}", limit, window
+
+        return f"ratelimit:{scope}:ip:{ip}", limit, window
+
+    def hit(self, key, limit, window):
+        if self.script and time() >= self.redis_retry_at:
+            try:
+                return self.to_result(self.script(keys=[key], args=self.script_args(limit, window)), limit)
+
+            except RedisError as err:
+                self.on_redis_error(err)
+
+        return self.fallback.hit(key, limit, window)
+
+    def script_args(self, limit, window):
+        return [limit, window * 1000, uuid.uuid4().hex]
+
+    def to_result(self, script_result, limit):
+        allowed, remaining, reset_ms = script_result
+        return RateLimitResult(bool(allowed), limit, max(int(remaining), 0), math.ceil(int(reset_ms) / 1000))
+
+    def on_redis_error(self, err):
+        # Skip Redis for a few seconds instead of paying a timeout on every request
+        logging.warning("Redis rate limiter unavailable, using local fallback: %s", err)
+        self.redis_retry_at = time() + Config.RATE_LIMIT_REDIS_RETRY_SECONDS
 
     def is_rate_limited(self, ip):
-        current_time = time()
-        # Check if IP exists and handle the rate limit logic
-        if not self.is_ip_exist(ip):
-            # IP does not exist, so initialize it
-            self.requests[ip] = {'count': 1, 'time': current_time}
-            return False  # Not rate-limited because it's the first request
-
-        # If IP exists, retrieve its request info
-        requests_info = self.requests[ip]
-
-        # Check if the record is older than reset_time and reset if necessary
-        if current_time - requests_info['time'] > self.reset_time:
-            # Reset count and time for a new period
-            requests_info['count'] = 1
-            requests_info['time'] = current_time
-            return False  # Not rate-limited because we just reset the counter
-        else:
-            if requests_info['count'] < self.limit:
-                # Increment the request count since it's within the limit
-                requests_info['count'] += 1
-                return False  # Not rate-limited, under the request limit
-            else:
-                # The request count is equal to or exceeds the limit
-                return True  # Rate-limited
-
-    def is_ip_exist(self, ip):
-        # Check if the IP already exists in the requests dictionary
-        return ip in self.requests
\ No newline at end of file
+        limit, window = self.default_limit
+        return not self.hit(f"ratelimit:default:ip:{ip}", limit, window).allowed
+
+
+class AsyncRateLimiter(RateLimiter):
+    """RateLimiter for the ASGI path: same limits and script, awaited on redis.asyncio."""
+
+    async def hit(self, key, limit, window):
+        if self.script and time() >= self.redis_retry_at:
+            try:
+                return self.to_result(await self.script(keys=[key], args=self.script_args(limit, window)), limit)
+
+            except RedisError as err:
+                self.on_redis_error(err)
+
+        return self.fallback.hit(key, limit, window)
+
+    async def is_rate_limited(self, ip):
+        limit, window = self.default_limit
+        return not (await self.hit(f"ratelimit:default:ip:{ip}", limit, window)).allowed
@@ -0,0 +1,85 @@
+import time
+import contextvars
+from contextlib import contextmanager
+
+# The timings of the request being served, if any. Background threads start with an
+# empty context, so refreshes and prefetches are never charged to a request.
+current_timings = contextvars.ContextVar("current_timings", default=None)
+
+
+class PhaseTimings:
+    """
+    Where one request's time went: rate limit, cache (Redis), upstream and serialization.
+    Redis and upstream calls report themselves through `record_phase`; explicit phases
+    wrap a block in `timed_phase`, and calls made inside one count only towards it.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.active = None
+
+    def add(self, phase, seconds):
+        total, count = self.phases.get(phase, (0.0, 0))
+        self.phases[phase] = (total + seconds, count + 1)
+
+    def summary(self, ended=None):
+        """Milliseconds and call count per phase, plus `app` for the rest and `total`."""
+
+        total = (ended or time.perf_counter()) - self.started
+        phases = {phase: {"ms": round(seconds * 1000, 3), "count": count} for phase, (seconds, count) in self.phases.items()}
+        accounted = sum(seconds for seconds, _ in self.phases.values())
+
+        phases["app"] = {"ms": round(max(total - accounted, 0.0) * 1000, 3), "count": 1}
+        phases["total"] = {"ms": round(total * 1000, 3), "count": 1}
+        return phases
+
+    def header(self, ended=None):
+        """The `Server-Timing` header value for these timings."""
+
+        entries = []
+
+        for phase, timing in self.summary(ended).items():
+            entry = f"{phase};dur={timing['ms']}"
+
+            if phase not in ("app", "total"):
+                entry += f';desc="{timing["count"]} call{"" if timing["count"] == 1 else "s"}"'
+
+            entries.append(entry)
+
+        return ", ".join(entries)
+
+
+def start_timings():
+    timings = PhaseTimings()
+    current_timings.set(timings)
+    return timings
+
+
+def stop_timings():
+    current_timings.set(None)
+
+
+def record_phase(phase, seconds):
+    timings = current_timings.get()
+
+    if timings is not None and timings.active is None:
+        timings.add(phase, seconds)
+
+
+@contextmanager
+def timed_phase(phase):
+    timings = current_timings.get()
+
+    if timings is None or timings.active is not None:
+        yield
+        return
+
+    timings.active = phase
+    started = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        timings.active = None
+        timings.add(phase, time.perf_counter() - started)
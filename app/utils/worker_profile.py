@@ -0,0 +1,34 @@
+from app.config import logging, Config
+
+
+def reset_after_fork(app):
+    """
+    Give a worker forked from a preloaded master its own connections. Sockets opened
+    in the master would otherwise be shared by every worker.
+    """
+    app.redis_client.reconnect()
+    app.currency_service.reset_connections()
+
+
+def start_background_threads(app):
+    """Start the enabled background threads in a booted worker. create_app() starts none."""
+
+    if Config.PREFETCH_ENABLED:
+        app.prefetch_scheduler.start()
+
+    if Config.CURRENCY_INDEX_ENABLED:
+        app.currency_service.currency_index.start()
+
+    if Config.ADAPTIVE_TTL_ENABLED:
+        app.quota_monitor.start()
+
+    if Config.SNAPSHOT_ENABLED:
+        app.snapshot_refresher.start()
+
+
+def flush_before_exit(app):
+    """Push counters still held in worker memory to Redis before a recycled worker exits."""
+    try:
+        app.currency_service.hot_pairs.flush()
+    except Exception as err:
+        logging.warning("Could not flush hot pairs on worker exit: %s", err)
@@ -0,0 +1,67 @@
+"""
+Compare two benchmark result files, e.g. from the base branch and from a change.
+
+    python -m benchmarks.compare base.json head.json --max-regression 10
+
+Prints the p50/p95/p99 and throughput change for every scenario and endpoint found in
+both files. Exits with status 1 when any p95 grew by more than --max-regression percent.
+"""
+import sys
+import json
+import argparse
+
+METRICS = ["p50_ms", "p95_ms", "p99_ms", "throughput_rps"]
+
+
+def change(before, after):
+    if not before:
+        return None
+
+    return round((after - before) / before * 100, 1)
+
+
+def compare(base, head):
+    """Yield (scenario, endpoint, {metric: (base, head, % change)}) for every shared result."""
+
+    for scenario, endpoints in head["scenarios"].items():
+        for endpoint, result in endpoints.items():
+            baseline = base["scenarios"].get(scenario, {}).get(endpoint)
+
+            if baseline:
+                yield scenario, endpoint, {metric: (baseline[metric], result[metric], change(baseline[metric], result[metric])) for metric in METRICS}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--max-regression", type=float, default=None, help="Fail if any p95 grew by more than this percentage.")
+    args = parser.parse_args(argv)
+
+    with open(args.base) as handle:
+        base = json.load(handle)
+
+    with open(args.head) as handle:
+        head = json.load(handle)
+
+    print(f"base {base.get('commit')} -> head {head.get('commit')}")
+    regressions = []
+
+    for scenario, endpoint, metrics in compare(base, head):
+        cells = "  ".join(f"{metric} {before} -> {after} ({delta:+}%)" if delta is not None else f"{metric} {before} -> {after}" for metric, (before, after, delta) in metrics.items())
+        print(f"{scenario:<6} {endpoint:<20} {cells}")
+
+        p95_change = metrics["p95_ms"][2]
+
+        if args.max_regression is not None and p95_change is not None and p95_change > args.max_regression:
+            regressions.append(f"{scenario} {endpoint}")
+
+    if regressions:
+        print(f"p95 regressed by more than {args.max_regression}% in: {', '.join(regressions)}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Load and latency benchmarks for the Flask app against local upstream stand-ins.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --scenario warm --requests 2000 --concurrency 32 --latency-ms 80
+
+Open Exchange Rates and XE are replaced by a local stub server with configurable
+latency and error rate. Redis is an in-memory stand-in unless --redis-url is given.
+Each scenario reports throughput and p50/p95/p99 latency per endpoint as JSON, so
+runs from different commits can be compared with benchmarks.compare.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import random
+import string
+import argparse
+import platform
+import threading
+import subprocess
+from itertools import product
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+from tests.stub_upstream import StubUpstream
+
+SCENARIOS = ["cold", "warm", "mixed", "burst"]
+ENDPOINTS = ["/api/conversion", "/api/v2/conversion", "/api/v2/currencies"]
+
+# Keys our cache writes, cleared between scenarios when running against a real Redis
+CACHE_KEY_PATTERNS = ["v1_*", "v2_*", "lock_*", "history_*", "hot_pairs_*", "missing_*", "currency_index_*", "cached_pairs_*"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=SCENARIOS + ["all"], default="all")
+    parser.add_argument("--endpoint", choices=ENDPOINTS, action="append", help="Repeat to pick several. Defaults to all.")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint per scenario.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--burst-size", type=int, default=64, help="Simultaneous requests for one uncached key in the burst scenario.")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Stub upstream latency.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stub upstream calls that fail with 503.")
+    parser.add_argument("--currencies", type=int, default=200, help="Currencies the stub quotes; pairs are drawn from these.")
+    parser.add_argument("--redis-url", help="Use this Redis instead of the in-memory stand-in. Our cache keys in it are deleted between scenarios.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout.")
+    return parser.parse_args(argv)
+
+
+def currency_codes(count):
+    codes = ("".join(letters) for letters in product(string.ascii_uppercase, repeat=3))
+    return [code for code in codes if code != "USD"][:count]
+
+
+def configure_environment(args, stub):
+    """Point the app at the stubs before it is imported; Config reads the environment once."""
+
+    defaults = {
+        "APP_NAME": "currency-benchmark",
+        "APP_HOST": "127.0.0.1",
+        "APP_PORT": "0",
+        "REDISCLOUD_URL": args.redis_url or "redis://127.0.0.1:6379/15",
+        "OPEN_XR_APP_ID": "benchmark",
+        "XECD_API_ID": "benchmark",
+        "XECD_API_KEY": "benchmark"
+    }
+
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+
+    os.environ.update({
+        "OPEN_XR_BASE_URL": f"{stub.url}/latest.json",
+        "XECD_BASE_URL": stub.url,
+        "RATE_LIMIT_DEFAULT": "1000000000/1",
+        "LOCAL_CACHE_ENABLED": "true" if args.redis_url else "false",
+        "PREFETCH_ENABLED": "false",
+        "LOG_LEVEL": "WARNING"
+    })
+
+
+class Target:
+    """The app under test, served by a threaded werkzeug server on an ephemeral port."""
+
+    def __init__(self, use_redis):
+        from werkzeug.serving import make_server
+        from app import create_app
+        from app.controllers import currency_controller
+
+        app = create_app()
+        self.app = app
+        self.controller = currency_controller
+        self.use_redis = use_redis
+
+        if not use_redis:
+            # Keep the rate limiter off the network as well
+            app.rate_limiter.script = None
+
+        # One access-log line per request would dominate what we measure
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+        self.reset()
+        self.server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def reset(self):
+        """Start a scenario with empty caches."""
+
+        from app.services.currency_service import CurrencyService
+        from app.utils.http_caching import ResponseCache
+
+        if self.use_redis:
+            redis_client = self.app.redis_client
+            raw = getattr(redis_client, "redis_client", redis_client)
+
+            for pattern in CACHE_KEY_PATTERNS:
+                for key in raw.client.scan_iter(match=pattern, count=1000):
+                    raw.client.delete(key)
+
+            if hasattr(redis_client, "local_cache"):
+                redis_client.local_cache.clear()
+        else:
+            from tests.fakes import FakeRedisClient
+            redis_client = FakeRedisClient()
+
+        self.app.currency_service = CurrencyService(redis_client)
+        self.controller.response_cache = ResponseCache()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+def endpoint_query(endpoint, key):
+    if endpoint == "/api/v2/currencies":
+        return {"iso": ",".join(key)}
+
+    return {"from": key[0], "to": key[1]}
+
+
+def percentile(sorted_samples, quantile):
+    if not sorted_samples:
+        return None
+
+    index = min(len(sorted_samples) - 1, int(round(quantile * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def drive(url, endpoint, keys, concurrency):
+    """Send one request per key with `concurrency` client threads; returns the summary."""
+
+    local = threading.local()
+
+    def send(key):
+        session = getattr(local, "session", None) or requests.Session()
+        local.session = session
+
+        started = time.perf_counter()
+
+        try:
+            response = session.get(url + endpoint, params=endpoint_query(endpoint, key), timeout=30)
+            ok = response.status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(send, keys))
+
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for latency, _ in outcomes)
+
+    return {
+        "requests": len(outcomes),
+        "errors": sum(1 for _, ok in outcomes if not ok),
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(len(outcomes) / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3)
+    }
+
+
+def scenario_keys(scenario, args, codes, rng):
+    """
+    The request keys for a scenario: (from, to) pairs, or currency lists for /currencies.
+      cold  - every request is for a key nothing has cached yet
+      warm  - a handful of keys, cached before measuring
+      mixed - Zipf-distributed popularity over many keys, starting empty
+      burst - one uncached key requested by --burst-size clients at once
+    """
+    pairs = [(a, b) for a, b in product(codes, repeat=2) if a != b]
+    rng.shuffle(pairs)
+
+    if scenario == "cold":
+        return pairs[:args.requests], []
+
+    if scenario == "warm":
+        hot = pairs[:10]
+        return [hot[i % len(hot)] for i in range(args.requests)], hot
+
+    if scenario == "mixed":
+        population = pairs[:500]
+        weights = [1 / (rank + 1) for rank in range(len(population))]
+        return rng.choices(population, weights=weights, k=args.requests), []
+
+    return [pairs[0]] * args.burst_size, []
+
+
+def run_scenario(scenario, args, target, stub, codes):
+    results = {}
+
+    for endpoint in args.endpoint or ENDPOINTS:
+        target.reset()
+        rng = random.Random(f"{args.seed}:{scenario}:{endpoint}")
+        keys, warmup = scenario_keys(scenario, args, codes, rng)
+
+        if warmup:
+            drive(target.url, endpoint, warmup, 1)
+
+        calls_before = len(stub.calls)
+        concurrency = args.burst_size if scenario == "burst" else args.concurrency
+
+        summary = drive(target.url, endpoint, keys, concurrency)
+        summary["upstream_calls"] = len(stub.calls) - calls_before
+        results[endpoint] = summary
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    codes = currency_codes(args.currencies)
+
+    rng = random.Random(args.seed)
+    stub = StubUpstream(latency=args.latency_ms / 1000, error_rate=args.error_rate, rates={code: round(rng.uniform(0.01, 2000), 6) for code in codes}).start()
+
+    configure_environment(args, stub)
+    target = Target(use_redis=bool(args.redis_url))
+
+    scenarios = SCENARIOS if args.scenario == "all" else [args.scenario]
+
+    try:
+        report = {
+            "commit": git_commit(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "config": {key: value for key, value in vars(args).items() if key != "output"},
+            "scenarios": {scenario: run_scenario(scenario, args, target, stub, codes) for scenario in scenarios}
+        }
+    finally:
+        target.stop()
+        stub.stop()
+
+    output = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Cold-start benchmark: time from spawning a fresh interpreter to the app's first response.
+
+    python -m benchmarks.startup --runs 20 --output startup.json
+    python -m benchmarks.startup --budget-ms 800
+
+Each run starts a new Python process that imports the package, calls create_app() and
+serves one request through the test client, the same work a freshly scaled dyno does
+before it can answer. The report splits that time into interpreter start-up, package
+import, create_app() and the first request, with p50/min/max across runs. With
+--budget-ms the command fails when the p50 total goes over budget, so CI can hold it.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+
+from benchmarks.run import git_commit
+
+PHASES = ["interpreter_ms", "import_ms", "create_app_ms", "first_response_ms", "total_ms"]
+
+# Runs in the child; timestamps are wall-clock so they line up with the parent's spawn time
+CHILD = """
+import os, sys, json, time
+started = time.time()
+import app
+imported = time.time()
+application = app.create_app()
+created = time.time()
+if not os.environ.get("STARTUP_USE_REDIS"):
+    application.rate_limiter.script = None
+response = application.test_client().get(sys.argv[1])
+answered = time.time()
+spawned = float(os.environ["STARTUP_SPAWNED_AT"])
+print(json.dumps({
+    "status": response.status_code,
+    "interpreter_ms": (started - spawned) * 1000,
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_response_ms": (answered - created) * 1000,
+    "total_ms": (answered - spawned) * 1000
+}))
+"""
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--path", default="/api", help="Request served as the first response.")
+    parser.add_argument("--redis-url", help="Use this Redis for the rate limiter instead of skipping it.")
+    parser.add_argument("--budget-ms", type=float, help="Fail when the p50 total exceeds this many milliseconds.")
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout.")
+    return parser.parse_args(argv)
+
+
+def child_environment(args):
+    env = dict(os.environ)
+
+    defaults = {
+        "APP_NAME": "currency-startup-benchmark",
+        "APP_HOST": "127.0.0.1",
+        "APP_PORT": "0",
+        "OPEN_XR_APP_ID": "benchmark",
+        "OPEN_XR_BASE_URL": "http://127.0.0.1:9/latest.json",
+        "XECD_API_ID": "benchmark",
+        "XECD_API_KEY": "benchmark",
+        "XECD_BASE_URL": "http://127.0.0.1:9"
+    }
+
+    for name, value in defaults.items():
+        env.setdefault(name, value)
+
+    env.update({
+        "REDISCLOUD_URL": args.redis_url or env.get("REDISCLOUD_URL") or "redis://127.0.0.1:6379/15",
+        "LOCAL_CACHE_ENABLED": "false",
+        "PREFETCH_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+        "PYTHONDONTWRITEBYTECODE": "1"
+    })
+
+    if args.redis_url:
+        env["STARTUP_USE_REDIS"] = "1"
+
+    return env
+
+
+def measure(args, env):
+    env["STARTUP_SPAWNED_AT"] = repr(time.time())
+    completed = subprocess.run([sys.executable, "-c", CHILD, args.path], env=env, capture_output=True, text=True, check=True)
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    if result["status"] >= 400:
+        raise RuntimeError(f"First response to {args.path} was {result['status']}.")
+
+    return result
+
+
+def summarize(runs):
+    return {
+        phase: {
+            "p50": round(statistics.median(run[phase] for run in runs), 1),
+            "min": round(min(run[phase] for run in runs), 1),
+            "max": round(max(run[phase] for run in runs), 1)
+        }
+        for phase in PHASES
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    env = child_environment(args)
+    runs = [measure(args, env) for _ in range(args.runs)]
+
+    report = {
+        "commit": git_commit(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "startup": summarize(runs)
+    }
+
+    output = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+
+    total = report["startup"]["total_ms"]["p50"]
+
+    if args.budget_ms is not None and total > args.budget_ms:
+        print(f"Cold start p50 {total:.0f} ms is over the {args.budget_ms:.0f} ms budget.", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
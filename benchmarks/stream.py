@@ -0,0 +1,208 @@
+"""
+Rate streaming benchmark: connection count and message throughput for the SSE endpoint.
+
+    python -m benchmarks.stream --clients 200 --pairs-per-client 5 --rounds 50
+    python -m benchmarks.stream --redis-url redis://127.0.0.1:6379/15 --output stream.json
+
+--clients EventSource-style clients each watch --pairs-per-client pairs drawn from a
+shared pool. Once all of them hold their initial rates, the benchmark stores --rounds
+new rates for every pool pair through CurrencyService.store_rates, the same path an
+upstream refresh takes, and every change should reach each client watching that pair.
+The report gives time to connect (first byte to the last initial rate), deliveries per
+second, how many updates were coalesced or lost, and publish-to-receive latency.
+
+Without --redis-url the in-memory stand-in delivers published messages synchronously,
+so latency there is the app's own queueing and serving cost; with a real Redis it also
+includes the pub/sub round trip.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import threading
+import requests
+
+from tests.stub_upstream import StubUpstream
+from benchmarks.run import configure_environment, currency_codes, percentile, git_commit, Target
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--pairs-per-client", type=int, default=5)
+    parser.add_argument("--pool", type=int, default=50, help="Distinct pairs the clients choose from.")
+    parser.add_argument("--rounds", type=int, default=20, help="Times every pool pair gets a new rate.")
+    parser.add_argument("--interval-ms", type=float, default=100.0, help="Pause between rounds.")
+    parser.add_argument("--redis-url", help="Use this Redis (and its pub/sub) instead of the in-memory stand-in.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout.")
+    return parser.parse_args(argv)
+
+
+class StreamClient(threading.Thread):
+    """One streaming connection, recording when its initial rates and each update arrive."""
+
+    def __init__(self, url, pairs, connected, stopping):
+        super().__init__(daemon=True)
+        self.url = url
+        self.pairs = pairs
+        self.connected = connected
+        self.stopping = stopping
+        self.connect_s = None
+        self.latencies = []
+        self.error = None
+
+    def run(self):
+        started = time.perf_counter()
+        initial = 0
+        event = None
+
+        try:
+            response = requests.get(self.url, params={"pairs": ",".join(f"{f}_{t}" for f, t in self.pairs)}, stream=True, timeout=30)
+            response.raise_for_status()
+
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if self.stopping.is_set():
+                    break
+
+                if line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data: ") and event == "rate":
+                    data = json.loads(line[6:])
+
+                    if initial < len(self.pairs):
+                        initial += 1
+
+                        if initial == len(self.pairs):
+                            self.connect_s = time.perf_counter() - started
+                            self.connected.release()
+                    elif data.get("fetched_at"):
+                        self.latencies.append(time.time() - data["fetched_at"])
+
+            response.close()
+
+        except Exception as err:
+            self.error = str(err)
+
+            if self.connect_s is None:
+                self.connected.release()
+
+
+def publish_round(service, bases, round_number, rng):
+    for base, quotes in bases.items():
+        service.store_rates("v2", base, {quote: {'rate': round(rng.uniform(0.01, 2000), 6), 'timestamp': f"round-{round_number}"} for quote in quotes})
+
+
+def milliseconds(samples, quantile):
+    value = percentile(samples, quantile)
+    return round(value * 1000, 3) if value is not None else None
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+
+    codes = currency_codes(args.pool * 2)
+    pool = list(dict.fromkeys((rng.choice(codes[:10]), rng.choice(codes[10:])) for _ in range(args.pool * 4)))[:args.pool]
+    bases = {}
+
+    for from_currency, to_currency in pool:
+        bases.setdefault(from_currency, []).append(to_currency)
+
+    stub = StubUpstream().start()
+    configure_environment(args, stub)
+    os.environ.update({"RATE_STREAM_MAX_CONNECTIONS": str(args.clients), "RATE_STREAM_HEARTBEAT": "0.5"})
+
+    target = Target(use_redis=bool(args.redis_url))
+
+    if not args.redis_url:
+        from app.services.rate_stream import RateStreamBroker
+        target.app.rate_stream = RateStreamBroker(target.app.currency_service.redis_client)
+
+    service = target.app.currency_service
+
+    try:
+        # Cache a first rate for every pair so connecting never waits on the upstream stub
+        publish_round(service, bases, 0, rng)
+
+        connected = threading.Semaphore(0)
+        stopping = threading.Event()
+        clients = [StreamClient(f"{target.url}/api/v2/conversion/stream", rng.sample(pool, args.pairs_per_client), connected, stopping) for _ in range(args.clients)]
+
+        connect_started = time.perf_counter()
+
+        for client in clients:
+            client.start()
+
+        for _ in clients:
+            connected.acquire()
+
+        connect_elapsed = time.perf_counter() - connect_started
+        publish_started = time.perf_counter()
+
+        for round_number in range(1, args.rounds + 1):
+            publish_round(service, bases, round_number, rng)
+            time.sleep(args.interval_ms / 1000)
+
+        publish_elapsed = time.perf_counter() - publish_started
+        expected = args.rounds * sum(len(client.pairs) for client in clients if not client.error)
+
+        # Let the last round drain before closing the streams
+        drain_deadline = time.monotonic() + 5
+
+        while time.monotonic() < drain_deadline and sum(len(client.latencies) for client in clients) < expected:
+            time.sleep(0.05)
+
+        stopping.set()
+
+        for client in clients:
+            client.join(timeout=2)
+
+    finally:
+        target.stop()
+        stub.stop()
+
+    connects = sorted(client.connect_s for client in clients if client.connect_s is not None)
+    latencies = sorted(latency for client in clients for latency in client.latencies)
+    delivered = len(latencies)
+
+    report = {
+        "commit": git_commit(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "stream": {
+            "clients": args.clients,
+            "errors": sum(1 for client in clients if client.error),
+            "connect_all_s": round(connect_elapsed, 3),
+            "connect_p50_ms": milliseconds(connects, 0.50),
+            "connect_p95_ms": milliseconds(connects, 0.95),
+            "connect_max_ms": milliseconds(connects, 1.0),
+            "updates_published": args.rounds * len(pool),
+            "deliveries_expected": expected,
+            "deliveries": delivered,
+            "coalesced_or_lost": expected - delivered,
+            "deliveries_per_s": round(delivered / publish_elapsed, 1) if publish_elapsed else None,
+            "latency_p50_ms": milliseconds(latencies, 0.50),
+            "latency_p95_ms": milliseconds(latencies, 0.95),
+            "latency_p99_ms": milliseconds(latencies, 0.99),
+            "latency_max_ms": milliseconds(latencies, 1.0)
+        }
+    }
+
+    output = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
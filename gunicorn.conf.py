@@ -0,0 +1,110 @@
+import os
+from dotenv import load_dotenv
+
+# Production server profile, picked up by `gunicorn run:app` from the working directory.
+# Settings are read straight from the environment: importing the app package here would
+# load it in the master even when GUNICORN_PRELOAD is off.
+load_dotenv()
+
+WORKER_CLASSES = ("sync", "gthread", "gevent")
+
+# Threads per worker when GUNICORN_THREADS is unset; requests mostly wait on Redis and upstream APIs
+DEFAULT_THREADS = {"sync": 1, "gthread": 4, "gevent": 1}
+
+
+def cpu_count():
+    # Respect container CPU limits where the platform exposes them
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+
+    return os.cpu_count() or 1
+
+
+def default_workers(name, cpus):
+    """
+    Sync workers serve one request each, so they follow gunicorn's 2 x CPU + 1 rule.
+    Thread and greenlet workers get their concurrency inside the process.
+    """
+    if name == "sync":
+        return 2 * cpus + 1
+
+    if name == "gthread":
+        return cpus + 1
+
+    return cpus
+
+
+worker_class = (os.getenv("GUNICORN_WORKER_CLASS") or "gthread").lower()
+
+if worker_class not in WORKER_CLASSES:
+    raise ValueError(f"Unsupported gunicorn worker class: {worker_class}. Use one of {', '.join(WORKER_CLASSES)}.")
+
+preload_app = (os.getenv("GUNICORN_PRELOAD") or "true").lower() == "true"
+
+if worker_class == "gevent" and preload_app:
+    # The app is imported before the workers patch the stdlib, so patch the master first
+    from gevent import monkey
+    monkey.patch_all()
+
+# WEB_CONCURRENCY is set by Heroku from the dyno size; 0 or unset sizes from the CPU count
+workers = int(os.getenv("WEB_CONCURRENCY") or 0) or default_workers(worker_class, cpu_count())
+threads = int(os.getenv("GUNICORN_THREADS") or 0) or DEFAULT_THREADS[worker_class]
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS") or 1000)
+
+# Recycle workers after a jittered number of requests so slow leaks never pile up, and not all at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS") or 10000)
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER") or 1000)
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT") or 30)
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT") or 30)
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE") or 5)
+
+
+def on_starting(server):
+    # Metric files left by a previous master would be merged into this one's totals
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+    if directory and os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith(".db"):
+                os.remove(os.path.join(directory, name))
+
+    server.log.info("Starting %d %s workers (%d threads, preload=%s).", workers, worker_class, threads, preload_app)
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+
+    from app.utils.worker_profile import reset_after_fork
+
+    reset_after_fork(server.app.wsgi())
+
+
+def post_worker_init(worker):
+    # The master never runs the background threads; each worker starts its own once the app is loaded
+    from app.utils.worker_profile import start_background_threads
+
+    start_background_threads(worker.wsgi)
+
+
+def on_reload(server):
+    # HUP replaces workers gracefully, but forks them from the already-loaded app
+    if server.cfg.preload_app:
+        server.log.warning("Preloaded app code is not reloaded on HUP; send USR2 to start a new master with the new code.")
+
+
+def worker_exit(server, worker):
+    application = getattr(worker, "wsgi", None)
+
+    if application is not None:
+        from app.utils.worker_profile import flush_before_exit
+
+        flush_before_exit(application)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
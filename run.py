@@ -1,5 +1,7 @@
-from app import app
+from app import create_app
 from app.config import Config
 
+app = create_app()
+
 if __name__ == "__main__":
     app.run(host=Config.APP_HOST, port=Config.APP_PORT, debug=True)
\ No newline at end of file
@@ -0,0 +1,195 @@
+import time
+import threading
+
+
+class FakeRedisClient:
+    """Thread-safe in-memory stand-in for app.cache.redis_client.RedisClient."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.store = {}
+        self.published = []
+        self.subscribers = {}
+        self.sorted_sets = {}
+        self.sets = {}
+        self.degraded = False
+
+    def _get(self, key):
+        value, expires_at = self.store.get(key, (None, None))
+
+        if expires_at is not None and expires_at <= time.time():
+            self.store.pop(key, None)
+            return None
+
+        return value
+
+    def _set(self, key, value, expiry_ms):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+
+        self.store[key] = (value, time.time() + expiry_ms / 1000)
+
+    def set_value(self, key, value, expiry):
+        with self.lock:
+            self._set(key, value, expiry * 1000)
+
+    def get_value(self, key):
+        with self.lock:
+            return self._get(key)
+
+    def get_values(self, keys):
+        with self.lock:
+            return [self._get(key) for key in keys]
+
+    def set_hash(self, key, mapping, expiry):
+        with self.lock:
+            value = {field: rate.encode('utf-8') for field, rate in mapping.items()}
+            self.store[key] = (value, time.time() + expiry)
+
+    def get_hash_fields(self, key, fields):
+        with self.lock:
+            value = self._get(key) or {}
+            return [value.get(field) for field in fields]
+
+    def get_hash(self, key):
+        with self.lock:
+            return {field.encode('utf-8'): rate for field, rate in (self._get(key) or {}).items()}
+
+    def set_values(self, mapping, expiry):
+        with self.lock:
+            for key, value in mapping.items():
+                self._set(key, value, expiry * 1000)
+
+    def append_values(self, mapping, expiry):
+        with self.lock:
+            for key, value in mapping.items():
+                self._set(key, (self._get(key) or b"") + value, expiry * 1000)
+
+    def acquire_lock(self, key, token, ttl_ms):
+        with self.lock:
+            if self._get(key) is not None:
+                return False
+
+            self._set(key, token, ttl_ms)
+            return True
+
+    def release_lock(self, key, token):
+        with self.lock:
+            if self._get(key) == token.encode('utf-8'):
+                self.store.pop(key, None)
+
+    def add_members(self, key, members, expiry):
+        with self.lock:
+            self.sets.setdefault(key, set()).update(members)
+
+    def get_members(self, key):
+        with self.lock:
+            return {member.encode('utf-8') for member in self.sets.get(key, ())}
+
+    def remove_members(self, key, members):
+        with self.lock:
+            self.sets.get(key, set()).difference_update(members)
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+
+        # Delivered synchronously in the publisher's thread rather than a listener thread
+        for handler in list(self.subscribers.get(channel, ())):
+            handler({"channel": channel.encode('utf-8'), "data": message})
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    def increment_scores(self, key, scores):
+        with self.lock:
+            members = self.sorted_sets.setdefault(key, {})
+            for member, amount in scores.items():
+                members[member] = members.get(member, 0) + amount
+
+    def top_members(self, key, count):
+        members = self.sorted_sets.get(key, {})
+        return [member.encode('utf-8') for member in sorted(members, key=members.get, reverse=True)[:count]]
+
+    def decay_scores(self, key, factor, max_members):
+        with self.lock:
+            members = self.sorted_sets.get(key, {})
+            top = sorted(members, key=members.get, reverse=True)[:max_members]
+            self.sorted_sets[key] = {member: members[member] * factor for member in top}
+
+
+class FakePubSub:
+    """Pub/sub connection on a FakeRedisClient; handlers receive what publish() sends."""
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.handlers = {}
+
+    def subscribe(self, **handlers):
+        self.handlers.update(handlers)
+
+        for channel, handler in handlers.items():
+            self.redis_client.subscribers.setdefault(channel, []).append(handler)
+
+    def run_in_thread(self, sleep_time=0, daemon=False, exception_handler=None):
+        return self
+
+    def stop(self):
+        for channel, handler in self.handlers.items():
+            self.redis_client.subscribers[channel].remove(handler)
+
+        self.handlers = {}
+
+
+class FakeAsyncRedisClient:
+    """redis.asyncio-style wrapper around FakeRedisClient for the ASGI tests."""
+
+    def __init__(self, sync_client=None):
+        self.sync_client = sync_client or FakeRedisClient()
+
+    async def set_value(self, key, value, expiry):
+        self.sync_client.set_value(key, value, expiry)
+
+    async def get_value(self, key):
+        return self.sync_client.get_value(key)
+
+    async def get_values(self, keys):
+        return self.sync_client.get_values(keys)
+
+    async def set_values(self, mapping, expiry):
+        self.sync_client.set_values(mapping, expiry)
+
+    async def set_hash(self, key, mapping, expiry):
+        self.sync_client.set_hash(key, mapping, expiry)
+
+    async def get_hash_fields(self, key, fields):
+        return self.sync_client.get_hash_fields(key, fields)
+
+    async def get_hash(self, key):
+        return self.sync_client.get_hash(key)
+
+    async def append_values(self, mapping, expiry):
+        self.sync_client.append_values(mapping, expiry)
+
+    async def add_members(self, key, members, expiry):
+        self.sync_client.add_members(key, members, expiry)
+
+    async def acquire_lock(self, key, token, ttl_ms):
+        return self.sync_client.acquire_lock(key, token, ttl_ms)
+
+    async def release_lock(self, key, token):
+        self.sync_client.release_lock(key, token)
+
+    async def publish(self, channel, message):
+        self.sync_client.publish(channel, message)
+
+    def register_script(self, script):
+        # Rate-limit script stand-in: always allow
+        async def run(keys, args):
+            return [1, int(args[0]) - 1, int(args[1])]
+        return run
+
+    async def aclose(self):
+        pass
@@ -0,0 +1,99 @@
+import json
+import time
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DEFAULT_RATES = {"EUR": 0.9, "GBP": 0.8, "JPY": 150.0, "NGN": 1500.0}
+
+
+class StubUpstream:
+    """
+    Local stand-in for the Open Exchange Rates and XE APIs with configurable latency and
+    error rate. Serves /latest.json, /currencies.json, /convert_from.json, /currencies and /account_info/.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, rates=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rates = rates or DEFAULT_RATES
+        self.calls = []
+        self.lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def rate(self, from_currency, to_currency):
+        usd_rates = {"USD": 1.0, **self.rates}
+        return round(usd_rates[to_currency] / usd_rates[from_currency], 6)
+
+    def handle(self, request):
+        parsed = urlparse(request.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+
+        with self.lock:
+            self.calls.append(parsed.path)
+            call_number = len(self.calls)
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        # Deterministically fail `error_rate` of the calls, spread evenly
+        if int(call_number * self.error_rate) != int((call_number - 1) * self.error_rate):
+            return self.respond(request, 503, {"error": "stub failure"})
+
+        if parsed.path == "/latest.json":
+            base = query.get("base", "USD")
+            symbols = query["symbols"].split(",") if "symbols" in query else ["USD", *self.rates]
+            rates = {symbol: self.rate(base, symbol) for symbol in symbols if symbol in self.rates or symbol == "USD"}
+            return self.respond(request, 200, {"timestamp": int(time.time()), "base": base, "rates": rates})
+
+        if parsed.path == "/currencies.json":
+            return self.respond(request, 200, {symbol: symbol for symbol in ["USD", *self.rates]})
+
+        if parsed.path == "/convert_from.json":
+            base = query["from"]
+            targets = [symbol for symbol in query["to"].split(",") if symbol in self.rates or symbol == "USD"]
+            body = {"from": base, "amount": 1.0, "timestamp": "2024-01-01T00:00:00Z", "to": [{"quotecurrency": symbol, "mid": self.rate(base, symbol)} for symbol in targets]}
+            return self.respond(request, 200, body)
+
+        if parsed.path == "/currencies":
+            currencies = [{"iso": iso, "currency_name": iso, "is_obsolete": False} for iso in ["USD", *self.rates]]
+            return self.respond(request, 200, {"terms": "http://www.xe.com/legal/dfs.php", "currencies": currencies})
+
+        if parsed.path == "/account_info/":
+            return self.respond(request, 200, {"id": "stub", "organization": "stub", "package": "stub", "package_limit": 10000, "service_start_timestamp": "2024-01-01T00:00:00Z"})
+
+        return self.respond(request, 404, {"error": "not found"})
+
+    def respond(self, request, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
@@ -0,0 +1,50 @@
+import os
+import sys
+import unittest
+import subprocess
+from unittest.mock import patch
+from app import create_app
+
+
+class TestAppFactory(unittest.TestCase):
+
+    def test_importing_the_package_loads_no_heavy_dependencies(self):
+        env = {"PATH": os.environ.get("PATH", ""), "PYTHONPATH": os.getcwd()}
+        code = "import sys, app; print(sorted({'flask', 'redis', 'numpy', 'requests'} & set(sys.modules)))"
+
+        output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(output.strip(), "[]")
+
+    def test_each_call_builds_an_independent_app(self):
+        first, second = create_app(), create_app()
+
+        self.assertIsNot(first, second)
+        self.assertIsNot(first.currency_service, second.currency_service)
+        self.assertIn("/api/v2/conversion", {rule.rule for rule in first.url_map.iter_rules()})
+
+        first.rate_limiter.script = None
+        response = first.test_client().get("/api")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("RateLimit-Limit", response.headers)
+
+    def test_blank_settings_from_the_example_env_use_the_defaults(self):
+        with open(".env.example") as handle:
+            blank = {line.split("=", 1)[0]: "" for line in handle.read().splitlines() if "=" in line}
+
+        env = {"PATH": os.environ.get("PATH", ""), "PYTHONPATH": os.getcwd(), **blank}
+        code = "from app.config import Config; print(Config.BATCH_MAX_PAIRS, Config.OPEN_XR_TABLE_BASE, Config.LOCAL_CACHE_ENABLED, Config.SNAPSHOT_DIR)"
+
+        output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(output.split(), ["100", "USD", "True", "/tmp/currency-rate-snapshots"])
+
+    def test_missing_environment_fails_at_boot(self):
+        with patch.dict(os.environ, {"XECD_API_KEY": ""}):
+            with self.assertRaises(EnvironmentError):
+                create_app()
+
+
+if __name__ == '__main__':
+    unittest.main()
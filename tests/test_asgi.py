@@ -0,0 +1,88 @@
+import time
+import asyncio
+import unittest
+from unittest.mock import patch
+import httpx
+from app.asgi import create_asgi_app
+from app.services.async_currency_service import AsyncCurrencyService
+from app.cache.redis_client import CacheUnavailableError
+from tests.fakes import FakeAsyncRedisClient
+from tests.stub_upstream import StubUpstream
+
+CONCURRENT_REQUESTS = 200
+
+class TestAsgiServing(unittest.TestCase):
+
+    def setUp(self):
+        self.upstream = StubUpstream(latency=0.2).start()
+        self.patches = [
+            patch('app.services.async_currency_service.Config.OPEN_XR_BASE_URL', self.upstream.url + "/latest.json"),
+            patch('app.services.async_currency_service.Config.XECD_BASE_URL', self.upstream.url),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.upstream.stop()
+
+    async def run_requests(self, paths, codes=None, sequential=False, redis_client=None):
+        redis_client = redis_client or FakeAsyncRedisClient()
+        service = AsyncCurrencyService(redis_client)
+        asgi_app = create_asgi_app(redis_client=redis_client, currency_service=service)
+
+        if codes is not None:
+            # A loaded index that is not due for a reload
+            service.currency_index.codes["v2"] = frozenset(codes)
+            service.currency_index.checked_at["v2"] = time.monotonic()
+
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi_app), base_url="http://test") as client:
+                if sequential:
+                    return [await client.get(path) for path in paths]
+
+                return await asyncio.gather(*(client.get(path) for path in paths))
+        finally:
+            await service.aclose()
+
+    def test_concurrent_conversions_share_one_upstream_call(self):
+        responses = asyncio.run(self.run_requests(["/api/v2/conversion?from=USD&to=EUR"] * CONCURRENT_REQUESTS))
+
+        self.assertTrue(all(response.status_code == 200 for response in responses))
+        self.assertEqual({response.json()["data"]["rate"] for response in responses}, {0.9})
+        self.assertEqual([call for call in self.upstream.calls if call == "/convert_from.json"], ["/convert_from.json"])
+        self.assertIn("RateLimit-Remaining", responses[0].headers)
+
+    def test_v1_conversion_and_currencies(self):
+        v1, currencies = asyncio.run(self.run_requests(["/api/conversion?from=EUR&to=GBP", "/api/v2/currencies"]))
+
+        self.assertEqual(v1.json()["rate"], 0.888889)
+        self.assertEqual(len(currencies.json()["data"]["currencies"]), 5)
+
+    def test_degraded_cache_is_bypassed(self):
+        redis_client = FakeAsyncRedisClient()
+        unavailable = CacheUnavailableError("Redis is in degraded mode.")
+
+        with patch.object(redis_client, 'get_value', side_effect=unavailable), patch.object(redis_client, 'set_values', side_effect=unavailable):
+            v2, v1 = asyncio.run(self.run_requests(["/api/v2/conversion?from=USD&to=EUR", "/api/conversion?from=EUR&to=GBP"], redis_client=redis_client))
+
+        self.assertEqual((v2.status_code, v2.json()["data"]["rate"]), (200, 0.9))
+        self.assertEqual((v1.status_code, v1.json()["rate"]), (200, 0.888889))
+
+    def test_unsupported_codes_get_422_without_upstream_calls(self):
+        responses = asyncio.run(self.run_requests(["/api/v2/conversion?from=USD&to=ZZZ", "/api/v2/conversion?from=US1&to=EUR"], codes={"USD", "EUR"}))
+
+        self.assertEqual([response.status_code for response in responses], [422, 422])
+        self.assertEqual(responses[0].json()["data"], "Unsupported currency code: ZZZ")
+        self.assertEqual(self.upstream.calls, [])
+
+    def test_missing_pair_is_negative_cached(self):
+        responses = asyncio.run(self.run_requests(["/api/v2/conversion?from=USD&to=XAU"] * 2, codes={"USD", "XAU"}, sequential=True))
+
+        self.assertEqual([response.status_code for response in responses], [400, 400])
+        self.assertEqual(responses[0].json()["data"], responses[1].json()["data"])
+        self.assertEqual(self.upstream.calls, ["/convert_from.json"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from unittest.mock import Mock, patch
+from app.services.currency_service import CurrencyService
+
+XE_RESPONSE = {
+    "timestamp": "2024-01-01T00:00:00Z",
+    "from": "USD",
+    "to": [
+        {"quotecurrency": "EUR", "mid": 0.9},
+        {"quotecurrency": "GBP", "mid": 0.8}
+    ]
+}
+
+class TestBatchConversion(unittest.TestCase):
+
+    @patch('app.services.currency_service.build_session')
+    def test_batch_dedupes_upstream_calls(self, mock_build_session):
+        mock_get = mock_build_session.return_value.get
+        mock_redis_client = Mock()
+        mock_redis_client.get_values.return_value = [b"150.0|2024-01-01T00:00:00Z", None, None, None] + [None] * 4
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = XE_RESPONSE
+
+        service = CurrencyService(mock_redis_client)
+        pairs = [("USD", "JPY"), ("USD", "EUR"), ("USD", "GBP"), ("USD", "EUR"), ("USD", "CHF")]
+        results = service.get_conversion_rates_batch(pairs, version="v2")
+
+        # One MGET for the distinct keys and their negative-cache entries, one upstream call for the shared base
+        keys = ["v2_USD_JPY", "v2_USD_EUR", "v2_USD_GBP", "v2_USD_CHF"]
+        mock_redis_client.get_values.assert_called_once_with(keys + [f"missing_{key}" for key in keys])
+        mock_get.assert_called_once()
+        self.assertIn("to=EUR,GBP,CHF", mock_get.call_args[0][0])
+
+        self.assertEqual(results[("USD", "JPY")]['rate'], 150.0)
+        self.assertEqual(results[("USD", "EUR")]['rate'], 0.9)
+        self.assertIn('error', results[("USD", "CHF")])
+
+        stored, remembered = (call.args[0] for call in mock_redis_client.set_values.call_args_list)
+        self.assertEqual(set(stored), {"v2_USD_EUR", "v2_USD_GBP"})
+        self.assertEqual(set(remembered), {"missing_v2_USD_CHF"})
+
+if __name__ == '__main__':
+    unittest.main()
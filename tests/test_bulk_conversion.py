@@ -0,0 +1,89 @@
+import io
+import json
+import unittest
+import numpy as np
+from unittest.mock import Mock
+from app.services.currency_service import CurrencyService
+from app.services.bulk_conversion import BulkConverter, round_amounts, read_csv_rows, read_ndjson_rows, csv_lines
+from app.utils.errors import UnprocessableEntityError
+
+def batch_lookup(pairs, version):
+    rates = {("USD", "EUR"): {'rate': 0.9, 'timestamp': "t"}, ("GBP", "USD"): {'rate': 1.25, 'timestamp': "t"}}
+    return {pair: rates.get(pair, {'error': "No conversion rate found."}) for pair in pairs}
+
+class TestBulkConversion(unittest.TestCase):
+
+    def setUp(self):
+        self.service = Mock()
+        self.service.get_conversion_rates_batch.side_effect = batch_lookup
+        self.service.validate_currency_code.side_effect = lambda code: CurrencyService.validate_currency_code(self.service, code)
+
+    def test_rounding_modes(self):
+        values = np.array([2.675, -2.675, 0.125, 1.005])
+
+        self.assertEqual(round_amounts(values, 2, "half_up").tolist(), [2.68, -2.68, 0.13, 1.01])
+        self.assertEqual(round_amounts(values, 2, "half_even").tolist(), [2.68, -2.68, 0.12, 1.0])
+        self.assertEqual(round_amounts(values, 2, "down").tolist(), [2.67, -2.67, 0.12, 1.0])
+
+    def test_each_pair_is_resolved_once_across_chunks(self):
+        rows = [("100", "usd", "eur"), ("10", "GBP", "USD"), ("x", "USD", "EUR"), ("5", "USD", "XXX"), ("1", "US", "EUR"), ("2", "USD", "E1R")] * 3
+        converter = BulkConverter(self.service, "v2", decimals=2, chunk_size=4)
+
+        results = [row for chunk in converter.convert(rows) for row in chunk]
+
+        self.assertEqual(len(results), 18)
+        self.assertEqual(results[0], {"amount": 100.0, "from": "USD", "to": "EUR", "rate": 0.9, "converted": 90.0})
+        self.assertEqual(results[1]["converted"], 12.5)
+        self.assertEqual(results[2]["error"], "Invalid amount: x")
+        self.assertEqual(results[3]["error"], "No conversion rate found.")
+        self.assertEqual(results[4]["error"], "Invalid currency code: US")
+        self.assertEqual(results[5]["error"], "Invalid currency code: E1R")
+
+        looked_up = [pair for call in self.service.get_conversion_rates_batch.call_args_list for pair in call.args[0]]
+        self.assertEqual(sorted(looked_up), sorted([("USD", "EUR"), ("GBP", "USD"), ("USD", "XXX")]))
+
+    def test_non_finite_amounts_are_rejected(self):
+        converter = BulkConverter(self.service, "v2")
+
+        results = next(converter.convert([("nan", "USD", "EUR"), ("inf", "USD", "EUR"), ("-Infinity", "USD", "EUR"), ("1", "USD", "EUR")]))
+
+        self.assertEqual([row.get("error") for row in results], ["Invalid amount: nan", "Invalid amount: inf", "Invalid amount: -Infinity", None])
+        json.loads(json.dumps(results, allow_nan=False))
+
+        upload = io.BytesIO(b'{"amount": NaN, "from": "USD", "to": "EUR"}\n{"amount": 1e999, "from": "USD", "to": "EUR"}\n')
+        results = next(BulkConverter(self.service, "v2").convert(read_ndjson_rows(upload)))
+
+        self.assertEqual([row["error"] for row in results], ["Invalid amount: NaN", "Invalid amount: 1e999"])
+        json.dumps(results, allow_nan=False)
+
+    def test_csv_round_trip(self):
+        upload = io.BytesIO(b"id,from,to,amount\n1,USD,EUR,100\n2,GBP,USD,10\n")
+        converter = BulkConverter(self.service, "v1")
+
+        output = "".join(csv_lines(converter.convert(read_csv_rows(upload))))
+
+        self.assertEqual(output, "amount,from,to,rate,converted,error\n100.0,USD,EUR,0.9,90.0,\n10.0,GBP,USD,1.25,12.5,\n")
+
+    def test_csv_without_required_columns_is_rejected(self):
+        with self.assertRaises(UnprocessableEntityError):
+            list(read_csv_rows(io.BytesIO(b"value,currency\n1,USD\n")))
+
+    def test_ndjson_rows(self):
+        upload = io.BytesIO(b'{"amount": 1.5, "from": "USD", "to": "EUR"}\n\nnot json\n')
+        self.assertEqual(list(read_ndjson_rows(upload)), [(1.5, "USD", "EUR"), (None, None, None)])
+
+    def test_bulk_endpoint_streams_ndjson(self):
+        from app import create_app
+
+        app = create_app()
+        app.currency_service = self.service
+        body = "".join(json.dumps({"amount": amount, "from": "USD", "to": "EUR"}) + "\n" for amount in range(3))
+
+        response = app.test_client().post("/api/v2/conversion/bulk?decimals=1", data=body, content_type="application/x-ndjson")
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([line["converted"] for line in lines], [0.0, 0.9, 1.8])
+
+if __name__ == '__main__':
+    unittest.main()
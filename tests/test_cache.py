@@ -1,15 +1,18 @@
+import redis
+import asyncio
 import unittest
-from unittest.mock import patch
-from app.cache.redis_client import RedisClient
+from unittest.mock import patch, MagicMock, AsyncMock
+from app.cache.async_redis_client import AsyncRedisClient
+from app.cache.redis_client import RedisClient, CacheUnavailableError
 
 class TestRedisClient(unittest.TestCase):
 
-    @patch('cache.redis_client.redis')
+    @patch('app.cache.redis_client.redis')
     def test_set_get_value(self, mock_redis):
         
         # Setup
+        mock_client = mock_redis.Redis.return_value
         client = RedisClient()
-        mock_redis.from_url.return_value = mock_redis
 
         test_key = "test_key"
         test_value = "test_value"
@@ -17,17 +20,78 @@ class TestRedisClient(unittest.TestCase):
 
         # Test set_value
         client.set_value(test_key, test_value, expiry)
-        mock_redis.setex.assert_called_once_with(test_key, expiry, test_value)
+        mock_client.setex.assert_called_once_with(test_key, expiry, test_value)
 
         # Test get_value
-        mock_redis.get.return_value = test_value.encode('utf-8')
+        mock_client.get.return_value = test_value.encode('utf-8')
         value = client.get_value(test_key)
-        self.assertEqual(value, test_value)
+        self.assertEqual(value, test_value.encode('utf-8'))
 
         # Test get_value for non-existent key
-        mock_redis.get.return_value = None
+        mock_client.get.return_value = None
         value = client.get_value("non_existent_key")
         self.assertIsNone(value)
 
+    @patch('app.cache.redis_client.Config.REDIS_DEGRADED_COOLDOWN', 60)
+    def test_connection_failure_enters_degraded_mode(self):
+        client = RedisClient()
+        client.client = MagicMock()
+        client.client.get.side_effect = redis.ConnectionError("connection refused")
+
+        with self.assertRaises(redis.ConnectionError):
+            client.get_value("key")
+
+        self.assertTrue(client.degraded)
+
+        # While degraded, commands fail fast without touching the connection
+        with self.assertRaises(CacheUnavailableError):
+            client.get_value("key")
+
+        client.client.get.assert_called_once()
+
+    @patch('app.cache.redis_client.Config.REDIS_DEGRADED_COOLDOWN', 60)
+    def test_async_client_enters_degraded_mode_too(self):
+        connection = MagicMock()
+        connection.get = AsyncMock(side_effect=redis.ConnectionError("connection refused"))
+        client = AsyncRedisClient(connection)
+
+        with self.assertRaises(redis.ConnectionError):
+            asyncio.run(client.get_value("key"))
+
+        with self.assertRaises(CacheUnavailableError):
+            asyncio.run(client.get_value("key"))
+
+        connection.get.assert_awaited_once()
+
+    def test_degraded_mode_expires(self):
+        client = RedisClient()
+        client.client = MagicMock()
+        client.client.get.return_value = b"1"
+        client.degraded_until = 0.0
+
+        self.assertFalse(client.degraded)
+        self.assertEqual(client.get_value("key"), b"1")
+
+    def test_pool_is_bounded_with_timeouts_and_retries(self):
+        pool = RedisClient().client.connection_pool
+
+        self.assertIsInstance(pool, redis.BlockingConnectionPool)
+        self.assertEqual(pool.max_connections, 50)
+        self.assertEqual(pool.connection_kwargs["socket_timeout"], 0.5)
+        self.assertEqual(pool.connection_kwargs["retry"]._retries, 2)
+
+    def test_set_hash_replaces_in_one_transaction(self):
+        client = RedisClient()
+        client.client = MagicMock()
+        pipeline = client.client.pipeline.return_value
+
+        client.set_hash("v1_table_USD", {"_meta": "{}", "EUR": "0.9"}, 60)
+
+        client.client.pipeline.assert_called_once_with(transaction=True)
+        pipeline.delete.assert_called_once_with("v1_table_USD")
+        pipeline.hset.assert_called_once_with("v1_table_USD", mapping={"_meta": "{}", "EUR": "0.9"})
+        pipeline.expire.assert_called_once_with("v1_table_USD", 60)
+        pipeline.execute.assert_called_once()
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import patch
+from app import create_app
+from app.services.currency_index import CurrencyIndex
+from app.services.currency_service import CurrencyService
+from app.services.rate_cache import encode_document, decode_document
+from app.utils.errors import BadRequestError, UnprocessableEntityError
+from tests.fakes import FakeRedisClient
+
+
+class TestCurrencyIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.redis_client = FakeRedisClient()
+        self.service = CurrencyService(self.redis_client)
+        self.index = self.service.currency_index
+
+    def test_every_code_is_accepted_until_a_list_loads(self):
+        self.assertTrue(self.index.supports("v2", "ZZZ"))
+
+        self.index.codes["v2"] = frozenset({"USD", "EUR"})
+
+        self.assertTrue(self.index.supports("v2", "EUR"))
+        self.assertFalse(self.index.supports("v2", "ZZZ"))
+        self.assertTrue(self.index.supports("v1", "ZZZ"))
+
+    def test_rebuild_shares_the_list_through_redis(self):
+        with patch.object(self.service, 'fetch_supported_codes', return_value={"USD", "EUR"}) as fetch:
+            self.index.reload("v2")
+
+        fetch.assert_called_once_with("v2")
+        self.assertEqual(decode_document(self.redis_client.get_value("currency_index_v2"))['body'], "EUR,USD")
+
+        # Another worker loads the shared copy without asking the provider
+        other = CurrencyIndex(self.service)
+
+        with patch.object(self.service, 'fetch_supported_codes') as fetch:
+            other.reload("v2")
+
+        fetch.assert_not_called()
+        self.assertEqual(other.codes["v2"], frozenset({"USD", "EUR"}))
+
+    def test_stale_list_is_served_while_it_is_rebuilt(self):
+        self.redis_client.set_value("currency_index_v1", encode_document("USD", fetched_at=0.0), 3600)
+
+        with patch.object(self.service, 'fetch_supported_codes', return_value=set()):
+            self.index.reload("v1")
+
+        self.assertEqual(self.index.codes["v1"], frozenset({"USD"}))
+
+    def test_unsupported_code_is_rejected_without_io(self):
+        self.index.codes["v2"] = frozenset({"USD", "EUR"})
+
+        with patch.object(self.redis_client, 'get_value') as get_value:
+            with self.assertRaises(UnprocessableEntityError) as raised:
+                self.service.get_conversion_rate_v2("USD", "ZZZ")
+
+        get_value.assert_not_called()
+        self.assertEqual(raised.exception.message, "Unsupported currency code: ZZZ")
+
+        with self.assertRaises(UnprocessableEntityError):
+            self.service.get_conversion_rate_v2("US1", "EUR")
+
+    def test_missing_pair_is_negative_cached(self):
+        with patch.object(self.service, 'fetch_rates_v2', return_value={}) as fetch:
+            with self.assertRaises(BadRequestError) as first:
+                self.service.get_conversion_rate_v2("USD", "XAU")
+
+            with self.assertRaises(BadRequestError) as cached:
+                self.service.get_conversion_rate_v2("USD", "XAU")
+
+        fetch.assert_called_once()
+        self.assertEqual(cached.exception.message, first.exception.message)
+
+    def test_missing_v1_pair_answers_the_same_error_from_the_negative_cache(self):
+        with patch.object(self.service, 'fetch_rates_v1', return_value={}) as fetch:
+            with self.assertRaises(BadRequestError) as first:
+                self.service.get_conversion_rate_v1("USD", "XAU")
+
+            with self.assertRaises(BadRequestError) as cached:
+                self.service.get_conversion_rate_v1("USD", "XAU")
+
+        fetch.assert_called_once()
+        self.assertEqual(cached.exception.message, "Invalid currency code: USD || XAU")
+        self.assertEqual(first.exception.message, cached.exception.message)
+
+    def test_batch_reports_unsupported_and_negative_cached_pairs_per_pair(self):
+        self.index.codes["v2"] = frozenset({"USD", "EUR", "XAU"})
+        self.service.remember_missing("v2", {("USD", "XAU"): "No conversion rate found."})
+
+        with patch.object(self.service, 'fetch_rates_v2', return_value={"EUR": {'rate': 0.9, 'timestamp': "t1"}}) as fetch:
+            results = self.service.get_conversion_rates_batch([("USD", "EUR"), ("USD", "XAU"), ("USD", "ZZZ"), ("USD", "E1R")])
+
+        fetch.assert_called_once_with("USD", ["EUR"])
+        self.assertEqual(results[("USD", "EUR")]['rate'], 0.9)
+        self.assertEqual(results[("USD", "XAU")], {'error': "No conversion rate found."})
+        self.assertEqual(results[("USD", "ZZZ")], {'error': "Unsupported currency code: ZZZ"})
+        self.assertEqual(results[("USD", "E1R")], {'error': "Invalid currency code: E1R"})
+
+    @patch('app.services.currency_index.CurrencyIndex.start')
+    def test_endpoint_answers_422_for_unsupported_codes(self, start):
+        app = create_app()
+        app.rate_limiter.script = None
+        app.currency_service = self.service
+        self.index.codes["v2"] = frozenset({"USD", "EUR"})
+
+        response = app.test_client().get("/api/v2/conversion?from=USD&to=ZZZ&amount=1")
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.get_json()["data"], "Unsupported currency code: ZZZ")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import json
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+from app.services.currency_service import CurrencyService
+from app.services.rate_cache import encode_document, decode_document, document_cache_key
+from tests.fakes import FakeRedisClient
+
+CURRENCIES = '{"terms":"http://www.xe.com/legal/dfs.php","currencies":[{"iso":"USD"}]}'
+
+def xe_response(status_code, text="", etag=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.text = text
+    response.content = text.encode('utf-8')
+    response.headers = {"ETag": etag} if etag else {}
+    return response
+
+class TestDocumentCache(unittest.TestCase):
+
+    def test_document_keeps_pipes_in_body(self):
+        raw = encode_document('{"a":"x|y"}', '"v1"', fetched_at=10)
+        self.assertEqual(decode_document(raw), {'fetched_at': 10.0, 'etag': '"v1"', 'body': '{"a":"x|y"}'})
+
+    def test_cache_key_ignores_parameter_order(self):
+        self.assertEqual(document_cache_key("v2_currencies", {"a": 1, "b": 2}), document_cache_key("v2_currencies", {"b": 2, "a": 1}))
+
+    @patch('app.services.currency_service.build_session')
+    def test_currencies_fetched_once_then_served_from_cache(self, mock_build_session):
+        mock_build_session.return_value.get.return_value = xe_response(200, CURRENCIES, '"v1"')
+        service = CurrencyService(FakeRedisClient())
+
+        for _ in range(5):
+            self.assertEqual(service.get_currencies_json(), CURRENCIES)
+
+        self.assertEqual(service.get_currencies()["currencies"], [{"iso": "USD"}])
+        self.assertEqual(mock_build_session.return_value.get.call_count, 1)
+
+    @patch('app.services.currency_service.build_session')
+    def test_not_modified_extends_the_cached_body(self, mock_build_session):
+        session = mock_build_session.return_value
+        session.get.return_value = xe_response(304)
+
+        redis_client = FakeRedisClient()
+        service = CurrencyService(redis_client)
+        cache_key = "v2_account_info"
+        previous = {'fetched_at': time.time() - 7200, 'etag': '"v1"', 'body': '{"id":"acct"}'}
+
+        document = service.fetch_document(cache_key, "http://xe/account_info/", None, 3600, "account info", previous)
+
+        self.assertEqual(document["body"], '{"id":"acct"}')
+        self.assertEqual(session.get.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+
+        stored = decode_document(redis_client.get_value(cache_key))
+        self.assertEqual(stored['etag'], '"v1"')
+        self.assertGreater(stored['fetched_at'], previous['fetched_at'])
+
+    def test_raw_success_response_matches_jsonify_shape(self):
+        from app.utils.api_responses import build_raw_success_response
+
+        response = build_raw_success_response("ok", '{"id":"acct"}')
+        self.assertEqual(json.loads(response.get_data()), {"data": {"id": "acct"}, "message": "ok", "status_code": 200, "success": True})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import gzip
+import unittest
+from flask import Flask
+from app.utils.http_caching import ResponseCache, strong_etag, coded_etag, etag_matches, negotiate_encoding
+
+BODY = b'{"rates":"' + b'x' * 4096 + b'"}'
+
+class TestHttpCaching(unittest.TestCase):
+
+    def setUp(self):
+        self.flask_app = Flask(__name__)
+        self.cache = ResponseCache(max_entries=10, ttl=60)
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return BODY
+
+    def respond(self, headers=None, etag=None):
+        with self.flask_app.test_request_context(headers=headers or {}):
+            return self.cache.respond("v2_USD_EUR", etag or strong_etag("v2_USD_EUR", 0.9, "t1"), 120, self.build)
+
+    def test_body_is_built_once_per_etag(self):
+        first = self.respond()
+        second = self.respond()
+
+        self.assertEqual(first.get_data(), BODY)
+        self.assertEqual(second.headers["ETag"], first.headers["ETag"])
+        self.assertEqual(second.headers["Cache-Control"], "private, max-age=120")
+        self.assertEqual(self.builds, 1)
+
+        self.respond(etag=strong_etag("v2_USD_EUR", 0.91, "t2"))
+        self.assertEqual(self.builds, 2)
+
+    def test_matching_if_none_match_gets_bodiless_304(self):
+        etag = self.respond().headers["ETag"]
+        response = self.respond({"If-None-Match": f'W/"other", {etag}'})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b"")
+        self.assertEqual(response.headers["ETag"], etag)
+
+    def test_large_bodies_are_gzipped_when_accepted(self):
+        response = self.respond({"Accept-Encoding": "gzip, deflate"})
+
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.get_data()), BODY)
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+
+    def test_each_content_coding_has_its_own_etag(self):
+        identity = self.respond().headers["ETag"]
+        gzipped = self.respond({"Accept-Encoding": "gzip"}).headers["ETag"]
+
+        self.assertNotEqual(gzipped, identity)
+        self.assertEqual(gzipped, coded_etag(identity, "gzip"))
+        self.assertTrue(gzipped.endswith('-gzip"'))
+
+        revalidated = self.respond({"Accept-Encoding": "gzip", "If-None-Match": gzipped})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.headers["ETag"], gzipped)
+
+        # The identity ETag does not validate the gzip representation
+        mismatched = self.respond({"Accept-Encoding": "gzip", "If-None-Match": identity})
+        self.assertEqual(mismatched.status_code, 200)
+        self.assertEqual(mismatched.headers["Content-Encoding"], "gzip")
+
+    def test_negotiation(self):
+        self.assertIsNone(negotiate_encoding("gzip", 10))
+        self.assertIsNone(negotiate_encoding("gzip;q=0, identity", 4096))
+        self.assertEqual(negotiate_encoding("gzip", 4096), "gzip")
+        self.assertTrue(etag_matches("*", '"a"'))
+        self.assertFalse(etag_matches('"b"', '"a"'))
+
+if __name__ == '__main__':
+    unittest.main()
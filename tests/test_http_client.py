@@ -0,0 +1,39 @@
+import os
+import gc
+import weakref
+import unittest
+from app.utils.process_local import ProcessLocal
+from app.utils.http_client import build_session
+
+class TestHttpClient(unittest.TestCase):
+
+    def test_session_pool_is_sized(self):
+        session = build_session(auth=("id", "key"), pool_size=4)
+        adapter = session.get_adapter("https://xecdapi.xe.com")
+
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(session.auth, ("id", "key"))
+
+    def test_process_local_rebuilds_after_fork(self):
+        local = ProcessLocal(object)
+        first = local.get()
+        self.assertIs(local.get(), first)
+
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+
+        if pid == 0:
+            os.write(write_fd, b"1" if local.get() is not first else b"0")
+            os._exit(0)
+
+        os.waitpid(pid, 0)
+        self.assertEqual(os.read(read_fd, 1), b"1")
+
+    def test_process_locals_are_not_kept_alive(self):
+        local = weakref.ref(ProcessLocal(object))
+        gc.collect()
+
+        self.assertIsNone(local())
+
+if __name__ == '__main__':
+    unittest.main()
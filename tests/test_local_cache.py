@@ -0,0 +1,64 @@
+import time
+import unittest
+from unittest.mock import Mock, patch
+from app.cache.local_cache import LocalCache
+from app.cache.local_cached_redis_client import LocalCachedRedisClient
+from tests.fakes import FakeRedisClient
+
+class TestLocalCache(unittest.TestCase):
+
+    def test_lru_eviction_and_ttl(self):
+        cache = LocalCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+
+        cache.set("d", 4, ttl=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("d"))
+        self.assertEqual(cache.stats()["hits"], 2)
+
+    @patch('app.cache.local_cached_redis_client.PubSubListener', Mock())
+    def test_warm_hits_skip_redis_and_writes_invalidate_other_workers(self):
+        redis_client = FakeRedisClient()
+        redis_client.get_value = Mock(wraps=redis_client.get_value)
+        worker_a = LocalCachedRedisClient(redis_client)
+        worker_b = LocalCachedRedisClient(redis_client)
+
+        redis_client.set_value("v2_USD_EUR", "0.9|t|1", 3600)
+        self.assertEqual(worker_b.get_value("v2_USD_EUR"), b"0.9|t|1")
+        self.assertEqual(worker_b.get_value("v2_USD_EUR"), b"0.9|t|1")
+        self.assertEqual(redis_client.get_value.call_count, 1)
+
+        worker_a.set_values({"v2_USD_EUR": "0.95|t|2"}, 3600)
+        channel, message = redis_client.published[-1]
+        worker_b._on_invalidation(message)
+
+        self.assertEqual(worker_b.get_value("v2_USD_EUR"), b"0.95|t|2")
+        self.assertEqual(worker_b.stats()["misses"], 2)
+
+    @patch('app.cache.local_cached_redis_client.Config.REDIS_DEGRADED_COOLDOWN', 60)
+    def test_failed_listener_start_is_not_retried_on_every_miss(self):
+        redis_client = FakeRedisClient()
+        client = LocalCachedRedisClient(redis_client)
+        client.listener = Mock()
+        client.listener.start.side_effect = ConnectionError("redis down")
+
+        for _ in range(3):
+            self.assertIsNone(client.get_value("v2_USD_EUR"))
+
+        client.listener.start.assert_called_once()
+
+        # Nor is it attempted while the client is in degraded mode
+        client.listen_retry_at = 0.0
+        redis_client.degraded = True
+        client.get_value("v2_USD_EUR")
+
+        client.listener.start.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
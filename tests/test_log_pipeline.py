@@ -0,0 +1,77 @@
+import json
+import queue
+import logging
+import unittest
+from unittest.mock import patch
+from app import create_app
+from app.utils import log_pipeline
+from app.utils.errors import NotFoundError
+from app.utils.log_pipeline import NonBlockingQueueHandler, JsonFormatter, PayloadPreview, log_payload
+
+class TestLogPipeline(unittest.TestCase):
+
+    def record(self, msg, *args, exc_info=None):
+        return logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, exc_info)
+
+    def test_records_are_queued_unformatted(self):
+        handler = NonBlockingQueueHandler(queue.Queue())
+        handler.handle(self.record("rate %s", 0.9))
+
+        queued = handler.queue.get_nowait()
+        self.assertEqual((queued.msg, queued.args), ("rate %s", (0.9,)))
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+
+        for _ in range(3):
+            handler.handle(self.record("x"))
+
+        self.assertEqual(handler.dropped, 2)
+
+    def test_json_formatter_includes_traceback(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            import sys
+            record = self.record("failed %s", "USD", exc_info=sys.exc_info())
+
+        NonBlockingQueueHandler(queue.Queue()).prepare(record)
+        entry = json.loads(JsonFormatter().format(record))
+
+        self.assertEqual(entry["message"], "failed USD")
+        self.assertIn("ValueError: boom", entry["exception"])
+
+    def test_payload_preview_is_truncated(self):
+        with patch.object(log_pipeline, "payload_max_bytes", 10):
+            self.assertEqual(str(PayloadPreview("x" * 25)), "xxxxxxxxxx... (25 bytes)")
+
+    def test_payload_dumps_are_sampled(self):
+        with patch.object(log_pipeline, "payload_sample_rate", 0.0), patch("app.utils.log_pipeline.logging.info") as info:
+            log_payload("response", {"rates": {}})
+            info.assert_not_called()
+
+        with patch.object(log_pipeline, "payload_sample_rate", 1.0), patch("app.utils.log_pipeline.logging.info") as info:
+            log_payload("response", {"rates": {}})
+            info.assert_called_once()
+
+    @patch('app.services.currency_index.CurrencyIndex.start')
+    def test_errors_are_logged_once_by_the_handler(self, start):
+        app = create_app()
+        app.rate_limiter.script = None
+
+        def missing():
+            raise NotFoundError("No conversion rate found.")
+
+        app.add_url_rule("/missing", "missing", missing)
+
+        with patch('app.routes.logging') as routes_logging, self.assertNoLogs(level=logging.ERROR):
+            NotFoundError("constructed, never raised")
+            response = app.test_client().get("/missing")
+
+        self.assertEqual(response.status_code, 404)
+        routes_logging.warning.assert_called_once_with("%s: %s", "NotFoundError", "No conversion rate found.")
+        routes_logging.error.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
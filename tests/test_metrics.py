@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import Mock, patch
+from app import create_app
+from prometheus_client import REGISTRY
+from app.utils.metrics import observe_redis, record_cache, render_metrics
+from app.utils.http_client import InstrumentedSession
+
+def sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+class TestMetrics(unittest.TestCase):
+
+    def test_cache_events_are_labelled_by_provider(self):
+        before = sample("rate_cache_events_total", {"provider": "xe", "kind": "rate", "result": "stale"})
+        record_cache("v2", "rate", "stale", 3)
+
+        self.assertEqual(sample("rate_cache_events_total", {"provider": "xe", "kind": "rate", "result": "stale"}) - before, 3)
+
+    def test_redis_calls_are_timed_and_failures_counted(self):
+        @observe_redis
+        def get_value(key):
+            raise ConnectionError(key)
+
+        errors_before = sample("redis_errors_total", {"command": "get_value"})
+        calls_before = sample("redis_command_duration_seconds_count", {"command": "get_value"})
+
+        with self.assertRaises(ConnectionError):
+            get_value("v2_USD_EUR")
+
+        self.assertEqual(sample("redis_errors_total", {"command": "get_value"}) - errors_before, 1)
+        self.assertEqual(sample("redis_command_duration_seconds_count", {"command": "get_value"}) - calls_before, 1)
+
+    def test_upstream_failures_are_counted_without_a_status(self):
+        session = InstrumentedSession("open_xr")
+        session.get_adapter = Mock(side_effect=ConnectionError("refused"))
+        before = sample("upstream_responses_total", {"provider": "open_xr", "status": "error"})
+
+        with self.assertRaises(ConnectionError):
+            session.get("http://open-xr.invalid/latest.json")
+
+        self.assertEqual(sample("upstream_responses_total", {"provider": "open_xr", "status": "error"}) - before, 1)
+
+    def test_render_metrics_uses_text_format(self):
+        body, content_type = render_metrics()
+
+        self.assertIn(b"# TYPE rate_cache_events_total counter", body)
+        self.assertTrue(content_type.startswith("text/plain"))
+
+    @patch('app.services.currency_index.CurrencyIndex.start')
+    def test_scrapes_are_not_rate_limited(self, start):
+        app = create_app()
+        app.rate_limiter.script = None
+        app.rate_limiter = Mock(wraps=app.rate_limiter)
+        client = app.test_client()
+
+        for _ in range(3):
+            self.assertEqual(client.get("/metrics").status_code, 200)
+            self.assertEqual(client.get("/favicon.ico").status_code, 204)
+
+        app.rate_limiter.hit.assert_not_called()
+        client.get("/api")
+        app.rate_limiter.hit.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
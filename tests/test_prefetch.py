@@ -0,0 +1,88 @@
+import time
+import unittest
+from unittest.mock import patch
+from app.services.currency_service import CurrencyService
+from app.services.prefetch_scheduler import PrefetchScheduler
+from app.services.rate_cache import encode_rate, decode_rate
+from tests.fakes import FakeRedisClient
+
+class TestPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.redis_client = FakeRedisClient()
+
+        with patch('app.config.Config.PREFETCH_ENABLED', True):
+            self.service = CurrencyService(self.redis_client)
+
+    def test_hot_pairs_are_counted_locally_and_flushed(self):
+        for _ in range(3):
+            self.service.hot_pairs.record("v2", "USD", "EUR")
+        self.service.hot_pairs.record("v2", "GBP", "JPY")
+
+        self.assertEqual(self.redis_client.sorted_sets, {})
+        self.service.hot_pairs.flush()
+
+        self.assertEqual(self.service.hot_pairs.top("v2", 1), [("USD", "EUR")])
+        self.assertEqual(self.redis_client.sorted_sets["hot_pairs_v2"], {"USD_EUR": 3, "GBP_JPY": 1})
+
+    def test_hot_pairs_are_bounded_and_off_without_prefetching(self):
+        disabled = CurrencyService(self.redis_client).hot_pairs
+        disabled.record("v2", "USD", "EUR")
+        self.assertEqual(disabled.counts, {})
+
+        with patch('app.services.hot_pairs.MAX_PENDING_PAIRS', 2):
+            for to_currency in ("EUR", "JPY", "GBP", "EUR"):
+                self.service.hot_pairs.record("v2", "USD", to_currency)
+
+        self.assertEqual(self.service.hot_pairs.counts, {("v2", "USD_EUR"): 2, ("v2", "USD_JPY"): 1})
+
+    @patch('app.services.prefetch_scheduler.Config.PREFETCH_BUDGET', 2)
+    @patch('app.services.currency_service.build_session')
+    def test_cycle_refreshes_due_pairs_within_budget(self, mock_build_session):
+        response = mock_build_session.return_value.get.return_value
+        response.status_code = 200
+        response.json.return_value = {"timestamp": "new", "to": [{"quotecurrency": "EUR", "mid": 0.95}, {"quotecurrency": "JPY", "mid": 150.0}]}
+
+        self.redis_client.increment_scores("hot_pairs_v2", {"USD_EUR": 9, "USD_JPY": 8, "GBP_EUR": 7, "CHF_EUR": 6, "NGN_USD": 5})
+        self.redis_client.set_value("v2_USD_EUR", encode_rate(0.9, "old", fetched_at=time.time() - 3500), 86400)
+        self.redis_client.set_value("v2_GBP_EUR", encode_rate(1.1, "recent", fetched_at=time.time()), 86400)
+
+        scheduler = PrefetchScheduler(self.service)
+        refreshed = scheduler.run_cycle()
+
+        # USD (EUR near its soft TTL + JPY missing) and CHF fit the budget; GBP_EUR is fresh
+        self.assertEqual(refreshed, 2)
+        calls = [call.args[0] for call in mock_build_session.return_value.get.call_args_list]
+        self.assertEqual(len(calls), 2)
+        # Groups run concurrently, so the calls can land in either order
+        self.assertTrue(any("from=USD&to=EUR,JPY" in url for url in calls))
+        self.assertEqual(decode_rate(self.redis_client.get_value("v2_USD_EUR"))['rate'], 0.95)
+
+        # Another worker in the same interval does not repeat the work
+        self.assertEqual(PrefetchScheduler(self.service).run_cycle(), 0)
+
+    @patch('app.services.currency_service.build_session')
+    def test_jobs_skip_pairs_locked_by_other_refreshes(self, mock_build_session):
+        response = mock_build_session.return_value.get.return_value
+        response.status_code = 200
+        response.json.return_value = {"timestamp": "new", "to": [{"quotecurrency": "JPY", "mid": 150.0}]}
+
+        self.redis_client.increment_scores("hot_pairs_v2", {"USD_EUR": 9, "USD_JPY": 8})
+
+        # A conversion elsewhere is already refreshing USD_EUR under its per-pair lock
+        self.redis_client.acquire_lock("lock_v2_USD_EUR", "other", 60000)
+
+        scheduler = PrefetchScheduler(self.service)
+        jobs = scheduler.plan("v2", 5)
+
+        self.assertEqual([cache_keys for cache_keys, _ in jobs], [["v2_USD_EUR", "v2_USD_JPY"]])
+        self.assertTrue(scheduler._run_job(jobs[0]))
+
+        calls = [call.args[0] for call in mock_build_session.return_value.get.call_args_list]
+        self.assertEqual(len(calls), 1)
+        self.assertIn("from=USD&to=JPY", calls[0])
+        self.assertIsNone(self.redis_client.get_value("v2_USD_EUR"))
+        self.assertIsNone(self.redis_client.get_value("lock_v2_USD_JPY"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from app import create_app
+from app.config import Config
+from app.services.currency_service import CurrencyService
+from app.utils.metrics import record_upstream
+from app.utils.profiling import StackSampler, RequestProfile, sign_token, verify_token, prune, start_profile, cprofile_lock
+from app.utils.server_timing import start_timings, stop_timings, timed_phase, record_phase
+from tests.fakes import FakeRedisClient
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestServerTiming(unittest.TestCase):
+
+    def tearDown(self):
+        stop_timings()
+
+    def test_calls_inside_an_explicit_phase_count_only_towards_it(self):
+        timings = start_timings()
+
+        record_phase("cache", 0.002)
+        record_upstream("xe", 200, 0.05)
+
+        with timed_phase("rate_limit"):
+            record_phase("cache", 0.5)
+
+        summary = timings.summary()
+
+        self.assertEqual(summary["cache"], {"ms": 2.0, "count": 1})
+        self.assertEqual(summary["upstream"], {"ms": 50.0, "count": 1})
+        self.assertEqual(summary["rate_limit"]["count"], 1)
+        self.assertIn('cache;dur=2.0;desc="1 call"', timings.header())
+        self.assertIn("total;dur=", timings.header())
+
+    def test_nothing_is_recorded_outside_a_request(self):
+        record_phase("cache", 1.0)
+
+        with timed_phase("serialize"):
+            pass
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def test_tokens_are_signed_and_expire(self):
+        token = sign_token("secret", time.time() + 60)
+
+        self.assertTrue(verify_token("secret", token))
+        self.assertFalse(verify_token("other", token))
+        self.assertFalse(verify_token("secret", sign_token("secret", time.time() - 1)))
+        self.assertFalse(verify_token("", token))
+        self.assertFalse(verify_token("secret", "garbage"))
+
+    def test_sampler_records_collapsed_stacks_of_the_profiled_thread(self):
+        sampler = StackSampler(threading.get_ident(), 0.001)
+        sampler.start()
+        busy(0.05)
+        stacks = sampler.stop()
+
+        (stack, _), = stacks.most_common(1)
+        self.assertTrue(stack.split(";")[-1].startswith("busy (tests/test_profiling.py)"), stack)
+
+    def test_cprofile_mode_writes_a_pstats_dump_and_frees_the_profiler(self):
+        with patch.object(Config, 'PROFILE_MODE', 'cprofile'), patch.object(Config, 'PROFILE_SAMPLE_RATE', 1.0):
+            profile = start_profile()
+            self.assertIsNone(start_profile())
+
+            busy(0.01)
+            profile.stop()
+
+        path = profile.write({"route": "/api/v2/conversion"}, self.directory)
+
+        self.assertTrue(os.path.exists(path + ".prof"))
+        self.assertFalse(cprofile_lock.locked())
+
+    def test_prune_keeps_the_newest_profiles(self):
+        paths = []
+
+        for _ in range(3):
+            profile = RequestProfile("sample", "token").start()
+            profile.stop()
+            paths.append(profile.write({"route": "/api"}, self.directory))
+
+        prune(self.directory, 1)
+
+        self.assertEqual(sorted(os.listdir(self.directory)), [os.path.basename(paths[-1]) + ".folded", os.path.basename(paths[-1]) + ".json"])
+
+    @patch('app.services.currency_index.CurrencyIndex.start')
+    def test_endpoint_reports_phases_and_writes_profiles_for_signed_requests(self, start):
+        app = create_app()
+        app.rate_limiter.script = None
+        app.currency_service = CurrencyService(FakeRedisClient())
+
+        response = app.test_client().get("/api")
+
+        self.assertIn("rate_limit;dur=", response.headers["Server-Timing"])
+        self.assertIn("serialize;dur=", response.headers["Server-Timing"])
+
+        with patch.object(Config, 'PROFILE_SECRET', 'secret'), patch.object(Config, 'PROFILE_DIR', self.directory):
+            client = app.test_client()
+
+            with client.get("/api", headers={Config.PROFILE_HEADER: "0.forged"}):
+                pass
+
+            self.assertEqual(os.listdir(self.directory), [])
+
+            with client.get("/api", headers={Config.PROFILE_HEADER: sign_token("secret", time.time() + 60)}) as profiled:
+                self.assertIn("total;dur=", profiled.headers["Server-Timing"])
+
+        summary, = [name for name in os.listdir(self.directory) if name.endswith(".json")]
+
+        with open(os.path.join(self.directory, summary)) as handle:
+            details = json.load(handle)
+
+        self.assertEqual((details["route"], details["status"], details["reason"]), ("/api", 200, "token"))
+        self.assertIn("rate_limit", details["phases"])
+        self.assertTrue(os.path.exists(os.path.join(self.directory, summary[:-len(".json")] + ".folded")))
+
+
+if __name__ == '__main__':
+    unittest.main()
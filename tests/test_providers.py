@@ -0,0 +1,110 @@
+import time
+import unittest
+from unittest.mock import patch
+import requests
+from app.config import Config
+from app.services.currency_service import CurrencyService
+from app.services.providers import RateProvider
+from app.services.rate_cache import decode_rate
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.errors import ServiceUnavailableError, NotFoundError
+from tests.fakes import FakeRedisClient
+
+class StubProvider(RateProvider):
+    def __init__(self, name, rate, delay=0.0, error=None):
+        super().__init__(session=None)
+        self.name = self.label = name
+        self.rate, self.delay, self.error = rate, delay, error
+        self.calls = 0
+
+    def request_rates(self, from_currency, to_currencies):
+        self.calls += 1
+        time.sleep(self.delay)
+
+        if self.error:
+            raise self.error
+
+        return {to_currency: {'rate': self.rate, 'timestamp': self.name} for to_currency in to_currencies}
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_threshold_and_lets_one_trial_through(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+
+        self.assertFalse(breaker.record_failure())
+        self.assertTrue(breaker.record_failure())
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_provider_stops_calling_after_repeated_failures(self):
+        provider = StubProvider("xe", 0.9, error=requests.exceptions.ConnectionError("refused"))
+
+        provider.breaker = CircuitBreaker(3, 60)
+
+        for _ in range(5):
+            with self.assertRaises((requests.exceptions.ConnectionError, ServiceUnavailableError)):
+                provider.fetch_rates("USD", ["EUR"])
+
+        self.assertEqual(provider.calls, 3)
+
+    def test_bad_requests_do_not_trip_the_breaker(self):
+        provider = StubProvider("xe", 0.9, error=NotFoundError("USD || XXX"))
+        provider.breaker = CircuitBreaker(1, 60)
+
+        with self.assertRaises(NotFoundError):
+            provider.fetch_rates("USD", ["XXX"])
+
+        self.assertTrue(provider.available())
+
+    def test_providers_must_implement_request_rates(self):
+        class Incomplete(RateProvider):
+            name = label = "incomplete"
+
+        with self.assertRaises(TypeError):
+            Incomplete(session=None)
+
+class TestHedgedFetch(unittest.TestCase):
+
+    def setUp(self):
+        self.redis_client = FakeRedisClient()
+        self.service = CurrencyService(self.redis_client)
+
+    def test_slow_primary_is_hedged_to_secondary(self):
+        primary = StubProvider("open_xr", 1.1, delay=0.5)
+        secondary = StubProvider("xe", 0.9)
+        self.service.providers = {"v1": primary, "v2": secondary}
+
+        with patch.object(Config, "HEDGE_ENABLED", True), patch.object(Config, "HEDGE_DEFAULT_DELAY_MS", 20):
+            started = time.monotonic()
+            rates = self.service.fetch_rates_v1("USD", ["EUR"])
+
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertEqual(rates["EUR"]['rate'], 0.9)
+        self.assertEqual(decode_rate(self.redis_client.get_value("v1_USD_EUR"))['rate'], 0.9)
+
+    def test_failing_primary_falls_over_to_secondary(self):
+        primary = StubProvider("open_xr", 1.1, error=ServiceUnavailableError("down"))
+        secondary = StubProvider("xe", 0.9)
+        self.service.providers = {"v1": primary, "v2": secondary}
+
+        with patch.object(Config, "HEDGE_ENABLED", True):
+            self.assertEqual(self.service.fetch_rates_v1("USD", ["EUR"])["EUR"]['rate'], 0.9)
+
+    def test_fast_primary_is_not_hedged(self):
+        primary = StubProvider("xe", 0.9)
+        secondary = StubProvider("open_xr", 1.1)
+        self.service.providers = {"v1": secondary, "v2": primary}
+
+        with patch.object(Config, "HEDGE_ENABLED", True):
+            self.service.fetch_rates_v2("USD", ["EUR"])
+
+        self.assertEqual((primary.calls, secondary.calls), (1, 0))
+
+if __name__ == '__main__':
+    unittest.main()
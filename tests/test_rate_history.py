@@ -0,0 +1,31 @@
+import unittest
+from app.services.rate_history import RateHistoryStore, downsample
+from tests.fakes import FakeRedisClient
+
+DAY_START = 1704067200  # 2024-01-01T00:00:00Z
+
+class TestRateHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.store = RateHistoryStore(FakeRedisClient())
+        hourly = [("USD", "EUR", 0.9 + hour / 1000, DAY_START + hour * 3600) for hour in range(48)]
+        self.store.append("v2", hourly)
+        self.store.append("v2", [("USD", "GBP", 0.8, DAY_START)])
+
+    def test_range_spans_daily_series(self):
+        points = self.store.range("v2", "USD", "EUR", DAY_START + 22 * 3600, DAY_START + 26 * 3600)
+
+        self.assertEqual([timestamp for timestamp, _ in points], [DAY_START + hour * 3600 for hour in range(22, 26)])
+        self.assertEqual(len(self.store.redis_client.get_value("history_v2_USD_EUR_20240101")), 24 * 16)
+
+    def test_downsample_to_daily_bars(self):
+        points = self.store.range("v2", "USD", "EUR", DAY_START, DAY_START + 2 * 86400)
+        bars = downsample(points, DAY_START, 86400)
+
+        self.assertEqual(len(bars), 2)
+        self.assertEqual(bars[0]["timestamp"], "2024-01-01T00:00:00Z")
+        self.assertEqual((bars[0]["open"], bars[0]["close"], bars[0]["count"]), (0.9, 0.923, 24))
+        self.assertAlmostEqual(bars[1]["mean"], 0.9355)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from unittest.mock import Mock, patch
+from redis.exceptions import ConnectionError
+from app.utils.rate_limiting import RateLimiter, LocalRateLimiter, parse_limit_map
+
+class TestRateLimiting(unittest.TestCase):
+
+    def test_local_limiter_is_bounded(self):
+        limiter = LocalRateLimiter(max_keys=2)
+
+        self.assertTrue(limiter.hit("a", 2, 60).allowed)
+        self.assertTrue(limiter.hit("a", 2, 60).allowed)
+        result = limiter.hit("a", 2, 60)
+        self.assertFalse(result.allowed)
+        self.assertEqual(result.remaining, 0)
+
+        limiter.hit("b", 2, 60)
+        limiter.hit("c", 2, 60)
+        self.assertEqual(list(limiter.requests), ["b", "c"])
+
+    @patch('app.utils.rate_limiting.Config.RATE_LIMIT_ROUTES', "/api/v2/conversion/batch=10/60")
+    @patch('app.utils.rate_limiting.Config.RATE_LIMIT_API_KEYS', "partner=5000/3600")
+    def test_resolve_route_and_api_key_limits(self):
+        limiter = RateLimiter()
+
+        self.assertEqual(limiter.resolve("1.2.3.4", "/api/v2/conversion", None), ("ratelimit:default:ip:1.2.3.4", 60, 3600))
+        self.assertEqual(limiter.resolve("1.2.3.4", "/api/v2/conversion/batch", "unknown"), ("ratelimit:/api/v2/conversion/batch:ip:1.2.3.4", 10, 60))
+        self.assertEqual(limiter.resolve("1.2.3.4", "/api/v2/conversion", "partner"), ("ratelimit:default:key:partner", 5000, 3600))
+        self.assertEqual(parse_limit_map(""), {})
+
+    def test_redis_script_and_local_fallback(self):
+        redis_client = Mock()
+        script = redis_client.register_script.return_value
+        script.return_value = [1, 59, 3600000]
+        limiter = RateLimiter(redis_client)
+
+        result = limiter.hit("ratelimit:default:ip:1.2.3.4", 60, 3600)
+        self.assertEqual((result.allowed, result.remaining, result.reset), (True, 59, 3600))
+        self.assertEqual(script.call_args.kwargs["args"][:2], [60, 3600000])
+
+        script.side_effect = ConnectionError("down")
+        self.assertTrue(limiter.hit("ratelimit:default:ip:1.2.3.4", 60, 3600).allowed)
+        self.assertTrue(limiter.hit("ratelimit:default:ip:1.2.3.4", 60, 3600).allowed)
+
+        # Redis is skipped during the retry window rather than timing out on every request
+        self.assertEqual(script.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
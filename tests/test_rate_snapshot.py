@@ -0,0 +1,75 @@
+import os
+import time
+import tempfile
+import unittest
+from unittest.mock import patch
+from app.services.currency_service import CurrencyService
+from app.services.rate_snapshot import RateSnapshot, SnapshotReader, SnapshotRefresher, snapshot_path, write_snapshot
+from tests.fakes import FakeRedisClient
+
+class TestRateSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = snapshot_path("v2", self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_written_pairs_are_read_back_from_the_mapping(self):
+        fetched_at = time.time()
+        write_snapshot(self.path, 1, [("USD", "EUR", 0.95, "2024-01-01T00:00:00Z", fetched_at), ("GBP", "USD", 1.27, "2024-01-01T00:00:00Z", fetched_at)])
+
+        snapshot = RateSnapshot(self.path)
+
+        self.assertEqual(snapshot.generation, 1)
+        self.assertEqual(snapshot.lookup("USD", "EUR"), {'rate': 0.95, 'timestamp': "2024-01-01T00:00:00Z", 'fetched_at': fetched_at})
+        self.assertIsNone(snapshot.lookup("EUR", "USD"))
+        self.assertIsNone(snapshot.lookup("USD", "JPY"))
+
+    @patch('app.services.rate_snapshot.Config.SNAPSHOT_CHECK_INTERVAL', 0)
+    def test_reader_maps_the_replacement_file(self):
+        reader = SnapshotReader("v2", self.directory.name)
+        self.assertIsNone(reader.lookup("USD", "EUR"))
+
+        write_snapshot(self.path, 1, [("USD", "EUR", 0.95, "2024-01-01T00:00:00Z", time.time())])
+        self.assertEqual(reader.lookup("USD", "EUR")['rate'], 0.95)
+
+        write_snapshot(self.path, 2, [("USD", "EUR", 0.97, "2024-01-02T00:00:00Z", time.time())])
+        self.assertEqual(reader.lookup("USD", "EUR")['rate'], 0.97)
+        self.assertEqual(reader.current().generation, 2)
+
+    def test_refresher_collects_cached_pairs_from_redis(self):
+        redis_client = FakeRedisClient()
+        service = CurrencyService(redis_client)
+        service.store_rates("v2", "USD", {"EUR": {'rate': 0.95, 'timestamp': "2024-01-01T00:00:00Z"}, "CHF": {'rate': 0.88, 'timestamp': "2024-01-01T00:00:00Z"}})
+        service.store_rates("v2", "GBP", {"JPY": {'rate': 190.5, 'timestamp': "2024-01-01T00:00:00Z"}})
+        redis_client.set_value("v2_currencies_abc", "not a rate", 86400)
+
+        # An expired rate leaves the pair set on the next collection
+        redis_client.store.pop("v2_USD_CHF")
+
+        refresher = SnapshotRefresher(redis_client, self.directory.name)
+        entries = sorted(entry[:3] for entry in refresher.collect("v2"))
+
+        self.assertEqual(entries, [("GBP", "JPY", 190.5), ("USD", "EUR", 0.95)])
+        self.assertEqual(redis_client.sets["cached_pairs_v2"], {"USD_EUR", "GBP_JPY"})
+
+    @patch('app.services.rate_snapshot.Config.SNAPSHOT_CHECK_INTERVAL', 0)
+    @patch('app.services.currency_service.Config.SNAPSHOT_ENABLED', True)
+    def test_service_answers_from_the_snapshot_before_redis(self):
+        redis_client = FakeRedisClient()
+        CurrencyService(redis_client).store_rates("v2", "USD", {"EUR": {'rate': 0.95, 'timestamp': "2024-01-01T00:00:00Z"}})
+        SnapshotRefresher(redis_client, self.directory.name).run_once()
+
+        with patch('app.services.rate_snapshot.Config.SNAPSHOT_DIR', self.directory.name):
+            service = CurrencyService(redis_client)
+
+        redis_client.store.clear()
+
+        self.assertEqual(service.get_conversion_rate_v2("USD", "EUR"), {'rate': 0.95, 'timestamp': "2024-01-01T00:00:00Z"})
+        self.assertTrue(os.path.exists(snapshot_path("v1", self.directory.name)))
+
+
+if __name__ == '__main__':
+    unittest.main()
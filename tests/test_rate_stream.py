@@ -0,0 +1,110 @@
+import json
+import unittest
+from unittest.mock import patch
+from app import create_app
+from app.services.currency_service import CurrencyService
+from app.services.rate_stream import RateStreamBroker, table_update_message
+from app.services.rate_table import RateTable
+from app.utils.errors import ServiceUnavailableError
+from tests.fakes import FakeRedisClient
+
+
+def parse_events(chunk):
+    events = []
+
+    for block in chunk.decode('utf-8').strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n") if line.startswith(("event", "data")))
+
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+
+    return events
+
+
+class TestRateStream(unittest.TestCase):
+
+    def setUp(self):
+        self.redis_client = FakeRedisClient()
+        self.service = CurrencyService(self.redis_client)
+        self.broker = RateStreamBroker(self.redis_client)
+
+    def test_stored_rates_reach_only_subscribers_of_that_pair(self):
+        euro = self.broker.subscribe("v2", [("USD", "EUR")])
+        yen = self.broker.subscribe("v2", [("USD", "JPY")])
+
+        self.service.store_rates("v2", "USD", {"EUR": {'rate': 0.9, 'timestamp': "t1"}, "GBP": {'rate': 0.8, 'timestamp': "t1"}})
+
+        updates = euro.wait(0)
+        self.assertEqual([(u['from'], u['to'], u['rate'], u['timestamp']) for u in updates], [("USD", "EUR", 0.9, "t1")])
+        self.assertIsNotNone(updates[0]['fetched_at'])
+        self.assertEqual(yen.wait(0), [])
+
+    def test_unchanged_rates_are_not_pushed_again_and_pending_updates_coalesce(self):
+        subscription = self.broker.subscribe("v2", [("USD", "EUR")])
+
+        self.service.store_rates("v2", "USD", {"EUR": {'rate': 0.9, 'timestamp': "t1"}})
+        self.service.store_rates("v2", "USD", {"EUR": {'rate': 0.91, 'timestamp': "t2"}})
+        self.assertEqual([u['rate'] for u in subscription.wait(0)], [0.91])
+
+        self.service.store_rates("v2", "USD", {"EUR": {'rate': 0.91, 'timestamp': "t2"}})
+        self.assertEqual(subscription.wait(0), [])
+
+    def test_table_updates_push_cross_rates_to_v1_subscribers(self):
+        subscription = self.broker.subscribe("v1", [("EUR", "GBP")])
+        table = RateTable("USD", {"EUR": 0.9, "GBP": 0.75}, "v1", "t1", fetched_at=100.0)
+
+        self.redis_client.publish(self.broker.channel, table_update_message(table))
+
+        update, = subscription.wait(0)
+        self.assertEqual(update['rate'], 0.75 / 0.9)
+        self.assertEqual(update['fetched_at'], 100.0)
+
+    def test_connection_limit_and_unsubscribe(self):
+        with patch('app.config.Config.RATE_STREAM_MAX_CONNECTIONS', 1):
+            subscription = self.broker.subscribe("v2", [("USD", "EUR")])
+
+            with self.assertRaises(ServiceUnavailableError):
+                self.broker.subscribe("v2", [("USD", "EUR")])
+
+            self.broker.unsubscribe(subscription)
+            self.assertEqual(self.broker.watchers, {})
+            self.broker.unsubscribe(self.broker.subscribe("v2", [("USD", "EUR")]))
+
+    @patch('app.config.Config.RATE_STREAM_HEARTBEAT', 0.01)
+    def test_endpoint_sends_current_rates_then_pushed_updates(self):
+        app = create_app()
+        app.rate_limiter.script = None
+        app.currency_service = self.service
+        app.rate_stream = self.broker
+        self.service.store_rates("v2", "USD", {"EUR": {'rate': 0.9, 'timestamp': "t1"}})
+
+        response = app.test_client().get("/api/v2/conversion/stream?pairs=usd_eur", buffered=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "text/event-stream")
+
+        chunks = iter(response.response)
+        self.assertEqual(next(chunks), b"retry: 3000\n\n")
+        self.assertEqual(parse_events(next(chunks)), [("rate", {"from": "USD", "to": "EUR", "rate": 0.9, "timestamp": "t1"})])
+
+        self.assertEqual(next(chunks), b": heartbeat\n\n")
+        self.service.store_rates("v2", "USD", {"EUR": {'rate': 0.95, 'timestamp': "t2"}})
+        (event, data), = parse_events(next(chunks))
+
+        self.assertEqual((event, data['rate']), ("rate", 0.95))
+
+        response.close()
+        self.assertEqual(self.broker.connections, 0)
+
+    def test_endpoint_rejects_bad_pairs(self):
+        app = create_app()
+        app.rate_limiter.script = None
+        app.rate_stream = self.broker
+
+        response = app.test_client().get("/api/v2/conversion/stream?pairs=USDEUR")
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.broker.connections, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
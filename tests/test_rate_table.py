@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import Mock, patch
+from app.services.rate_table import RateTable
+from app.services.currency_service import CurrencyService
+from app.cache.redis_client import CacheUnavailableError
+from app.utils.errors import NotFoundError
+from tests.fakes import FakeRedisClient
+
+OPEN_XR_RESPONSE = {
+    "timestamp": 1700000000,
+    "base": "USD",
+    "rates": {"EUR": 0.9, "GBP": 0.8, "JPY": 150.0}
+}
+
+class TestRateTable(unittest.TestCase):
+
+    def test_cross_rate(self):
+        table = RateTable.from_response(OPEN_XR_RESPONSE)
+
+        self.assertEqual(table.cross_rate("USD", "EUR"), 0.9)
+        self.assertEqual(table.cross_rate("EUR", "USD"), 1 / 0.9)
+        self.assertEqual(table.cross_rate("GBP", "JPY"), 187.5)
+
+        # Small cross rates keep their significant digits
+        small = RateTable("USD", {"IDR": 15800.0, "BTC": 0.0000155}, 1, "t")
+        self.assertAlmostEqual(small.cross_rate("IDR", "BTC") / (0.0000155 / 15800.0), 1.0, places=12)
+
+        with self.assertRaises(NotFoundError):
+            table.cross_rate("USD", "XYZ")
+
+    def test_json_round_trip(self):
+        table = RateTable.from_response(OPEN_XR_RESPONSE)
+        restored = RateTable.from_json(table.to_json())
+
+        self.assertEqual(restored.rates, table.rates)
+        self.assertEqual(restored.version, 1700000000)
+        self.assertEqual(restored.timestamp, "2023-11-14T22:13:20Z")
+
+    def test_hash_round_trip_reads_only_requested_currencies(self):
+        table = RateTable.from_response(OPEN_XR_RESPONSE)
+        fields = table.to_hash()
+
+        restored = RateTable.from_hash({key: fields[key] for key in ("_meta", "EUR", "GBP")})
+
+        self.assertEqual(restored.rates, {"EUR": 0.9, "GBP": 0.8})
+        self.assertEqual(restored.cross_rate("EUR", "GBP"), 0.8 / 0.9)
+        self.assertIsNone(RateTable.from_hash({"EUR": b"0.9"}))
+
+    @patch('app.services.currency_service.Config.OPEN_XR_TABLE_MODE', True)
+    @patch('app.services.currency_service.build_session')
+    def test_table_mode_fetches_once(self, mock_build_session):
+        redis_client = FakeRedisClient()
+        mock_get = mock_build_session.return_value.get
+        mock_get.return_value.json.return_value = OPEN_XR_RESPONSE
+
+        service = CurrencyService(redis_client)
+        self.assertEqual(service.get_conversion_rate_v1("EUR", "GBP")['rate'], 0.8 / 0.9)
+        self.assertEqual(service.get_conversion_rate_v1("GBP", "JPY")['rate'], 187.5)
+
+        mock_get.assert_called_once()
+        self.assertEqual(redis_client.get_hash_fields("v1_table_USD", ["JPY"]), [b"150.0"])
+
+    @patch('app.services.currency_service.Config.OPEN_XR_TABLE_MODE', True)
+    @patch('app.services.currency_service.build_session')
+    def test_table_mode_bypasses_a_degraded_cache(self, mock_build_session):
+        redis_client = FakeRedisClient()
+        redis_client.get_hash_fields = Mock(side_effect=CacheUnavailableError("Redis is in degraded mode."))
+        redis_client.set_hash = Mock(side_effect=CacheUnavailableError("Redis is in degraded mode."))
+        mock_build_session.return_value.get.return_value.json.return_value = OPEN_XR_RESPONSE
+
+        service = CurrencyService(redis_client)
+
+        self.assertEqual(service.get_conversion_rate_v1("GBP", "JPY")['rate'], 187.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,19 +1,23 @@
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import patch
+from app.cache.redis_client import CacheUnavailableError
 from app.services.currency_service import CurrencyService
-from app.utils.errors import InvalidCurrencyCode, UnprocessableEntityError
+from app.utils.errors import UnprocessableEntityError, BadRequestError, ServiceUnavailableError
+from tests.fakes import FakeRedisClient
 
 class TestCurrencyService(unittest.TestCase):
     
-    @patch('services.currency_service.requests.get')
-    def test_get_conversion_rate_v1(self, mock_get):
+    @patch('app.services.currency_service.build_session')
+    def test_get_conversion_rate_v1(self, mock_build_session):
        
         # Setup
-        mock_redis_client = Mock()
-        service = CurrencyService(mock_redis_client)
+        mock_get = mock_build_session.return_value.get
+        service = CurrencyService(FakeRedisClient())
+        mock_get.return_value.status_code = 200
         mock_get.return_value.json.return_value = {
-            "meta": {"timestamp": 1449885661, "rate": 1.383702},
-            "response": 27673.975864
+            "timestamp": 1449885661,
+            "base": "GBP",
+            "rates": {"EUR": 1.383702}
         }
 
         # Test successful retrieval
@@ -22,13 +26,46 @@ class TestCurrencyService(unittest.TestCase):
         self.assertIn('timestamp', result)
 
         # Test invalid currency code
-        with self.assertRaises(InvalidCurrencyCode):
+        with self.assertRaises(UnprocessableEntityError):
             service.get_conversion_rate_v1("FAKE", "EUR")
 
         # Test HTTP error handling
         mock_get.side_effect = Exception("HTTP Error")
-        with self.assertRaises(UnprocessableEntityError):
-            service.get_conversion_rate_v1("GBP", "EUR")
+        with self.assertRaises(BadRequestError):
+            service.get_conversion_rate_v1("GBP", "USD")
+
+    @patch('app.services.currency_service.build_session')
+    def test_degraded_cache_is_bypassed(self, mock_build_session):
+        redis_client = FakeRedisClient()
+        service = CurrencyService(redis_client)
+        mock_get = mock_build_session.return_value.get
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"timestamp": "2024-01-01T00:00:00Z", "to": [{"quotecurrency": "EUR", "mid": 0.95}]}
+
+        with patch.object(redis_client, 'get_value', side_effect=CacheUnavailableError("Redis is in degraded mode.")), \
+             patch.object(redis_client, 'set_values', side_effect=CacheUnavailableError("Redis is in degraded mode.")):
+            self.assertEqual(service.get_conversion_rate_v2("USD", "EUR"), {'rate': 0.95, 'timestamp': "2024-01-01T00:00:00Z"})
+            self.assertEqual(service.get_conversion_rates_batch([("USD", "EUR")], version="v2"), {("USD", "EUR"): {'rate': 0.95, 'timestamp': "2024-01-01T00:00:00Z"}})
+
+    @patch('app.services.currency_service.build_session')
+    def test_open_xr_quota_error_is_not_negative_cached(self, mock_build_session):
+        redis_client = FakeRedisClient()
+        service = CurrencyService(redis_client)
+        mock_get = mock_build_session.return_value.get
+        mock_get.return_value.status_code = 429
+        mock_get.return_value.json.return_value = {"error": True, "status": 429, "message": "too_many_requests", "description": "Quota exceeded."}
+
+        with self.assertRaises(ServiceUnavailableError):
+            service.get_conversion_rate_v1("USD", "EUR")
+
+        self.assertIsNone(redis_client.get_value("missing_v1_USD_EUR"))
+        self.assertEqual(service.providers["v1"].breaker.failures, 1)
+
+        # Once the provider recovers the pair is fetched again
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"timestamp": 1449885661, "base": "USD", "rates": {"EUR": 0.9}}
+
+        self.assertEqual(service.get_conversion_rate_v1("USD", "EUR")['rate'], 0.9)
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
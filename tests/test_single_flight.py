@@ -0,0 +1,107 @@
+import time
+import threading
+import asyncio
+import unittest
+from unittest.mock import patch
+from redis.exceptions import ConnectionError as RedisConnectionError
+from app.cache.async_single_flight import AsyncSingleFlight
+from app.cache.single_flight import SingleFlight
+from app.services.currency_service import CurrencyService
+from app.services.rate_cache import encode_rate
+from app.utils.errors import ServiceUnavailableError
+from tests.fakes import FakeRedisClient, FakeAsyncRedisClient
+
+class LocklessRedisClient(FakeRedisClient):
+    """Reads and writes work, but the lock commands fail."""
+
+    def acquire_lock(self, key, token, ttl_ms):
+        raise RedisConnectionError("lock unavailable")
+
+    def release_lock(self, key, token):
+        raise RedisConnectionError("lock unavailable")
+
+CONCURRENT_MISSES = 300
+
+class TestSingleFlight(unittest.TestCase):
+
+    @patch('app.services.currency_service.build_session')
+    def test_concurrent_misses_fetch_once(self, mock_build_session):
+        upstream_calls = []
+
+        def slow_upstream(url, **kwargs):
+            upstream_calls.append(url)
+            time.sleep(0.2)
+            response = mock_build_session.return_value.get.return_value
+            response.status_code = 200
+            response.json.return_value = {"timestamp": "2024-01-01T00:00:00Z", "to": [{"quotecurrency": "EUR", "mid": 0.9}]}
+            return response
+
+        mock_build_session.return_value.get.side_effect = slow_upstream
+        service = CurrencyService(FakeRedisClient())
+        barrier = threading.Barrier(CONCURRENT_MISSES)
+        results = []
+
+        def request_rate():
+            barrier.wait()
+            results.append(service.get_conversion_rate_v2("USD", "EUR"))
+
+        threads = [threading.Thread(target=request_rate) for _ in range(CONCURRENT_MISSES)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(upstream_calls), 1)
+        self.assertEqual(len(results), CONCURRENT_MISSES)
+        self.assertTrue(all(result['rate'] == 0.9 for result in results))
+
+    def test_waiter_falls_back_to_last_known_value(self):
+        redis_client = FakeRedisClient()
+        redis_client.acquire_lock("lock_v2_USD_EUR", "other-worker", 10000)
+        redis_client.set_value("v2_USD_EUR", encode_rate(0.8, "old", fetched_at=0), 86400)
+
+        single_flight = SingleFlight(redis_client, wait_ms=50, poll_ms=10)
+        value = single_flight.load(
+            "v2_USD_EUR",
+            read_fresh=lambda: None,
+            fetch=lambda: self.fail("waiter must not call upstream"),
+            read_last_known=lambda: redis_client.get_value("v2_USD_EUR")
+        )
+        self.assertTrue(value.startswith(b"0.8|old"))
+
+        with self.assertRaises(ServiceUnavailableError):
+            single_flight.load("v2_USD_EUR", read_fresh=lambda: None, fetch=lambda: None)
+
+    def test_lock_errors_fall_back_to_an_unlocked_fetch(self):
+        single_flight = SingleFlight(LocklessRedisClient())
+
+        self.assertEqual(single_flight.load("v2_USD_EUR", read_fresh=lambda: None, fetch=lambda: 0.9), 0.9)
+
+        fetched = []
+        self.assertTrue(single_flight.try_run("v2_USD_EUR", lambda: fetched.append("USD_EUR")))
+        self.assertTrue(single_flight.try_run_many(["v2_USD_EUR", "v2_USD_JPY"], fetched.extend))
+        self.assertEqual(fetched, ["USD_EUR", "v2_USD_EUR", "v2_USD_JPY"])
+
+    @patch('app.services.currency_service.build_session')
+    def test_lock_errors_do_not_fail_conversions(self, mock_build_session):
+        response = mock_build_session.return_value.get.return_value
+        response.status_code = 200
+        response.json.return_value = {"timestamp": "2024-01-01T00:00:00Z", "to": [{"quotecurrency": "EUR", "mid": 0.9}]}
+
+        service = CurrencyService(LocklessRedisClient())
+        self.assertEqual(service.get_conversion_rate_v2("USD", "EUR")['rate'], 0.9)
+
+    def test_async_lock_errors_fall_back_to_an_unlocked_fetch(self):
+        redis_client = FakeAsyncRedisClient(LocklessRedisClient())
+        single_flight = AsyncSingleFlight(redis_client)
+
+        async def read_fresh():
+            return None
+
+        async def fetch():
+            return 0.9
+
+        self.assertEqual(asyncio.run(single_flight.load("v2_USD_EUR", read_fresh, fetch)), 0.9)
+
+if __name__ == '__main__':
+    unittest.main()
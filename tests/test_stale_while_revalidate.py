@@ -0,0 +1,81 @@
+import time
+import threading
+import unittest
+from unittest.mock import patch
+from app.services.currency_service import CurrencyService
+from app.services.rate_cache import encode_rate, decode_rate
+from tests.fakes import FakeRedisClient
+
+class TestStaleWhileRevalidate(unittest.TestCase):
+
+    @patch('app.services.currency_service.build_session')
+    def test_stale_rate_is_served_and_refreshed_once(self, mock_build_session):
+        release_upstream = threading.Event()
+        upstream_calls = []
+
+        def slow_upstream(url, **kwargs):
+            upstream_calls.append(url)
+            release_upstream.wait(2)
+            return mock_build_session.return_value.get.return_value
+
+        response = mock_build_session.return_value.get.return_value
+        response.status_code = 200
+        response.json.return_value = {"timestamp": "new", "to": [{"quotecurrency": "EUR", "mid": 0.95}]}
+        mock_build_session.return_value.get.side_effect = slow_upstream
+
+        redis_client = FakeRedisClient()
+        redis_client.set_value("v2_USD_EUR", encode_rate(0.9, "old", fetched_at=time.time() - 7200), 86400)
+        service = CurrencyService(redis_client)
+
+        # Every request past the soft TTL gets the stale value without waiting on upstream
+        for _ in range(20):
+            self.assertEqual(service.get_conversion_rate_v2("USD", "EUR"), {'rate': 0.9, 'timestamp': "old"})
+
+        release_upstream.set()
+        deadline = time.time() + 2
+        while decode_rate(redis_client.get_value("v2_USD_EUR"))['rate'] != 0.95 and time.time() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(len(upstream_calls), 1)
+        self.assertEqual(service.get_conversion_rate_v2("USD", "EUR"), {'rate': 0.95, 'timestamp': "new"})
+
+    @patch('app.services.currency_service.build_session')
+    def test_batch_and_single_refreshes_share_per_pair_locks(self, mock_build_session):
+        release_upstream = threading.Event()
+        upstream_calls = []
+
+        def slow_upstream(url, **kwargs):
+            upstream_calls.append(url)
+            release_upstream.wait(2)
+            return mock_build_session.return_value.get.return_value
+
+        response = mock_build_session.return_value.get.return_value
+        response.status_code = 200
+        response.json.return_value = {"timestamp": "new", "to": [{"quotecurrency": "EUR", "mid": 0.95}, {"quotecurrency": "JPY", "mid": 150.0}]}
+        mock_build_session.return_value.get.side_effect = slow_upstream
+
+        redis_client = FakeRedisClient()
+        redis_client.set_value("v2_USD_EUR", encode_rate(0.9, "old", fetched_at=time.time() - 7200), 86400)
+        redis_client.set_value("v2_USD_JPY", encode_rate(140.0, "old", fetched_at=time.time() - 7200), 86400)
+        service = CurrencyService(redis_client)
+
+        def wait_for_calls(count):
+            deadline = time.time() + 2
+            while len(upstream_calls) < count and time.time() < deadline:
+                time.sleep(0.01)
+
+        service.get_conversion_rate_v2("USD", "EUR")
+        wait_for_calls(1)
+
+        # The batch only refreshes the pair the single conversion is not already refreshing
+        service.get_conversion_rates_batch([("USD", "EUR"), ("USD", "JPY")])
+        wait_for_calls(2)
+
+        release_upstream.set()
+
+        self.assertEqual(len(upstream_calls), 2)
+        self.assertIn("to=EUR", upstream_calls[0])
+        self.assertIn("to=JPY", upstream_calls[1])
+
+if __name__ == '__main__':
+    unittest.main()
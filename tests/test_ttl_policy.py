@@ -0,0 +1,133 @@
+import time
+import unittest
+from unittest.mock import patch
+from app import create_app
+from app.config import Config
+from app.services.currency_service import CurrencyService
+from app.services.rate_cache import decode_rate, encode_rate
+from app.services.ttl_policy import TtlPolicy, QuotaMonitor, observe_drift, next_quota_state
+from tests.fakes import FakeRedisClient
+
+HOUR = 3600
+MONTH = 30 * 86400
+
+
+def account(remaining, limit=100000, reset="2024-02-01T00:00:00Z"):
+    return {"package_limit": limit, "package_limit_remaining": remaining, "package_limit_reset": reset}
+
+
+@patch.object(Config, 'ADAPTIVE_TTL_ENABLED', True)
+class TestTtlPolicy(unittest.TestCase):
+
+    def test_drift_is_relative_change_per_second_smoothed_over_fetches(self):
+        first = observe_drift({'rate': 1.0, 'fetched_at': 0.0, 'drift': None}, 1.01, 100.0)
+        self.assertAlmostEqual(first, 0.0001)
+
+        second = observe_drift({'rate': 1.01, 'fetched_at': 100.0, 'drift': first}, 1.01, 200.0)
+        self.assertAlmostEqual(second, 0.7 * first)
+
+        self.assertIsNone(observe_drift(None, 1.0, 100.0))
+
+    def test_volatile_pairs_get_shorter_ttls_and_stable_pairs_longer(self):
+        policy = TtlPolicy(FakeRedisClient())
+
+        self.assertEqual(policy.soft_ttl("v2", {'drift': None}), Config.RATE_SOFT_TTL)
+        self.assertEqual(policy.soft_ttl("v2", {'drift': 1e-3}), Config.ADAPTIVE_TTL_MIN)
+        self.assertAlmostEqual(policy.soft_ttl("v2", {'drift': 5e-8}), 10000)
+        self.assertEqual(policy.soft_ttl("v2", {'drift': 0.0}), Config.ADAPTIVE_TTL_MAX)
+
+        with patch.object(Config, 'ADAPTIVE_TTL_ENABLED', False):
+            self.assertEqual(TtlPolicy(FakeRedisClient()).soft_ttl("v2", {'drift': 1e-3}), Config.RATE_SOFT_TTL)
+
+    def test_scale_follows_spend_against_the_budget(self):
+        reset = 1706745600.0
+        state = next_quota_state(None, account(50000), reset - MONTH / 2)
+        self.assertEqual(state["scale"], 1.0)
+
+        # Twice the affordable rate: the scale grows by at most one step per reading
+        affordable = state["affordable_per_hour"] / HOUR
+        overspent = next_quota_state(state, account(50000 - int(2 * affordable * 300)), state["read_at"] + 300)
+        self.assertEqual(overspent["scale"], 1.25)
+
+        # No calls at all: the scale eases back, but never below 1
+        idle = next_quota_state(overspent, account(overspent["remaining"]), overspent["read_at"] + 300)
+        self.assertEqual(idle["scale"], 1.0)
+
+        with patch.object(Config, 'XE_MONTHLY_BUDGET', 50000):
+            exhausted = next_quota_state(idle, account(50000), idle["read_at"] + 300)
+
+        self.assertEqual(exhausted["budget_left"], 0)
+        self.assertEqual(exhausted["scale"], Config.RATE_HARD_TTL / Config.ADAPTIVE_TTL_MIN)
+        self.assertIsNone(next_quota_state(idle, {"package_limit": 100000}, idle["read_at"] + 300))
+
+    def test_spend_settles_within_budget_at_any_traffic_level(self):
+        # Up to the fleet refreshing every pair once per RATE_HARD_TTL, which 100k calls a month covers for 3000 pairs
+        for keys in (200, 1000, 3000):
+            reset = 1706745600.0
+            remaining, read_at, state = 100000, reset - MONTH, None
+
+            for _ in range(500):
+                state = next_quota_state(state, account(remaining, reset=reset), read_at)
+                spend_per_second = keys / min(Config.RATE_SOFT_TTL * state["scale"], Config.RATE_HARD_TTL)
+                remaining -= int(spend_per_second * 300)
+                read_at += 300
+
+            self.assertLessEqual(state["spending_per_hour"], state["affordable_per_hour"] * 1.3, keys)
+            self.assertGreater(state["budget_left"], 0, keys)
+
+    def test_workers_share_one_quota_reading_through_redis(self):
+        redis_client = FakeRedisClient()
+        first, second = TtlPolicy(redis_client), TtlPolicy(redis_client)
+
+        first.update_quota(account(90000), 1000.0)
+        first.update_quota(account(80000), 1300.0)
+        adopted = second.update_quota(account(80000), 1300.0)
+
+        self.assertEqual(adopted, first.quota)
+        self.assertGreater(second.scale, 1.0)
+
+    def test_service_stores_drift_and_refreshes_volatile_pairs_sooner(self):
+        redis_client = FakeRedisClient()
+        service = CurrencyService(redis_client)
+
+        redis_client.set_value("v2_USD_EUR", encode_rate(0.9, "t0", time.time() - 1000), 3600)
+        redis_client.set_value("v2_USD_TRY", encode_rate(30.0, "t0", time.time() - 1000), 3600)
+
+        service.store_rates("v2", "USD", {"EUR": {'rate': 0.9, 'timestamp': "t1"}, "TRY": {'rate': 33.0, 'timestamp': "t1"}})
+
+        stable = decode_rate(redis_client.get_value("v2_USD_EUR"))
+        volatile = decode_rate(redis_client.get_value("v2_USD_TRY"))
+
+        self.assertEqual(stable['drift'], 0.0)
+        self.assertAlmostEqual(volatile['drift'], 1e-4, places=6)
+        self.assertGreater(service.ttl_policy.soft_ttl("v2", stable), service.ttl_policy.soft_ttl("v2", volatile))
+
+    def test_quota_monitor_reads_account_info(self):
+        service = CurrencyService(FakeRedisClient())
+
+        with patch.object(service, 'get_account_info_document', return_value={'fetched_at': 500.0, 'body': '{"package_limit": 1000, "package_limit_remaining": 400}'}):
+            quota = QuotaMonitor(service).check()
+
+        self.assertEqual((quota["remaining"], service.ttl_policy.quota), (400, quota))
+
+    @patch('app.services.ttl_policy.QuotaMonitor.start')
+    def test_inspection_endpoint(self, start):
+        app = create_app()
+        start.assert_not_called()
+        app.rate_limiter.script = None
+        app.currency_service = CurrencyService(FakeRedisClient())
+        app.currency_service.redis_client.set_value("v2_USD_EUR", encode_rate(0.9, "t", 100.0, 2e-7), 3600)
+
+        response = app.test_client().get("/api/v2/ttl-policy?from=usd&to=eur")
+        policy = response.get_json()["data"]
+
+        start.assert_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((policy["from"], policy["provider"], policy["soft_ttl"]), ("USD", "v2", 2500))
+        self.assertEqual(policy["fresh_for"], 0.0)
+
+        self.assertEqual(app.test_client().get("/api/v2/ttl-policy?from=USD&to=EUR&provider=v9").status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import runpy
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from app import create_app
+from app.cache.redis_client import RedisClient
+from app.services.currency_service import CurrencyService
+from app.utils.worker_profile import reset_after_fork, start_background_threads, flush_before_exit
+from tests.fakes import FakeRedisClient
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "gunicorn.conf.py")
+
+
+def load_profile(**env):
+    with patch.dict(os.environ, env), patch('dotenv.load_dotenv'):
+        return runpy.run_path(CONFIG_PATH)
+
+
+class TestWorkerProfile(unittest.TestCase):
+
+    def test_workers_are_sized_per_worker_class(self):
+        with patch('os.sched_getaffinity', return_value=set(range(4)), create=True):
+            sync = load_profile(GUNICORN_WORKER_CLASS="sync", WEB_CONCURRENCY="", GUNICORN_THREADS="")
+            threaded = load_profile(GUNICORN_WORKER_CLASS="gthread", WEB_CONCURRENCY="", GUNICORN_THREADS="")
+
+        self.assertEqual((sync["workers"], sync["threads"]), (9, 1))
+        self.assertEqual((threaded["workers"], threaded["threads"]), (5, 4))
+
+    def test_environment_overrides_the_sizing(self):
+        profile = load_profile(GUNICORN_WORKER_CLASS="gthread", WEB_CONCURRENCY="3", GUNICORN_THREADS="16", GUNICORN_PRELOAD="false")
+
+        self.assertEqual((profile["workers"], profile["threads"], profile["preload_app"]), (3, 16, False))
+
+    def test_unknown_worker_class_is_rejected(self):
+        with self.assertRaises(ValueError):
+            load_profile(GUNICORN_WORKER_CLASS="eventlet")
+
+    def test_fork_reset_rebuilds_redis_pool_and_sessions(self):
+        redis_client = RedisClient()
+        service = CurrencyService(redis_client)
+        app = SimpleNamespace(redis_client=redis_client, currency_service=service)
+
+        client = redis_client.client
+        session = service.open_xr_session
+
+        reset_after_fork(app)
+
+        self.assertIsNot(redis_client.client, client)
+        self.assertIsNot(service.open_xr_session, session)
+
+    def test_threads_start_in_workers_not_in_the_factory(self):
+        with patch('app.config.Config.PREFETCH_ENABLED', True), patch('app.services.prefetch_scheduler.PrefetchScheduler.start') as start:
+            app = create_app()
+            start.assert_not_called()
+
+            start_background_threads(app)
+
+        start.assert_called_once()
+
+    def test_exit_flushes_hot_pairs(self):
+        redis_client = FakeRedisClient()
+        service = CurrencyService(redis_client)
+        service.hot_pairs.enabled = True
+        service.hot_pairs.record("v2", "USD", "EUR")
+
+        flush_before_exit(SimpleNamespace(currency_service=service))
+
+        self.assertEqual(redis_client.sorted_sets["hot_pairs_v2"], {"USD_EUR": 1})
+
+    def test_exit_flush_failure_does_not_raise(self):
+        service = MagicMock()
+        service.hot_pairs.flush.side_effect = ConnectionError("redis down")
+
+        flush_before_exit(SimpleNamespace(currency_service=service))
+
+
+if __name__ == '__main__':
+    unittest.main()